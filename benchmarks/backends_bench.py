@@ -0,0 +1,50 @@
+"""
+Times every pathfinder backend on random searches over every shipped map,
+and reports the fastest one next to the one chosen from the map statistics.
+
+Run from the root of the repository with:
+    python -m benchmarks.backends_bench
+"""
+from os import listdir
+from os.path import isfile, join
+from random import Random
+from time import perf_counter
+
+from src.core.consts import MAPS_PATH
+from src.core.level import import_map
+from src.core.pathfinders import PATHFINDERS
+from src.core.utils_types import Pos
+
+NB_SEARCHES = 300
+NB_BLOCKED = 10
+SEED = 42
+
+
+def run(pathfinder, grid, queries, landmarks) -> tuple[int, float]:
+    stats = {"expanded": 0}
+    t = perf_counter()
+    for start, end, blocked in queries:
+        pathfinder.find(grid, start, [end], blocked, landmarks, stats)
+    return stats["expanded"], perf_counter() - t
+
+
+def main():
+    rng = Random(SEED)
+    names = list(PATHFINDERS)
+    print(f"{'map':<20}{'open':>6}" + "".join(f"{n + ' (ms)':>20}" for n in names) + f"{'fastest':>15}{'chosen':>15}")
+    for f in sorted(x for x in listdir(MAPS_PATH) if isfile(join(MAPS_PATH, x))):
+        level = import_map(join(MAPS_PATH, f))
+        grid = level.grid
+        cells = [Pos(x, y) for x in range(len(grid)) for y in range(len(grid[0])) if grid[x][y].walkable]
+        queries = [(rng.choice(cells), rng.choice(cells), rng.sample(cells, min(NB_BLOCKED, len(cells))))
+                   for _ in range(NB_SEARCHES)]
+        times = {}
+        for name in names:
+            _, times[name] = run(PATHFINDERS[name], grid, queries, level.get_landmarks())
+        stats = level.get_map_stats()
+        print(f"{f:<20}{stats.open_ratio():>6.2f}" + "".join(f"{times[n] * 1000:>20.1f}" for n in names)
+              + f"{min(times, key=times.get):>15}{stats.best_pathfinder():>15}")
+
+
+if __name__ == "__main__":
+    main()
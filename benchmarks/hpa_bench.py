@@ -0,0 +1,81 @@
+"""
+Measures the cost of planning a hero path on maps far bigger than the
+shipped ones, with flat A* and with the hierarchical pathfinding.
+
+Big maps are made by tiling the inside of a shipped map. As in a game,
+every hero heads to the same goal from its own start: the distances of
+the abstract graph to that goal are computed once and shared, they are
+reported apart from the cost of each hero.
+
+Run from the root of the repository with:
+    python -m benchmarks.hpa_bench
+"""
+from os.path import join
+from random import Random
+from time import perf_counter
+
+from src.core.consts import MAPS_PATH, CLUSTER_SIZE
+from src.core.hierarchy import Hpa_graph
+from src.core.level import import_map
+from src.core.pathfinding import Astar
+from src.core.utils_types import Pos
+
+MAP = "maze.map"
+SIZES = [16, 64, 128, 256]
+NB_SEARCHES = 50
+SEED = 42
+
+
+def tiled_grid(base, size: int):
+    inside = [row[1:-1] for row in base[1:-1]]
+    n = len(inside)
+    m = len(inside[0])
+    return [[inside[x % n][y % m] for y in range(size)] for x in range(size)]
+
+
+def main():
+    rng = Random(SEED)
+    base = import_map(join(MAPS_PATH, MAP)).grid
+    print(f"{'size':>6}{'build (s)':>11}{'goal (ms)':>11}{'A* (ms)':>10}{'HPA* first step (ms)':>22}"
+          f"{'HPA* full (ms)':>16}{'extra length':>14}")
+    for size in SIZES:
+        grid = tiled_grid(base, size)
+        t = perf_counter()
+        hpa = Hpa_graph(grid, CLUSTER_SIZE)
+        build_t = perf_counter() - t
+
+        cells = [Pos(x, y) for x in range(size) for y in range(size) if grid[x][y].walkable]
+        goal = rng.choice(cells)
+        queries = [(rng.choice(cells), goal) for _ in range(NB_SEARCHES)]
+        t = perf_counter()
+        hpa.goal_field([hpa.graph.index(goal)])
+        goal_t = perf_counter() - t
+        flat_t = first_t = full_t = 0
+        flat_len = hpa_len = 0
+        for start, end in queries:
+            t = perf_counter()
+            flat = Astar(grid, start, end, blocked=[])
+            flat_t += perf_counter() - t
+
+            t = perf_counter()
+            lazy = hpa.find(start, [end])
+            if lazy is not None and len(lazy) > 0:
+                lazy[-1]
+            first_t += perf_counter() - t
+
+            t = perf_counter()
+            lazy = hpa.find(start, [end])
+            full = None if lazy is None else lazy.to_list(start)
+            full_t += perf_counter() - t
+
+            if flat is not None and full is not None:
+                flat_len += len(flat)
+                hpa_len += len(full)
+
+        extra = (hpa_len - flat_len) / flat_len * 100 if flat_len else 0
+        print(f"{size:>6}{build_t:>11.2f}{goal_t * 1000:>11.2f}{flat_t / NB_SEARCHES * 1000:>10.2f}"
+              f"{first_t / NB_SEARCHES * 1000:>22.2f}{full_t / NB_SEARCHES * 1000:>16.2f}{extra:>13.1f}%")
+
+
+if __name__ == "__main__":
+    main()
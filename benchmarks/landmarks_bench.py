@@ -0,0 +1,45 @@
+"""
+Compares the nodes expanded by A* with the Chebyshev heuristic and with
+the ALT heuristic computed from the landmarks of every shipped map.
+
+Run from the root of the repository with:
+    python -m benchmarks.landmarks_bench
+"""
+from os import listdir
+from os.path import isfile, join
+from random import Random
+from time import perf_counter
+
+from src.core.consts import MAPS_PATH
+from src.core.level import import_map
+from src.core.pathfinding import Astar
+from src.core.utils_types import Pos
+
+NB_SEARCHES = 300
+SEED = 42
+
+
+def run(grid, queries, landmarks) -> tuple[int, float]:
+    stats = {"expanded": 0}
+    t = perf_counter()
+    for start, end in queries:
+        Astar(grid, start, end, blocked=[], landmarks=landmarks, stats=stats)
+    return stats["expanded"], perf_counter() - t
+
+
+def main():
+    rng = Random(SEED)
+    print(f"{'map':<20}{'Chebyshev nodes':>17}{'ALT nodes':>11}{'ratio':>8}{'Chebyshev (ms)':>16}{'ALT (ms)':>10}")
+    for f in sorted(x for x in listdir(MAPS_PATH) if isfile(join(MAPS_PATH, x))):
+        level = import_map(join(MAPS_PATH, f))
+        grid = level.grid
+        cells = [Pos(x, y) for x in range(len(grid)) for y in range(len(grid[0])) if grid[x][y].walkable]
+        queries = [(rng.choice(cells), rng.choice(cells)) for _ in range(NB_SEARCHES)]
+        cheb_n, cheb_t = run(grid, queries, None)
+        alt_n, alt_t = run(grid, queries, level.get_landmarks())
+        print(f"{f:<20}{cheb_n / NB_SEARCHES:>17.1f}{alt_n / NB_SEARCHES:>11.1f}{alt_n / cheb_n:>8.2f}"
+              f"{cheb_t * 1000:>16.1f}{alt_t * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
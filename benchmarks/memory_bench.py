@@ -0,0 +1,103 @@
+"""
+Reports the memory taken by heroes and buildings, with their slotted
+layouts and with the dict-backed layouts they had before, and by the game
+instances the web server rebuilds on every request.
+
+Run from the root of the repository with:
+    python -m benchmarks.memory_bench
+"""
+import random
+import tracemalloc
+from os.path import join
+
+from src.core.consts import MAPS_PATH
+from src.core.level import import_map
+from src.core.game_instance import Game_instance, GAME_PHASE
+from src.core.all_entities import ALL_ENTITIES
+from src.core.buildings.all_buildings import ALL_BUILDINGS
+from src.core.utils_types import Pos
+from src.web.to_dict import to_dict
+from src.web.recreator import dict_to_instance
+
+NB_OBJECTS = 2000
+MAP = "classic.map"
+NB_TICKS = 300
+SEED = 42
+
+
+def slot_names(cls: type) -> list[str]:
+    return [name for c in reversed(cls.__mro__) for name in c.__dict__.get("__slots__", ())]
+
+
+def with_dict(cls: type):
+    """
+    Returns a function making objects that hold the attributes of the
+    instances of cls in a __dict__, the layout they had before the slots.
+    A subclass of cls would keep its attributes in the slots.
+    """
+    plain = type(cls.__name__, (), {})
+    names = slot_names(cls)
+
+    def make(*args):
+        obj = cls(*args)
+        res = plain()
+        for name in names:
+            if hasattr(obj, name):
+                setattr(res, name, getattr(obj, name))
+        return res
+    return make
+
+
+def bytes_per_object(make) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [make() for _ in range(NB_OBJECTS)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / NB_OBJECTS
+
+
+def game_bytes() -> tuple[float, float]:
+    """
+    Returns the memory held by a game rebuilt from its dict in the middle
+    of a wave, and the peak allocated while rebuilding it
+    """
+    random.seed(SEED)
+    g = Game_instance(import_map(join(MAPS_PATH, MAP)))
+    for i, b in enumerate(ALL_BUILDINGS[:3] * 20):
+        for x in range(len(g.grid)):
+            p = Pos(x, (7 * i + x) % len(g.grid[0]))
+            if g.can_place(b, p):
+                g.place(b, p)
+                break
+    for _ in range(NB_TICKS):
+        if g.state == GAME_PHASE.BUILDING_PHASE:
+            g.time_until_next_wave = 0
+        g.update()
+    d = to_dict(g)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rebuilt = dict_to_instance(d)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rebuilt
+    return current - before, peak - before
+
+
+def main():
+    print(f"{'object':<16}{'slots (B)':>11}{'dict (B)':>10}")
+    for cls in ALL_ENTITIES:
+        print(f"{cls.__name__:<16}{bytes_per_object(cls):>11.0f}{bytes_per_object(with_dict(cls)):>10.0f}")
+    for b in ALL_BUILDINGS:
+        cls = type(b)
+        make = with_dict(cls)
+        slotted = bytes_per_object(lambda: cls(Pos(1, 1)))
+        backed = bytes_per_object(lambda: make(Pos(1, 1)))
+        print(f"{cls.__name__:<16}{slotted:>11.0f}{backed:>10.0f}")
+    current, peak = game_bytes()
+    print(f"game rebuilt from its dict on {MAP}: {current / 1024:.0f} KiB held, {peak / 1024:.0f} KiB peak")
+
+
+if __name__ == "__main__":
+    main()
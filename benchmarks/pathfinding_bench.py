@@ -0,0 +1,102 @@
+"""
+Compares the flat heap-based A* with the original PriorityQueue one on
+every shipped map.
+
+Run from the root of the repository with:
+    python -m benchmarks.pathfinding_bench
+"""
+from os import listdir
+from os.path import isfile, join
+from queue import PriorityQueue
+from random import Random
+from time import perf_counter
+
+from src.core.consts import MAPS_PATH
+from src.core.level import import_map
+from src.core.pathfinding import Astar, DIRS, h, path, weight
+from src.core.utils_types import Pos
+
+NB_SEARCHES = 200
+NB_BLOCKED = 20
+SEED = 42
+
+
+def legacy_Astar(grid, start, end, weight_fun=None, blocked=None):
+    """The original implementation, kept here as the baseline"""
+    pq = PriorityQueue()
+    if weight_fun is None:
+        weight_fun = weight
+    seen = {}
+    prevs = {}
+    dists = {}
+    dists[start] = 0
+    pq.put((h(start, end), start))
+    while not pq.empty():
+        node = pq.get()[1]
+        if node in seen:
+            continue
+        if node == end:
+            return path(prevs, node, start)
+        seen[node] = True
+        for d in DIRS:
+            new = node+d
+            if new.x < 0 or new.x >= len(grid):
+                continue
+            if new.y < 0 or new.y >= len(grid[0]):
+                continue
+            tile = grid[new.x][new.y]
+            if not tile.walkable:
+                continue
+            if new not in seen:
+                if new not in dists:
+                    dists[new] = dists[node] + weight_fun(tile, new, blocked)
+                    prevs[new] = node
+                else:
+                    if dists[node] + weight_fun(tile, new, blocked) < dists[new]:
+                        prevs[new] = node
+                        dists[new] = dists[node] + \
+                            weight_fun(tile, new, blocked)
+                pq.put((dists[new] + h(new, end), new))
+    return None
+
+
+def walkable_cells(grid) -> list[Pos]:
+    return [Pos(x, y) for x in range(len(grid)) for y in range(len(grid[0])) if grid[x][y].walkable]
+
+
+def make_queries(grid, rng: Random):
+    cells = walkable_cells(grid)
+    blocked = rng.sample(cells, min(NB_BLOCKED, len(cells)))
+    return [(rng.choice(cells), rng.choice(cells)) for _ in range(NB_SEARCHES)], blocked
+
+
+def cost(grid, p, blocked):
+    if p is None:
+        return None
+    return sum(weight(grid[c.x][c.y], c, blocked) for c in p[1:])
+
+
+def time_searches(fun, grid, queries, blocked) -> tuple[float, list]:
+    res = []
+    t = perf_counter()
+    for start, end in queries:
+        res.append(fun(grid, start, end, blocked=blocked))
+    return perf_counter() - t, res
+
+
+def main():
+    rng = Random(SEED)
+    print(f"{'map':<20}{'legacy (ms)':>14}{'flat (ms)':>12}{'speedup':>10}")
+    for f in sorted(x for x in listdir(MAPS_PATH) if isfile(join(MAPS_PATH, x))):
+        grid = import_map(join(MAPS_PATH, f)).grid
+        queries, blocked = make_queries(grid, rng)
+        legacy_t, legacy_res = time_searches(legacy_Astar, grid, queries, blocked)
+        flat_t, flat_res = time_searches(Astar, grid, queries, blocked)
+        for a, b in zip(legacy_res, flat_res):
+            if cost(grid, a, blocked) != cost(grid, b, blocked):
+                raise Exception(f"Paths of different costs found on {f}")
+        print(f"{f:<20}{legacy_t * 1000:>14.1f}{flat_t * 1000:>12.1f}{legacy_t / flat_t:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Compares the positions of utils_types with the former string-hashed ones,
+on an A* keyed by positions and on the moves of the occupancy index.
+
+Run from the root of the repository with:
+    python -m benchmarks.pos_bench
+"""
+from heapq import heappush, heappop
+from os import listdir
+from os.path import isfile, join
+from random import Random
+from time import perf_counter
+
+from src.core.consts import MAPS_PATH
+from src.core.level import import_map
+from src.core.occupancy import Occupancy
+from src.core.all_entities import Rat
+from src.core.utils_types import Pos
+
+NB_SEARCHES = 50
+NB_MOVES = 100000
+SEED = 42
+DIRS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+
+class Legacy_pos():
+    """
+    Positions as they were before, hashed through a string
+    """
+
+    def __init__(self, x: int, y: int):
+        self.x = x
+        self.y = y
+
+    def __add__(self, p):
+        return Legacy_pos(self.x + p.x, self.y + p.y)
+
+    def __eq__(self, value):
+        return self.x == value.x and self.y == value.y
+
+    def __hash__(self):
+        return (str(self.x)+","+str(self.y)).__hash__()
+
+    def __lt__(self, other):
+        if self.x == other.x:
+            return self.y < other.y
+        return self.x < other.x
+
+
+def astar(grid, start, end, cls) -> int:
+    """
+    A* keyed by positions, the way it was written before the flat graph
+
+    :return: the length of the path found
+    """
+    dirs = [cls(dx, dy) for dx, dy in DIRS]
+    seen = {start}
+    dists = {start: 0}
+    prevs = {}
+    pq = [(0, 0, start)]
+    n = 0
+    while pq:
+        _, _, p = heappop(pq)
+        if p == end:
+            break
+        for d in dirs:
+            q = p + d
+            if not (0 <= q.x < len(grid) and 0 <= q.y < len(grid[0])) or not grid[q.x][q.y].walkable:
+                continue
+            nd = dists[p] + 1
+            if q not in seen or nd < dists[q]:
+                seen.add(q)
+                dists[q] = nd
+                prevs[q] = p
+                n += 1
+                heappush(pq, (nd + max(abs(q.x - end.x), abs(q.y - end.y)), n, q))
+    res = 0
+    p = end
+    while p in prevs:
+        p = prevs[p]
+        res += 1
+    return res
+
+
+def moves(cells: list[tuple[int, int]], cls, rng: Random) -> float:
+    """
+    Times the moves of heroes walking at random in the occupancy index
+    """
+    occupancy = Occupancy()
+    positions = [cls(x, y) for x, y in cells]
+    heroes = []
+    for _ in range(100):
+        hero = Rat()
+        hero.position = rng.choice(positions)
+        occupancy.add_entity(hero)
+        heroes.append(hero)
+    steps = [(rng.choice(heroes), rng.choice(positions)) for _ in range(NB_MOVES)]
+    t = perf_counter()
+    for hero, p in steps:
+        occupancy.move_entity(hero, p)
+        occupancy.is_occupied(p)
+    return perf_counter() - t
+
+
+def main():
+    print(f"{'map':<20}{'A* legacy (ms)':>15}{'A* Pos (ms)':>13}{'moves legacy (ms)':>19}{'moves Pos (ms)':>16}")
+    for f in sorted(x for x in listdir(MAPS_PATH) if isfile(join(MAPS_PATH, x))):
+        grid = import_map(join(MAPS_PATH, f)).grid
+        cells = [(x, y) for x in range(len(grid)) for y in range(len(grid[0])) if grid[x][y].walkable]
+        rng = Random(SEED)
+        queries = [(rng.choice(cells), rng.choice(cells)) for _ in range(NB_SEARCHES)]
+        times = []
+        for cls in (Legacy_pos, Pos):
+            t = perf_counter()
+            lengths = [astar(grid, cls(*a), cls(*b), cls) for a, b in queries]
+            times.append(perf_counter() - t)
+            if cls is Legacy_pos:
+                expected = lengths
+            assert lengths == expected
+        for cls in (Legacy_pos, Pos):
+            times.append(moves(cells, cls, Random(SEED)))
+        print(f"{f:<20}" + "".join(f"{t * 1000:>{w}.1f}" for t, w in zip(times, (15, 13, 19, 16))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Measures how the games played per second by the layout evaluation grow
+with the number of worker processes.
+
+Run from the root of the repository with:
+    python -m benchmarks.sim_bench
+"""
+from os import cpu_count
+from os.path import join
+from time import perf_counter
+
+from src.core.consts import MAPS_PATH
+from src.sim.build_order import import_build_order
+from src.sim.evaluate import evaluate
+
+MAP = "classic.map"
+BUILD_ORDER = "data/build_orders/classic.txt"
+NB_GAMES = 32
+
+
+def main():
+    steps = import_build_order(BUILD_ORDER)
+    cores = cpu_count() or 1
+    workers = [1]
+    while workers[-1] * 2 <= cores:
+        workers.append(workers[-1] * 2)
+    if workers[-1] != cores:
+        workers.append(cores)
+    print(f"{'workers':<10}{'games/s':>10}{'speedup':>10}")
+    base = None
+    for n in workers:
+        t = perf_counter()
+        evaluate(join(MAPS_PATH, MAP), [steps], range(NB_GAMES), n)
+        rate = NB_GAMES / (perf_counter() - t)
+        base = base or rate
+        print(f"{n:<10}{rate:>10.1f}{rate / base:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
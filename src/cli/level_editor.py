@@ -333,13 +333,13 @@ class LevelEditor:
         if self.line_mode:
             # Movement in line mode
             if key == curses.KEY_UP and self.cursor.x > 0:
-                self.cursor.x -= 1
+                self.cursor = self.cursor + Pos(-1, 0)
             elif key == curses.KEY_DOWN and self.cursor.x < X_MAX - 1:
-                self.cursor.x += 1
+                self.cursor = self.cursor + Pos(1, 0)
             elif key == curses.KEY_LEFT and self.cursor.y > 0:
-                self.cursor.y -= 1
+                self.cursor = self.cursor + Pos(0, -1)
             elif key == curses.KEY_RIGHT and self.cursor.y < Y_MAX - 1:
-                self.cursor.y += 1
+                self.cursor = self.cursor + Pos(0, 1)
             elif key == ord('\n'):
                 # Finish line
                 self._apply_grid_mode_line(self.line_start, self.cursor)
@@ -350,13 +350,13 @@ class LevelEditor:
         # Normal grid editing mode
         # Movement
         if key == curses.KEY_UP and self.cursor.x > 0:
-            self.cursor.x -= 1
+            self.cursor = self.cursor + Pos(-1, 0)
         elif key == curses.KEY_DOWN and self.cursor.x < X_MAX - 1:
-            self.cursor.x += 1
+            self.cursor = self.cursor + Pos(1, 0)
         elif key == curses.KEY_LEFT and self.cursor.y > 0:
-            self.cursor.y -= 1
+            self.cursor = self.cursor + Pos(0, -1)
         elif key == curses.KEY_RIGHT and self.cursor.y < Y_MAX - 1:
-            self.cursor.y += 1
+            self.cursor = self.cursor + Pos(0, 1)
 
         # Mode selection
         elif key == ord('w'):
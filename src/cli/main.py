@@ -8,7 +8,7 @@ from ..core.utils_types import Pos
 from ..core.splash_text import get_random_splash_text
 from ..core.consts import MAPS_PATH, X_MAX, Y_MAX
 
-from .cli_logging import clear_log
+from .cli_logging import clear_log, log_message
 from .cli_display import *
 from .cli_colors import init_colors
 from ..core.game_instance import Game_instance, GAME_PHASE
@@ -137,6 +137,16 @@ def main(stdscr: curses.window) -> None:
                         if game_instance.time_until_next_wave < 0:
                             game_instance.time_until_next_wave = 0
 
+                    # Records the cost of pathfinding until 'p' is pressed again,
+                    # then writes the report to the log
+                    if key == ord('p'):
+                        if game_instance.path_stats is None:
+                            game_instance.enable_path_stats()
+                        else:
+                            for line in game_instance.path_stats.report():
+                                log_message(line)
+                            game_instance.disable_path_stats()
+
                     if game_instance.finished:
                         game_state = GAME_STATES.GAME_OVER
 
@@ -168,11 +178,11 @@ def main(stdscr: curses.window) -> None:
                             if key == ord('\n') and selected_building.is_upgradable():
                                 cost = selected_building.get_upgrade_cost()
                                 if game_instance.gold >= cost:
-                                    selected_building.upgrade()
+                                    game_instance.upgrade(selected_building)
                                     selection = False
 
                             elif key == ord('d'):
-                                game_instance.buildings.remove(selected_building)
+                                game_instance.delete(selected_building)
                                 selection = False
                         
                         # Building creation menu
@@ -1,26 +1,29 @@
 from .entity import Entity, STRATS
 from .utils_types import Pos
-from random import randint
+from random import Random, randint
 
 
 #Classes utilisées pour les tests
 
 class Paladin(Entity):
+    __slots__ = ()
     ascii = "P"
-    name = "Paladin"
+
     def __init__(self):
-        super().__init__(Pos(0, 0), False, 50, 30, self.name, 2)
+        super().__init__(Pos(0, 0), False, 50, 30, "Paladin", 2)
 
 class Rat(Entity):
+    __slots__ = ()
     ascii = "r"
-    name = "Rat"
+
     def __init__(self):
-        super().__init__(Pos(0, 0), False, 1, 1, self.name, 2)
+        super().__init__(Pos(0, 0), False, 1, 1, "Rat", 2)
 
 
 #Classes réelles
 
 class Eel(Entity):
+    __slots__ = ()
     ascii = "e"
 
     def __init__(self):
@@ -36,6 +39,7 @@ class Eel(Entity):
         return STRATS.RUNNER        
 
 class Clod(Entity):
+    __slots__ = ()
     ascii = "c"
 
     def __init__(self):
@@ -47,8 +51,8 @@ class Clod(Entity):
         speed = 5
         super().__init__(p, ally, maxhp, strength, name, speed)
 
-    def set_ai(self, ai):
-        seed = randint(0,100)
+    def set_ai(self, ai, rng: Random = None):
+        seed = rng.randint(0, 100) if rng is not None else randint(0, 100)
         if seed <= 40:
             self.ai = STRATS.ATTACK
             #clod veut djoufara les tours
@@ -58,6 +62,7 @@ class Clod(Entity):
             self.maxhp += 500
 
 class Seal(Entity):
+    __slots__ = ()
     ascii = "s"
 
     def __init__(self):
@@ -70,6 +75,7 @@ class Seal(Entity):
         super().__init__(p, ally, maxhp, strength, name, speed)
 
 class Fih(Entity):
+    __slots__ = ()
     ascii = "f"
 
     def __init__(self):
@@ -86,6 +92,7 @@ class Fih(Entity):
 
 
 class Turtle(Entity):
+    __slots__ = ()
     ascii = "t"
 
     def __init__(self):
@@ -98,6 +105,7 @@ class Turtle(Entity):
         super().__init__(p, ally, maxhp, strength, name, speed)
 
 class Liar(Entity):
+    __slots__ = ()
     ascii = "B"
 
     def __init__(self):
@@ -119,6 +127,7 @@ class Liar(Entity):
             else:
                 self.speed = 2
                 self.hp = self.maxhp
+        self.hp_changed()
 
 
 ALL_ENTITIES: list[Entity] = [Paladin,
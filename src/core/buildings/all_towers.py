@@ -1,9 +1,12 @@
 from .tower import Tower
+from .targeting import LOWEST_HP
 from ..entity import Entity
 from ..tiles import TILES_TYPES
 from ..tiles import TILES_TYPES
 
 class ArcherTower(Tower):
+    __slots__ = ()
+
     def __init__(self, p):
         cost = [100, 100, 200, 300, 500]
         building_restriction = [TILES_TYPES.BASIC_WALL, TILES_TYPES.BASIC_FLOOR, TILES_TYPES.VOID]
@@ -11,6 +14,7 @@ class ArcherTower(Tower):
         base_range = 4
         hp = 500
         super().__init__(p, cost, building_restriction, name, base_range, hp)
+        self.policy = LOWEST_HP
 
     def get_range(self) -> int:
         return self.base_range + self.level - 1
@@ -37,13 +41,8 @@ class ArcherTower(Tower):
         cloned = ArcherTower(p)
         return cloned
     
-    def attack(self, enemies) -> bool:
-        in_range : list[Entity] = []
-        center = self.pos
-
-        for enemy in enemies:
-            if enemy.position.dist(center) <= self.get_range():
-                in_range.append(enemy)
+    def attack(self, enemies, index=None) -> bool:
+        in_range : list[Entity] = self.in_reach(enemies, index)
 
         if len(in_range) > 0:
             lowest_life_enemy = in_range[0]
@@ -58,6 +57,8 @@ class ArcherTower(Tower):
     
 
 class ElectricTower(Tower):
+    __slots__ = ()
+
     def __init__(self, p):
         cost = [300, 300, 500]
         building_restriction = [TILES_TYPES.BASIC_WALL, TILES_TYPES.BASIC_FLOOR, TILES_TYPES.VOID]
@@ -91,26 +92,24 @@ class ElectricTower(Tower):
         cloned = ElectricTower(p)
         return cloned
     
-    def attack(self, enemies) -> bool:
-        center = self.pos
-
+    def attack(self, enemies, index=None) -> bool:
         has_attacked = False
         attacked_enemies = 0 
 
-        
-        for enemy in enemies:
-            if enemy.position.dist(center) <= self.get_range():
-                self.damage(enemy)
-                has_attacked = True
-                attacked_enemies += 1
+        for enemy in self.in_reach(enemies, index):
+            self.damage(enemy)
+            has_attacked = True
+            attacked_enemies += 1
 
-                if attacked_enemies == self.get_range_of_effect():
-                    return True
+            if attacked_enemies == self.get_range_of_effect():
+                return True
 
         return has_attacked
     
 
 class PlaceableWall(Tower):
+    __slots__ = ()
+
     def __init__(self, p):
         cost = [50, 50, 100]
         building_restriction = [TILES_TYPES.BASIC_BUILDING, TILES_TYPES.VOID, TILES_TYPES.BASIC_WALL]
@@ -124,6 +123,9 @@ class PlaceableWall(Tower):
     
     def get_range_of_effect(self) -> int:
         return 0
+
+    def get_reach(self) -> int | None:
+        return None
     
     def damage(self, e: Entity):
         inflicted_damage = 0 
@@ -144,5 +146,5 @@ class PlaceableWall(Tower):
         cloned = PlaceableWall(p)
         return cloned
     
-    def attack(self, enemies) -> bool:
+    def attack(self, enemies, index=None) -> bool:
         return False
\ No newline at end of file
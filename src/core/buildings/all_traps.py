@@ -7,6 +7,8 @@ class ExplosiveTrap(Trap):
     """
     A trap with huge AOE damages but few utilisations
     """
+    __slots__ = ()
+
     def __init__(self, p):
         cost = [100, 100, 250]
         building_restriction = [TILES_TYPES.BASIC_WALL, TILES_TYPES.VOID]
@@ -17,6 +19,9 @@ class ExplosiveTrap(Trap):
     def get_range_of_effect(self) -> int:
         return 3 + self.level
 
+    def get_reach(self) -> int | None:
+        return self.get_range_of_effect()
+
     def damage(self, e: Entity):
         inflicted_damage = 800 * self.level
         e.take_damage(inflicted_damage)
@@ -25,17 +30,13 @@ class ExplosiveTrap(Trap):
         placed = ExplosiveTrap(p)
         return placed
     
-    def attack(self, enemies: list[Entity]) -> bool:
-        in_range = []
-        center = self.pos
+    def attack(self, enemies: list[Entity], index=None) -> bool:
+        in_range = self.in_reach(enemies, index)
         explose_flag = False
 
-        for enemy in enemies:
-            if enemy.position.dist(center) <= self.get_range_of_effect():
-                in_range.append(enemy)
-
-                if enemy.position == self.pos:
-                    explose_flag = True
+        for enemy in in_range:
+            if enemy.position == self.pos:
+                explose_flag = True
 
         if explose_flag:
             for enemy in in_range:
@@ -45,6 +46,8 @@ class ExplosiveTrap(Trap):
         return explose_flag
 
 class Pitfall(Trap):
+    __slots__ = ()
+
     def __init__(self, p):
         cost = [150]
         building_restriction = [TILES_TYPES.BASIC_WALL, TILES_TYPES.VOID]
@@ -54,6 +57,9 @@ class Pitfall(Trap):
 
     def get_range_of_effect(self) -> int:
         return 0
+
+    def get_reach(self) -> int | None:
+        return 0
     
     def damage(self, e: Entity):
         inflicted_damage = e.get_max_hp()
@@ -63,14 +69,12 @@ class Pitfall(Trap):
         placed = Pitfall(p)
         return placed
     
-    def attack(self, enemies: list[Entity]) -> bool:
-        center = self.pos
+    def attack(self, enemies: list[Entity], index=None) -> bool:
         was_activated = False
 
-        for enemy in enemies:
-            if enemy.position == center:
-                self.damage(enemy)
-                was_activated = True
+        for enemy in self.in_reach(enemies, index):
+            self.damage(enemy)
+            was_activated = True
 
         if was_activated:
             self.activate()
@@ -1,10 +1,23 @@
 from ..utils_types import Pos
 from ..entity import Entity
 from .building_descriptions import *
-from ..tiles import TILES_TYPES
+from ..tiles import TILES_TYPES, Tile
+
+# Offsets of the cells at a Manhattan distance of at most r, for each r
+_diamonds: dict[int, list[tuple[int, int]]] = {}
+
+
+def diamond(r: int) -> list[tuple[int, int]]:
+    res = _diamonds.get(r)
+    if res is None:
+        res = [(dx, dy) for dx in range(-r, r + 1) for dy in range(-(r - abs(dx)), r - abs(dx) + 1)]
+        _diamonds[r] = res
+    return res
 
 
 class Building():
+    __slots__ = ("pos", "cost", "building_restriction", "level", "name", "dead", "covered")
+
     def __init__(self, p: Pos, c: list[int], b: list[TILES_TYPES], n: str):
         self.pos = p
         self.cost = c
@@ -12,6 +25,8 @@ class Building():
         self.level = 1
         self.name = n
         self.dead = False
+        # Cells within reach at the current level, see get_covered_cells
+        self.covered: frozenset[Pos] | None = None
 
     def get_range_of_effect(self) -> int:
         """
@@ -42,12 +57,54 @@ class Building():
         """
         pass
 
-    def attack(self, enemies: list[Entity]) -> bool:
+    def get_reach(self) -> int | None:
+        """
+        returns the distance at which the building hits enemies, None if it
+        never does
+        """
+        return None
+
+    def get_covered_cells(self, grid: list[list[Tile]]) -> frozenset[Pos]:
+        """
+        Returns the walkable cells of grid within reach of the building.
+        They are cached until the building is upgraded.
+        """
+        if self.covered is None:
+            r = self.get_reach()
+            cells = []
+            if r is not None:
+                for dx, dy in diamond(r):
+                    x = self.pos.x + dx
+                    y = self.pos.y + dy
+                    if 0 <= x < len(grid) and 0 <= y < len(grid[x]) and grid[x][y].walkable:
+                        cells.append(Pos(x, y))
+            self.covered = frozenset(cells)
+        return self.covered
+
+    def in_reach(self, enemies: list[Entity], index=None) -> list[Entity]:
+        """
+        Returns the enemies within reach, in the order of enemies
+
+        :param index: Bucket_grid or Hero_arrays over enemies
+        """
+        r = self.get_reach()
+        if r is None:
+            return []
+        if index is not None:
+            return index.in_range(self.pos, r)
+        if self.covered is not None:
+            covered = self.covered
+            return [e for e in enemies if e.position in covered]
+        return [e for e in enemies if e.position.dist(self.pos) <= r]
+
+    def attack(self, enemies: list[Entity], index=None) -> bool:
         """
         Attacks nearby entities and inflicts them damage
 
         :param enemies: The list of all enemies in the map
         :type enemies: list[Entity]
+        :param index: Bucket_grid or Hero_arrays over enemies, to only look at
+            the nearby ones
 
         :return: whether an attack was made
         :rtype: bool
@@ -55,6 +112,8 @@ class Building():
         
     def upgrade(self):
         self.level += 1
+        # The reach may depend on the level
+        self.covered = None
 
     def is_upgradable(self) -> bool:
         return self.level < len(self.cost)
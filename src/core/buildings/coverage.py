@@ -0,0 +1,48 @@
+from ..utils_types import Pos
+from ..tiles import Tile
+from .building import Building
+
+
+class Coverage():
+    """
+    Reverse map of the cells covered by the placed buildings: for each
+    cell, the buildings that can hit a hero standing on it
+    """
+
+    def __init__(self):
+        self.by_cell: dict[Pos, list[Building]] = {}
+        # Cells each building was added with, since upgrades clear its cache
+        self.cells: dict[Building, frozenset[Pos]] = {}
+
+    def clear(self):
+        self.by_cell.clear()
+        self.cells.clear()
+
+    def add(self, building: Building, grid: list[list[Tile]]):
+        cells = building.get_covered_cells(grid)
+        self.cells[building] = cells
+        for p in cells:
+            self.by_cell.setdefault(p, []).append(building)
+
+    def remove(self, building: Building):
+        for p in self.cells.pop(building, ()):
+            covering = self.by_cell[p]
+            covering.remove(building)
+            if not covering:
+                del self.by_cell[p]
+
+    def refresh(self, building: Building, grid: list[list[Tile]]):
+        """
+        Updates the cells of building after an upgrade
+        """
+        self.remove(building)
+        self.add(building, grid)
+
+    def covering(self, p: Pos) -> list[Building]:
+        return self.by_cell.get(p, [])
+
+    def danger(self, p: Pos) -> int:
+        """
+        Returns the number of buildings that can hit a hero standing on p
+        """
+        return len(self.by_cell.get(p, ()))
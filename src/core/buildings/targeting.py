@@ -0,0 +1,113 @@
+from heapq import heapify, heappush, heappop, heapreplace
+from itertools import count
+from ..utils_types import Pos
+from ..entity import Entity
+from .building import Building
+
+# Targeting policies of the towers shooting a single hero
+LOWEST_HP = "lowest_hp"
+CLOSEST_TO_TREASURE = "closest_to_treasure"
+JEWEL_CARRIER = "jewel_carrier"
+
+POLICIES = {
+    LOWEST_HP: lambda hero, treasure: (hero.hp,),
+    CLOSEST_TO_TREASURE: lambda hero, treasure: (hero.position.dist(treasure),),
+    JEWEL_CARRIER: lambda hero, treasure: (not hero.has_jewel, hero.hp),
+}
+
+
+class Targeting():
+    """
+    Heaps of the heroes in range of each tower with a targeting policy, so
+    that a tower picks its target without looking at every hero.
+
+    Entries are pushed when a hero enters the range of a tower and when its
+    hit points change, and the outdated ones are dropped lazily when they
+    reach the top. Ties go to the hero spawned first, the one a scan of the
+    heroes of the game would pick.
+    """
+
+    def __init__(self, treasure: Pos):
+        self.treasure = treasure
+        self.heaps: dict[Building, list[tuple]] = {}
+        self.cells: dict[Building, frozenset[Pos]] = {}
+        # Spawn order of the heroes still in the game
+        self.order: dict[Entity, int] = {}
+        self.next_order = 0
+        self.count = count()
+
+    def clear(self):
+        self.heaps.clear()
+        self.cells.clear()
+        self.order.clear()
+
+    def key(self, tower: Building, hero: Entity) -> tuple:
+        return POLICIES[tower.policy](hero, self.treasure)
+
+    def push(self, tower: Building, hero: Entity):
+        heap = self.heaps[tower]
+        heappush(heap, (self.key(tower, hero), self.order[hero], next(self.count), hero))
+        if len(heap) > 2 * len(self.order) + 64:
+            self.compact(tower)
+
+    def compact(self, tower: Building):
+        """
+        Keeps one up to date entry per hero in range of tower
+        """
+        cells = self.cells[tower]
+        heroes = {e[3] for e in self.heaps[tower]}
+        self.heaps[tower] = [(self.key(tower, h), self.order[h], next(self.count), h)
+                             for h in heroes if h in self.order and h.position in cells]
+        heapify(self.heaps[tower])
+
+    def add_tower(self, tower: Building, cells: frozenset[Pos], heroes: list[Entity]):
+        """
+        Starts tracking the heroes standing on cells for tower, or tracks
+        them again after its range changed
+        """
+        self.cells[tower] = cells
+        self.heaps[tower] = [(self.key(tower, h), self.order[h], next(self.count), h)
+                             for h in heroes if h.position in cells]
+        heapify(self.heaps[tower])
+
+    def remove_tower(self, tower: Building):
+        self.heaps.pop(tower, None)
+        self.cells.pop(tower, None)
+
+    def add_hero(self, hero: Entity, covering: list[Building]):
+        self.order[hero] = self.next_order
+        self.next_order += 1
+        self.changed(hero, covering)
+
+    def remove_hero(self, hero: Entity):
+        self.order.pop(hero, None)
+
+    def changed(self, hero: Entity, covering: list[Building]):
+        """
+        Pushes hero to the towers covering its cell after it moved or its
+        hit points changed
+        """
+        if hero not in self.order:
+            return
+        for tower in covering:
+            if tower in self.heaps:
+                self.push(tower, hero)
+
+    def target(self, tower: Building) -> Entity | None:
+        """
+        Returns the hero tower should shoot according to its policy, None
+        if no hero is in range
+        """
+        heap = self.heaps[tower]
+        cells = self.cells[tower]
+        while heap:
+            key, order, _, hero = heap[0]
+            if hero not in self.order or hero.position not in cells:
+                heappop(heap)
+                continue
+            current = self.key(tower, hero)
+            if current != key:
+                heapreplace(heap, (current, order, next(self.count), hero))
+                continue
+            return hero
+        return None
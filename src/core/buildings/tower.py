@@ -2,11 +2,15 @@ from .building import Building
 
 
 class Tower(Building):
+    __slots__ = ("base_range", "maxhp", "hp", "policy")
+
     def __init__(self, p, c, b, n, r: int, hp: int):
         super().__init__(p, c, b, n,)
         self.base_range = r
         self.maxhp = hp
         self.hp = hp
+        # Targeting policy of the towers shooting a single hero, see Targeting
+        self.policy: str | None = None
 
     def get_range(self) -> int:
         """
@@ -18,12 +22,26 @@ class Tower(Building):
         """
         pass
 
+    def get_reach(self) -> int | None:
+        return self.get_range()
+
     def get_hp(self) -> int:
         return self.hp
     
     def get_maxhp(self) -> int:
         return self.maxhp
     
+    def shoot(self, target) -> bool:
+        """
+        Damages the hero picked by the policy of the tower
+
+        :return: whether there was a target
+        """
+        if target is None:
+            return False
+        self.damage(target)
+        return True
+
     def take_damage(self, i:int):
         self.hp -= i
 
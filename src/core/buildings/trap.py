@@ -1,6 +1,8 @@
 from .building import Building
 
 class Trap(Building):
+    __slots__ = ("number_of_activations",)
+
     def __init__(self, p, c, b, n, noa: int):
         super().__init__(p, c, b, n)
         self.number_of_activations = noa
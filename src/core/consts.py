@@ -11,4 +11,19 @@ BUILDING_TIME = 30  # in seconds
 WAVE_CLOCK = 5 # in amount of updates
 
 BASE_GOLD = 2500
-MONEY_PER_WAVE = 1000
\ No newline at end of file
+MONEY_PER_WAVE = 1000
+
+MAX_FLOW_FIELDS = 16 # flow fields kept between ticks
+
+HPA_MIN_SIZE = 64 # maps with more rows or columns use hierarchical pathfinding
+CLUSTER_SIZE = 16
+
+NB_LANDMARKS = 4 # landmarks used by the ALT heuristic
+
+PATH_STATS_TICKS = 100 # ticks kept by the pathfinding instrumentation
+
+BUCKET_SIZE = 4 # side of the buckets indexing the heroes for range queries
+BUCKET_MIN_HEROES = 16 # below this, scanning every hero is faster
+ARRAYS_MIN_HEROES = 512 # from this, heroes are indexed with NumPy arrays when it is installed
+
+WHEEL_SIZE = 8 # slots of the scheduler, more than the slowest speed so entities wait a single turn
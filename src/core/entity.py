@@ -1,4 +1,5 @@
 from enum import Enum, auto
+from random import Random
 from .utils_types import Pos
 
 
@@ -9,6 +10,8 @@ class STRATS(Enum):
 
 
 class Entity():
+    __slots__ = ("name", "dead", "position", "is_ally", "maxhp", "hp", "strength", "has_jewel",
+                 "home", "speed", "clock", "ai", "path", "path_version", "search", "on_hp_change")
 
     ascii = " "
 
@@ -25,6 +28,13 @@ class Entity():
         self.speed = speed
         self.clock = speed
         self.ai = STRATS.RUNNER
+        # Remaining steps of the cached path, in reverse order
+        self.path: list[Pos] | None = None
+        self.path_version = -1
+        # Search kept between ticks when searches have a budget
+        self.search = None
+        # Called with the entity whenever its hit points change
+        self.on_hp_change = None
 
     def action(self):
         pass
@@ -32,7 +42,11 @@ class Entity():
     def attack(self, other):
         other.take_damage(self.strength)
 
-    def set_ai(self, ai: STRATS):
+    def set_ai(self, ai: STRATS, rng: Random = None):
+        """
+        :param rng: random stream of the game, for the entities drawing
+            their strategy
+        """
         self.ai = ai
 
     def get_ai(self):
@@ -42,6 +56,11 @@ class Entity():
         self.hp -= n
         if self.hp <= 0:
             self.dead = True
+        self.hp_changed()
+
+    def hp_changed(self):
+        if self.on_hp_change is not None:
+            self.on_hp_change(self)
             
     def get_hp(self):
         return self.hp
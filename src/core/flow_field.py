@@ -0,0 +1,13 @@
+from .pathfinding import Dstar_lite
+
+
+class Flow_field(Dstar_lite):
+    """
+    Distance and next-hop field towards a set of goals, shared by every
+    entity heading to the same goals with the same blocked cells.
+
+    The field is the whole shortest-path tree of an unfocused D* Lite
+    search, so reading the next step of an entity is O(1), and moving the
+    blocked cells with set_blocked only repairs the part of the tree they
+    changed.
+    """
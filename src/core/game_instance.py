@@ -1,19 +1,29 @@
 from enum import Enum, auto
 import random
+from time import perf_counter
 from .level import Level_template
 from .utils_types import TasMin
 from .buildings.building import Building
+from .buildings.coverage import Coverage
+from .buildings.targeting import Targeting
 from .treasure import Treasure
 from .utils_types import Pos
 from .buildings.all_buildings import ALL_BUILDINGS
 from .entity import Entity, STRATS
 from .tiles import TILES_TYPES
-from .pathfinding import Astar
+from .flow_field import Flow_field
+from .pathfinding import Anytime_astar
+from .path_stats import Path_stats
+from .occupancy import Occupancy, first
+from .spatial_index import Bucket_grid, Hero_arrays, make_index
+from .scheduler import Timing_wheel
+from .ordered_set import Ordered_set
+from .landmarks import Landmarks
+from .pathfinders import Map_stats, Pathfinder, PATHFINDERS, FLOW_FIELDS, AUTO
 from .consts import *
 from .buildings.trap import Trap
 from ..cli.cli_logging import log_message
 from .buildings.tower import Tower
-import random
 
 
 class GAME_PHASE(Enum):
@@ -22,15 +32,61 @@ class GAME_PHASE(Enum):
 
 
 class Game_instance():
-    def __init__(self, template: Level_template):
+    def __init__(self, template: Level_template, pathfinder: str = FLOW_FIELDS, search_budget: int = None,
+                 seed: int = None):
+        """
+        :param pathfinder: FLOW_FIELDS for heroes sharing flow fields, AUTO
+            for the backend best suited to the map, or the name of a backend
+            of PATHFINDERS used by every entity
+        :param search_budget: if given, heroes search their paths with an
+            A* expanding at most this many nodes per tick, and walk the
+            best partial path until it is over. Each hero then has its own
+            search instead of the shared flow fields, and the searches are
+            not kept in the web game state.
+        :param seed: seed of the random choices of the game, drawn from the
+            random module if not given
+        """
+        if pathfinder not in PATHFINDERS and pathfinder not in (FLOW_FIELDS, AUTO):
+            raise ValueError(f"Unknown pathfinder: {pathfinder}")
         self.template = template
+        self.pathfinder = pathfinder
+        self.search_budget = search_budget
+        # Only recorded once enabled, see enable_path_stats
+        self.path_stats: Path_stats | None = None
         self.gold = BASE_GOLD
         self.grid = None
+        self.hierarchy = None
+        self.landmarks = None
+        self.map_stats = None
         if template.grid is not None:
             self.grid = [[x for x in y] for y in template.grid]
-        self.monsters: list[Entity] = []
-        self.heros: list[Entity] = []
-        self.buildings: list[Building] = []
+            # Same tiles as the template, so its precomputed hierarchy applies
+            self.hierarchy = template.hierarchy
+        self.monsters: Ordered_set[Entity] = Ordered_set()
+        self.heros: Ordered_set[Entity] = Ordered_set()
+        self.buildings: Ordered_set[Building] = Ordered_set()
+        self.occupancy = Occupancy()
+        self.coverage = Coverage()
+        # Positions of the heroes, built by the first trap or building that
+        # attacks in a tick when there are enough heroes, then moved with
+        # them until a hero is added or removed
+        self.hero_index: Bucket_grid | Hero_arrays | None = None
+        # Heroes wake up on the tick they act on, and the ones with an
+        # unfinished search also follow it on the ticks they wait
+        self.wheel = Timing_wheel()
+        self.searching: set[Entity] = set()
+        # Heroes killed since the last tick, removed on the next one. The
+        # ones killed during the moves after their own turn wait one more
+        # tick, as when every hero was visited in order
+        self.dying: set[Entity] = set()
+        self.dying_next: set[Entity] = set()
+        self.turn: int | None = None
+        # Traps that went off during the current tick
+        self.activated_traps: list[Building] = []
+        self.flow_fields: dict[tuple[tuple[Pos, ...], bool], Flow_field] = {}
+        self.fields_refreshed: set[tuple[tuple[Pos, ...], bool]] = set()
+        # Bumped every time the paths of the heroes may have changed
+        self.layout_version = 0
         self.state = GAME_PHASE.BUILDING_PHASE
 
         self.time_until_next_wave = BUILDING_TIME
@@ -43,16 +99,61 @@ class Game_instance():
 
         self.finished = False
         self.won = False
+        # Number of updates done, the random stream is seeded again on each
+        self.tick = 0
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.random = random.Random()
+        self.random_tick: int | None = None
         self.treasure = Treasure(template.treasure)
+        self.targeting = Targeting(self.treasure.pos)
+
+    def reindex(self):
+        """
+        Rebuilds the occupancy index, for games whose lists were filled
+        directly, like the ones rebuilt by the web server
+        """
+        self.occupancy.clear()
+        self.coverage.clear()
+        self.targeting.clear()
+        self.targeting.treasure = self.treasure.pos
+        self.wheel.clear()
+        self.searching.clear()
+        self.dying.clear()
+        self.dying_next.clear()
+        self.heros = Ordered_set(self.heros)
+        self.hero_index = None
+        self.monsters = Ordered_set(self.monsters)
+        self.buildings = Ordered_set(self.buildings)
+        self.treasure.reindex()
+        for ent in self.monsters:
+            self.occupancy.add_entity(ent)
+        for h in self.heros:
+            self.occupancy.add_entity(h)
+            self.track_hero(h)
+            self.wheel.schedule(h, h.clock)
+            if h.dead:
+                self.dying.add(h)
+        for b in self.buildings:
+            self.occupancy.add_building(b)
+            self.coverage.add(b, self.grid)
+            self.track_tower(b)
+
+    def rng(self) -> random.Random:
+        """
+        Returns the random stream of the current tick. It only depends on the
+        seed of the game and the tick, so a game rebuilt from its dict draws
+        the same numbers as the game it was saved from
+        """
+        if self.random_tick != self.tick:
+            self.random.seed(f"{self.seed}:{self.tick}")
+            self.random_tick = self.tick
+        return self.random
 
     def can_place(self, building: Building, pos: Pos) -> bool:
         placable = True
 
-        if "building" in building.building_restriction:
-            for nbuilding in self.buildings:
-                if nbuilding.pos == pos:
-                    placable = False
-                    break
+        if "building" in building.building_restriction and pos in self.occupancy.buildings:
+            placable = False
 
         tile = self.grid[pos.x][pos.y]
         if tile.type in building.building_restriction:
@@ -63,11 +164,23 @@ class Game_instance():
 
         return placable
 
+    def layout_changed(self):
+        """
+        Invalidates the paths cached by the heroes and makes the flow fields
+        repair themselves on their next use
+        """
+        self.layout_version += 1
+        self.fields_refreshed.clear()
+
     def place(self, building: Building, pos: Pos):
         if self.can_place(building, pos):
+            self.layout_changed()
             nbuilding = building.place_to(pos)
             self.buildings.append(nbuilding)
             nbuilding.pos = pos
+            self.occupancy.add_building(nbuilding)
+            self.coverage.add(nbuilding, self.grid)
+            self.track_tower(nbuilding)
             self.gold -= building.get_construction_cost()
             self.score += building.get_construction_cost()
 
@@ -76,30 +189,88 @@ class Game_instance():
             if building.get_upgrade_cost() <= self.gold:
                 self.gold -= building.get_upgrade_cost()
                 building.upgrade()
+                self.coverage.refresh(building, self.grid)
+                self.track_tower(building)
+                self.layout_changed()
                 # Mise à jour du score pour bonifier l'upgrade
                 self.score += int(building.cost[building.level]
                                   * building.level * 0.75)
 
+    def delete(self, building: Building):
+        self.remove_building(building)
+        self.gold += building.get_construction_cost() // 2
+
+    def remove_building(self, building: Building):
+        self.buildings.remove(building)
+        self.occupancy.remove_building(building)
+        self.coverage.remove(building)
+        self.targeting.remove_tower(building)
+        self.layout_changed()
+
+    def track_tower(self, building: Building):
+        """
+        Makes the targeting follow the heroes in range of building, if it
+        has a targeting policy
+        """
+        if isinstance(building, Tower) and building.policy is not None:
+            self.targeting.add_tower(building, self.coverage.cells[building], self.heros)
+
+    def track_hero(self, hero: Entity):
+        self.targeting.add_hero(hero, self.coverage.covering(hero.position))
+        hero.on_hp_change = self.hero_changed
+
+    def hero_changed(self, hero: Entity):
+        self.targeting.changed(hero, self.coverage.covering(hero.position))
+        if hero.dead and hero not in self.dying:
+            if self.turn is not None and self.wheel.order[hero] < self.turn:
+                self.dying_next.add(hero)
+            else:
+                self.dying.add(hero)
+
+    def set_clock(self, ent: Entity, clock: int):
+        """
+        Makes ent act in clock ticks
+        """
+        ent.clock = clock
+        self.wheel.schedule(ent, clock)
+
+    def sync_clocks(self):
+        """
+        Writes to the clock of the heroes the ticks they still wait, which
+        the scheduler keeps instead, before they are saved
+        """
+        for h in self.heros:
+            if h in self.wheel.wake:
+                h.clock = self.wheel.delay(h)
+
     def get_tile_info(self, pos: Pos) -> dict:
 
         info = {}
+        occupancy = self.occupancy
 
-        for monsters in self.monsters:
-            if monsters.pos == pos:
-                info["monster"] = monsters
+        monster = first(occupancy.monsters.get(pos), self.monsters)
+        if monster is not None:
+            info["monster"] = monster
 
-        for buildings in self.buildings:
-            if buildings.pos == pos:
-                info["building"] = buildings
+        building = first(occupancy.buildings.get(pos), self.buildings)
+        if building is not None:
+            info["building"] = building
 
-        for hero in self.heros:
-            if hero.position == pos:
-                info["hero"] = hero
+        hero = first(occupancy.heros.get(pos), self.heros)
+        if hero is not None:
+            info["hero"] = hero
 
         info["tile"] = self.grid[pos.x][pos.y]
+        info["danger"] = self.get_danger(pos)
 
         return info
 
+    def get_danger(self, pos: Pos) -> int:
+        """
+        Returns the number of buildings that can hit a hero standing on pos
+        """
+        return self.coverage.danger(pos)
+
     def get_jewels_left(self) -> int:
         return self.treasure.jewels_left
 
@@ -114,86 +285,230 @@ class Game_instance():
 
     def move_entity(self, ent: Entity, p: Pos):
         if self.grid[p.x][p.y].walkable:
-            for m in self.monsters:
-                if m.position == p:
-                    ent.attack(m)
-                    return
-
-            for h in self.heros:
-                if h.position == p:
-                    ent.attack(h)
-                    return
-            for b in self.buildings:
-                if isinstance(b, Tower):
-                    if b.pos == p:
-                        ent.attack(b)
-                        return
-
-            ent.position = p
-
-    def get_path_ent(self, ent: Entity):
-        blocked = []
-        all_tow: list[Tower] = [
-            x.pos for x in self.buildings if isinstance(x, Tower)]
-
-        blocked += all_tow
-        if ent.get_ai() == STRATS.SMARTER:
-            blocked += [x.pos for x in self.buildings if isinstance(x, Trap)]
+            occupancy = self.occupancy
+            target = first(occupancy.monsters.get(p), self.monsters)
+            if target is None:
+                target = first(occupancy.heros.get(p), self.heros)
+            if target is None:
+                target = occupancy.tower_at(p)
+            if target is not None:
+                ent.attack(target)
+                return
+
+            old = ent.position
+            occupancy.move_entity(ent, p)
+            if not ent.is_ally:
+                if self.hero_index is not None:
+                    self.hero_index.move(ent, old)
+                self.hero_changed(ent)
+                if p in occupancy.traps:
+                    self.trigger_traps(p)
+
+    def trigger_traps(self, p: Pos):
+        """
+        Fires the traps of p when a hero enters it. Traps are only updated
+        here and not on every tick, so only the area of effect of the ones
+        that go off looks at the other heroes, through the hero index.
+        """
+        for trap in list(self.occupancy.traps[p]):
+            if trap.get_reach() == 0:
+                enemies = list(self.occupancy.heros.get(p, ()))
+                index = None
+            else:
+                if self.hero_index is None:
+                    self.hero_index = make_index(self.heros)
+                enemies = self.heros
+                index = self.hero_index
+            if trap.attack(enemies, index):
+                self.activated_traps.append(trap)
+            if trap.dead:
+                self.remove_building(trap)
+
+    def get_landmarks(self) -> Landmarks | None:
+        if self.landmarks is None:
+            self.landmarks = self.template.get_landmarks()
+            if self.landmarks is None and self.grid is not None:
+                # Games rebuilt by the web server have no template grid
+                self.landmarks = Landmarks(self.grid)
+        return self.landmarks
+
+    def get_map_stats(self) -> Map_stats | None:
+        if self.map_stats is None:
+            self.map_stats = self.template.get_map_stats()
+            if self.map_stats is None and self.grid is not None:
+                self.map_stats = Map_stats(self.grid)
+        return self.map_stats
+
+    def get_pathfinder(self) -> Pathfinder:
+        """
+        Returns the backend used when a single entity searches its path
+        """
+        if self.pathfinder in PATHFINDERS:
+            return PATHFINDERS[self.pathfinder]
+        stats = self.get_map_stats()
+        return PATHFINDERS["astar" if stats is None else stats.best_pathfinder()]
+
+    def get_blocked(self, ent: Entity) -> list[Pos]:
+        smarter = ent.get_ai() == STRATS.SMARTER
+        blocked = [p for p, bs in self.occupancy.buildings.items()
+                   if any(isinstance(b, Tower) or (smarter and isinstance(b, Trap)) for b in bs)]
         if ent.is_ally:
-            blocked += [x.position for x in self.monsters]
+            blocked += self.occupancy.monsters
         else:
-            blocked += [x.position for x in self.heros]
+            blocked += self.occupancy.heros
+        return blocked
+
+    def get_goals(self, ent: Entity) -> list[Pos]:
+        """
+        Returns every cell ent could head to, the nearest one by path being
+        chosen by the search itself
+        """
         if ent.is_ally:
-            min_p = ent.position
-            min_d = 9999
-            for j in self.heros:
-                if min_d < ent.position.dist(j.pos):
-                    min_p = j.pos
-                    min_d = ent.position.dist(j.pos)
-            return Astar(self.grid, ent.position, min_p, blocked=blocked)
-        else:
-            if ent.has_jewel:
-                return Astar(self.grid, ent.position, ent.home, blocked=blocked)
-            if (len(all_tow) != 0) and (ent.get_ai() == STRATS.ATTACK or self.treasure.jewels_left == 0):
-                min_p = ent.position
-                min_d = 9999
-                for t in all_tow:
-                    if min_d > ent.position.dist(t):
-                        min_p = t
-                        min_d = ent.position.dist(t)
-                return Astar(self.grid, ent.position, min_p, blocked=blocked)
+            return [x.position for x in self.heros]
+
+        if ent.has_jewel:
+            return [ent.home]
+
+        all_tow = [x.pos for x in self.buildings if isinstance(x, Tower)]
+        if (len(all_tow) != 0) and (ent.get_ai() == STRATS.ATTACK or self.treasure.jewels_left == 0):
+            return sorted(set(all_tow))
+
+        jewels = self.treasure.available_cells()
+        if not jewels:
+            return [self.treasure.pos]
+        return sorted(jewels)
+
+    def enable_path_stats(self):
+        self.path_stats = Path_stats()
+
+    def disable_path_stats(self):
+        self.path_stats = None
+
+    def get_flow_field(self, ent: Entity, goals: list[Pos], stats: dict = None) -> Flow_field:
+        """
+        Returns the flow field leading to goals for the strategy of ent.
+        Fields are shared by all heroes of the same strategy and are kept
+        between ticks: once per tick, the cells that got blocked or freed
+        since their last use are repaired incrementally.
+        """
+        key = (tuple(goals), ent.get_ai() == STRATS.SMARTER)
+        field = self.flow_fields.pop(key, None)
+        expanded = 0 if field is None else field.expanded
+        if field is None:
+            field = Flow_field(self.grid, goals, blocked=self.get_blocked(ent))
+            if len(self.flow_fields) >= MAX_FLOW_FIELDS:
+                self.flow_fields.pop(next(iter(self.flow_fields)))
+        elif key not in self.fields_refreshed:
+            field.set_blocked(self.get_blocked(ent))
+        if stats is not None:
+            stats["expanded"] = stats.get("expanded", 0) + field.expanded - expanded
+        self.flow_fields[key] = field
+        self.fields_refreshed.add(key)
+        return field
+
+    def get_path_ent(self, ent: Entity, stats: dict = None):
+        if ent.is_ally or self.pathfinder != FLOW_FIELDS:
+            return self.get_pathfinder().find(self.grid, ent.position, self.get_goals(ent),
+                                              self.get_blocked(ent), self.get_landmarks(), stats)
+
+        if self.hierarchy is not None:
+            res = self.hierarchy.find(ent.position, self.get_goals(ent), self.get_blocked(ent), stats)
+            return None if res is None else res.to_list(ent.position)
+
+        return self.get_flow_field(ent, self.get_goals(ent), stats).path(ent.position)
+
+    def is_occupied(self, p: Pos) -> bool:
+        return self.occupancy.is_occupied(p)
+
+    def plan_path(self, ent: Entity):
+        self.run_search(self.search_path, ent)
+
+    def run_search(self, search, ent: Entity):
+        """
+        Calls search(ent, stats), recording what it cost in the path stats
+        when they are enabled
+        """
+        if self.path_stats is None:
+            search(ent, None)
+            return
+        stats = {"expanded": 0}
+        t = perf_counter()
+        search(ent, stats)
+        elapsed = perf_counter() - t
+        self.path_stats.record((type(ent).__name__, ent.get_ai().name), stats["expanded"],
+                               0 if ent.path is None else len(ent.path), elapsed)
+
+    def search_path(self, ent: Entity, stats: dict = None):
+        if self.search_budget is not None and not ent.is_ally:
+            ent.search = Anytime_astar(self.grid, ent.position, self.get_goals(ent),
+                                       blocked=self.get_blocked(ent), landmarks=self.get_landmarks())
+            ent.path_version = self.layout_version
+            self.follow_search(ent, stats)
+            return
 
-            else:
-                min_p = self.treasure.pos
-                min_d = 9999
-                for j in self.treasure.jewels:
-                    if j.present and not j.carried:
-                        if min_d > ent.position.dist(j.pos):
-                            min_p = j.pos
-                            min_d = ent.position.dist(j.pos)
-
-                return Astar(self.grid, ent.position,
-                             min_p, blocked=blocked)
-        return None
+        if self.hierarchy is not None and not ent.is_ally and self.pathfinder == FLOW_FIELDS:
+            # Big maps only refine the path of a hero when it walks it
+            ent.path = self.hierarchy.find(ent.position, self.get_goals(ent), self.get_blocked(ent), stats)
+            ent.path_version = self.layout_version
+            return
 
-    def update_entity(self, ent: Entity):
-        p = self.get_path_ent(ent)
-        if p is None:
+        p = self.get_path_ent(ent, stats)
+        # The cached path holds the remaining steps in reverse order
+        ent.path = None if p is None else p[:0:-1]
+        ent.path_version = self.layout_version
+
+    def follow_search(self, ent: Entity, stats: dict = None):
+        """
+        Runs the search of ent for one budget, and makes ent walk the best
+        path found so far
+        """
+        if not ent.search.contains(ent.position):
+            self.search_path(ent, stats)
             return
-        if len(p) <= 1:
+        ent.search.step(self.search_budget, stats)
+        p = ent.search.path_from(ent.position)
+        ent.path = None if p is None else p[:0:-1]
+
+    def get_next_step(self, ent: Entity) -> Pos | None:
+        """
+        Returns the next cell ent wants to walk on, replanning only when the
+        layout changed since its path was computed or when that cell is
+        occupied
+        """
+        if ent.path_version != self.layout_version:
+            self.plan_path(ent)
+        elif ent.path and self.is_occupied(ent.path[-1]):
+            self.plan_path(ent)
+
+        if not ent.path:
             return None
-        
-        if ent.clock == 0:
-            ent.clock = ent.get_speed()
-            self.move_entity(ent, p[1])
-
-            for j in self.treasure.jewels:
-                if not j.carried:
-                    if j.pos == ent.position:
-                        j.take(ent)
-                        break
-        else:
-            ent.clock -= 1
+        return ent.path[-1]
+
+    def update_entity(self, ent: Entity):
+        search = ent.search
+        if search is not None and not search.done and ent.path_version == self.layout_version:
+            # Unfinished searches go on every tick, even while ent waits
+            self.run_search(self.follow_search, ent)
+
+        if self.wheel.wake.get(ent) != self.wheel.tick:
+            return None
+
+        step = self.get_next_step(ent)
+        if step is None:
+            self.wheel.schedule(ent, 1)
+            return None
+
+        # Waits speed ticks, then acts on the next one
+        self.wheel.schedule(ent, ent.get_speed() + 1)
+        self.move_entity(ent, step)
+        if ent.position == step:
+            ent.path.pop()
+
+        j = self.treasure.free_jewel_at(ent.position)
+        if j is not None:
+            self.treasure.take(j, ent)
+            self.hero_changed(ent)
+            self.layout_changed()
 
     def begin_wave(self):
         wave_info = self.template.waves[self.current_wave]
@@ -201,20 +516,37 @@ class Game_instance():
         self.current_wave += 1
 
     def add_hero(self, hero: Entity):
-        proba = random.randint(1, 100)
+        rng = self.rng()
+        proba = rng.randint(1, 100)
         if proba < 20:
-            hero.set_ai(STRATS.ATTACK)
+            hero.set_ai(STRATS.ATTACK, rng)
         if proba > 80:
-            hero.set_ai(STRATS.SMARTER)
+            hero.set_ai(STRATS.SMARTER, rng)
         hero.position = self.template.entrance
         self.heros.append(hero)
+        self.hero_index = None
+        self.occupancy.add_entity(hero)
+        self.track_hero(hero)
+        self.wheel.schedule(hero, hero.clock)
         hero.home = self.template.entrance
+        if hero.position in self.occupancy.traps:
+            self.trigger_traps(hero.position)
 
     def update_building(self, building: Building) -> bool:
-        return building.attack(self.heros)
+        if self.hero_index is None:
+            self.hero_index = make_index(self.heros)
+        if isinstance(building, Tower) and building.policy is not None:
+            return building.shoot(self.targeting.target(building))
+        return building.attack(self.heros, self.hero_index)
 
     def update(self) -> list[Building]:
-        activated_buildings = list()
+        # Traps going off while the heroes move are returned with the towers
+        activated_buildings = self.activated_traps = []
+        self.tick += 1
+        self.fields_refreshed.clear()
+        self.hero_index = None
+        if self.path_stats is not None:
+            self.path_stats.new_tick()
 
         match self.state:
             case GAME_PHASE.BUILDING_PHASE:
@@ -244,7 +576,7 @@ class Game_instance():
                 if self.heros_left_to_spawn:
                     if self.wave_clock <= 0:
                         # Choose a random hero to spawn
-                        random_index = random.randint(0, len(self.heros_left_to_spawn) - 1)
+                        random_index = self.rng().randint(0, len(self.heros_left_to_spawn) - 1)
                         entity_class, num_entity = self.heros_left_to_spawn[random_index]
                         self.add_hero(entity_class())
                         num_entity -= 1
@@ -257,32 +589,60 @@ class Game_instance():
                     else:
                         self.wave_clock -= 1
 
-                deads = []
-                for h in self.heros:
+                wheel = self.wheel
+                acting = wheel.due()
+                if self.searching:
+                    acting = list(self.searching.union(acting))
+                acting.sort(key=wheel.order.__getitem__)
+                for h in acting:
                     if h.dead:
-                        deads.append(h)
                         continue
+                    self.turn = wheel.order[h]
                     self.update_obj(h)
-                    if h.dead:
-                        deads.append(h)
+                    if h.search is not None and not h.search.done:
+                        self.searching.add(h)
+                    else:
+                        self.searching.discard(h)
+                self.turn = None
+                wheel.advance()
+
+                deads = sorted(self.dying, key=wheel.order.__getitem__)
+                self.dying, self.dying_next = self.dying_next, set()
                 for h in deads:
-                    if h.has_jewel:
-                        for j in self.treasure.jewels:
-                            if j.carried and j.carrier == h:
-                                j.drop()
+                    if h.has_jewel and self.treasure.drop_all(h):
+                        self.layout_changed()
                     self.heros.remove(h)
+                    self.occupancy.remove_entity(h)
+                    self.targeting.remove_hero(h)
+                    self.wheel.remove(h)
+                    self.searching.discard(h)
+                    h.on_hp_change = None
+                if deads:
+                    # Rebuilt by the buildings without the dead heroes
+                    self.hero_index = None
 
                 deads = []
 
                 for b in self.buildings:
+                    # Traps go off when a hero walks onto them
+                    if isinstance(b, Trap):
+                        continue
                     if self.update_obj(b):
                         activated_buildings.append(b)
                     if b.dead:
                         deads.append(b)
                 for b in deads:
-                    self.buildings.remove(b)
-
-                self.treasure.update()
+                    self.remove_building(b)
+
+                carriers = list(self.treasure.carried)
+                none_left = self.treasure.jewels_left == 0
+                if self.treasure.update():
+                    self.layout_changed()
+                    # Heroes die once they brought a jewel home
+                    self.dying.update(h for h in carriers if h.dead)
+                elif (self.treasure.jewels_left == 0) != none_left:
+                    # get_goals sends the heroes to the towers while no jewel is left
+                    self.layout_changed()
         return activated_buildings
 
     def update_obj(self, x) -> bool | None:
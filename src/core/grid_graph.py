@@ -0,0 +1,102 @@
+from .tiles import Tile
+from .utils_types import Pos
+
+MAX_CACHED_GRAPHS = 32
+BLOCKED_WEIGHT = 50
+
+
+class Grid_graph():
+    """
+    Flat representation of a grid used by the pathfinding algorithms.
+
+    Every cell is identified by its index x * size_y + y, and every walkable
+    cell knows the indexes of its walkable neighbours, so searches never
+    have to build positions or check bounds.
+    """
+
+    def __init__(self, grid: list[list[Tile]]):
+        self.grid = grid
+        self.size_x = len(grid)
+        self.size_y = len(grid[0]) if self.size_x > 0 else 0
+        self.size = self.size_x * self.size_y
+
+        self.xs: list[int] = [i // self.size_y for i in range(self.size)] if self.size_y else []
+        self.ys: list[int] = [i % self.size_y for i in range(self.size)] if self.size_y else []
+        self.positions: list[Pos] = [Pos(x, y) for x, y in zip(self.xs, self.ys)]
+        self.tiles: list[Tile] = [t for row in grid for t in row]
+        self.walkable = bytearray(1 if t.walkable else 0 for t in self.tiles)
+        # Same flags surrounded by walls, cell (x, y) being at index
+        # (x + 1) * padded_y + y + 1, to walk along lines without bound checks
+        self.padded_y = self.size_y + 2
+        self.padded_walkable = bytearray((self.size_x + 2) * self.padded_y)
+        for i in range(self.size):
+            if self.walkable[i]:
+                self.padded_walkable[(self.xs[i] + 1) * self.padded_y + self.ys[i] + 1] = 1
+
+        self.neighbours: list[tuple[int, ...]] = []
+        for i in range(self.size):
+            if not self.walkable[i]:
+                self.neighbours.append(())
+                continue
+            x = self.xs[i]
+            y = self.ys[i]
+            res = []
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    if dx == 0 and dy == 0:
+                        continue
+                    nx = x + dx
+                    ny = y + dy
+                    if 0 <= nx < self.size_x and 0 <= ny < self.size_y:
+                        j = nx * self.size_y + ny
+                        if self.walkable[j]:
+                            res.append(j)
+            self.neighbours.append(tuple(res))
+
+    def in_bounds(self, p: Pos) -> bool:
+        return 0 <= p.x < self.size_x and 0 <= p.y < self.size_y
+
+    def index(self, p: Pos) -> int:
+        return p.x * self.size_y + p.y
+
+    def pos(self, i: int) -> Pos:
+        return self.positions[i]
+
+    def cell_weights(self, weight_fun=None, blocked=None) -> list[int]:
+        """
+        Returns the cost of walking onto each cell, built once per search so
+        that every edge relaxation is a single list lookup.
+
+        :param weight_fun: custom weight function, called as
+            weight_fun(tile, pos, blocked) for each cell
+        :param blocked: cells that are costly to walk on
+        """
+        if weight_fun is not None:
+            return [weight_fun(t, p, blocked) for t, p in zip(self.tiles, self.positions)]
+
+        res = [1] * self.size
+        if blocked is not None:
+            for p in blocked:
+                if 0 <= p.x < self.size_x and 0 <= p.y < self.size_y:
+                    res[p.x * self.size_y + p.y] = BLOCKED_WEIGHT
+        return res
+
+
+_graphs: dict[int, tuple[list[list[Tile]], Grid_graph]] = {}
+
+
+def get_graph(grid: list[list[Tile]]) -> Grid_graph:
+    """
+    Returns the graph of grid, building it on first use.
+    Grids are never modified once a game is running, so the graph is
+    cached for as long as the same grid object is used.
+    """
+    entry = _graphs.get(id(grid))
+    if entry is not None and entry[0] is grid:
+        return entry[1]
+
+    graph = Grid_graph(grid)
+    if len(_graphs) >= MAX_CACHED_GRAPHS:
+        _graphs.pop(next(iter(_graphs)))
+    _graphs[id(grid)] = (grid, graph)
+    return graph
@@ -0,0 +1,350 @@
+from .tiles import Tile
+from .utils_types import Pos
+from .grid_graph import get_graph, BLOCKED_WEIGHT
+from .consts import CLUSTER_SIZE, HPA_MIN_SIZE
+from .pathfinding import astar_index
+from heapq import heappush, heappop, heapify
+
+# Border runs at least this long get a transition at each end
+LONG_ENTRANCE = 6
+MAX_CACHED_GOALS = 64
+
+
+def needs_hierarchy(grid: list[list[Tile]]) -> bool:
+    return len(grid) > HPA_MIN_SIZE or (len(grid) > 0 and len(grid[0]) > HPA_MIN_SIZE)
+
+
+class Hpa_graph():
+    """
+    Abstract graph used for hierarchical pathfinding (HPA*) on big maps.
+
+    The grid is split in square clusters. Transitions are placed on the
+    borders between neighbouring clusters, and the distances between the
+    transitions of a cluster are computed once when the map is loaded.
+    The distances from every transition to a set of goals are then
+    computed once and shared by the heroes heading there, like flow
+    fields: a search only explores the cluster of its start, and the cells
+    of the path are refined one cluster at a time.
+    """
+
+    def __init__(self, grid: list[list[Tile]], cluster_size: int = CLUSTER_SIZE):
+        self.graph = get_graph(grid)
+        self.cluster_size = cluster_size
+        graph = self.graph
+        self.clusters_y = (graph.size_y + cluster_size - 1) // cluster_size
+        self.cluster_ids: list[int] = [
+            (graph.xs[i] // cluster_size) * self.clusters_y + graph.ys[i] // cluster_size
+            for i in range(graph.size)]
+
+        # Abstract nodes are cell indexes, edges are costs between them
+        self.edges: dict[int, dict[int, int]] = {}
+        self.cluster_nodes: dict[int, list[int]] = {}
+        self.goal_cache: dict[int, dict[int, int]] = {}
+        self.field_cache: dict[tuple[int, ...], tuple[dict[int, int], dict[int, int]]] = {}
+        self.build_entrances()
+        self.build_intra_edges()
+
+    def add_node(self, i: int):
+        if i not in self.edges:
+            self.edges[i] = {}
+            self.cluster_nodes.setdefault(self.cluster_ids[i], []).append(i)
+
+    def add_transition(self, a: int, b: int):
+        self.add_node(a)
+        self.add_node(b)
+        self.edges[a][b] = 1
+        self.edges[b][a] = 1
+
+    def add_run(self, run: list[tuple[int, int]]):
+        if len(run) >= LONG_ENTRANCE:
+            self.add_transition(*run[0])
+            self.add_transition(*run[-1])
+        else:
+            self.add_transition(*run[len(run) // 2])
+
+    def build_entrances(self):
+        graph = self.graph
+        cs = self.cluster_size
+        walkable = graph.walkable
+        w = graph.size_y
+
+        # Borders between a cluster and the one below it
+        for x in range(cs - 1, graph.size_x - 1, cs):
+            run = []
+            for y in range(graph.size_y):
+                a = x * w + y
+                b = a + w
+                if walkable[a] and walkable[b] and (not run or y % cs != 0):
+                    run.append((a, b))
+                    continue
+                if run:
+                    self.add_run(run)
+                run = [(a, b)] if walkable[a] and walkable[b] else []
+            if run:
+                self.add_run(run)
+
+        # Borders between a cluster and the one on its right
+        for y in range(cs - 1, graph.size_y - 1, cs):
+            run = []
+            for x in range(graph.size_x):
+                a = x * w + y
+                b = a + 1
+                if walkable[a] and walkable[b] and (not run or x % cs != 0):
+                    run.append((a, b))
+                    continue
+                if run:
+                    self.add_run(run)
+                run = [(a, b)] if walkable[a] and walkable[b] else []
+            if run:
+                self.add_run(run)
+
+    def build_intra_edges(self):
+        for c, nodes in self.cluster_nodes.items():
+            for a in nodes:
+                dists = self.cluster_dists(a)
+                for b in nodes:
+                    if b != a and b in dists:
+                        self.edges[a][b] = dists[b]
+
+    def cluster_dists(self, s: int) -> dict[int, int]:
+        """
+        Breadth-first search from s that never leaves the cluster of s, every
+        move costing 1 on the static grid
+        """
+        cluster_ids = self.cluster_ids
+        neighbours = self.graph.neighbours
+        c = cluster_ids[s]
+        dists = {s: 0}
+        frontier = [s]
+        d = 0
+        while frontier:
+            d += 1
+            reached = []
+            for node in frontier:
+                for new in neighbours[node]:
+                    if new not in dists and cluster_ids[new] == c:
+                        dists[new] = d
+                        reached.append(new)
+            frontier = reached
+        return dists
+
+    def goal_links(self, g: int) -> dict[int, int]:
+        """
+        Returns the distances between g and the transitions of its cluster.
+        Heroes share a few goals and start from a few cells, so they are
+        cached.
+        """
+        res = self.goal_cache.get(g)
+        if res is None:
+            # Costs are symmetric with static weights
+            res = {n: d for n, d in self.cluster_dists(g).items() if n in self.edges and n != g}
+            if len(self.goal_cache) >= MAX_CACHED_GOALS:
+                self.goal_cache.pop(next(iter(self.goal_cache)))
+            self.goal_cache[g] = res
+        return res
+
+    def cluster_path(self, a: int, b: int, blocked: set[int]) -> list[int] | None:
+        """
+        A* from a to b inside their cluster, with the current blocked cells
+        """
+        graph = self.graph
+        cluster_ids = self.cluster_ids
+        c = cluster_ids[a]
+        xs = graph.xs
+        ys = graph.ys
+        bx = xs[b]
+        by = ys[b]
+        prevs: dict[int, int] = {}
+        dists = {a: 0}
+        closed = set()
+        pq = [(0, a)]
+        while pq:
+            node = heappop(pq)[1]
+            if node in closed:
+                continue
+            if node == b:
+                res = [b]
+                while res[-1] != a:
+                    res.append(prevs[res[-1]])
+                res.reverse()
+                return res
+            closed.add(node)
+            d = dists[node]
+            for new in graph.neighbours[node]:
+                if cluster_ids[new] != c or new in closed:
+                    continue
+                nd = d + (BLOCKED_WEIGHT if new in blocked else 1)
+                if new not in dists or nd < dists[new]:
+                    dists[new] = nd
+                    prevs[new] = node
+                    heappush(pq, (nd + max(abs(xs[new] - bx), abs(ys[new] - by)), new))
+        return None
+
+    def goal_field(self, goals: list[int], stats: dict = None) -> tuple[dict[int, int], dict[int, int]]:
+        """
+        Dijkstra over the abstract graph from goals: returns the distance from
+        each transition to the nearest goal, and the next node on the way.
+        Heroes share their goals, so the fields are cached.
+
+        :param stats: if given, its "expanded" entry is increased by the
+            number of abstract nodes expanded when the field is computed
+        """
+        key = tuple(sorted(set(goals)))
+        res = self.field_cache.get(key)
+        if res is not None:
+            return res
+        edges = self.edges
+        dists: dict[int, int] = {}
+        nexts: dict[int, int] = {}
+        for g in key:
+            if g in edges:
+                dists[g] = 0
+                nexts[g] = g
+            for n, d in self.goal_links(g).items():
+                if n not in dists or d < dists[n]:
+                    dists[n] = d
+                    nexts[n] = g
+        pq = [(d, n) for n, d in dists.items()]
+        heapify(pq)
+        expanded = 0
+        while pq:
+            d, node = heappop(pq)
+            if d > dists[node]:
+                continue
+            expanded += 1
+            # Costs are symmetric, so the edges also lead toward the goals
+            for new, c in edges[node].items():
+                nd = d + c
+                if new not in dists or nd < dists[new]:
+                    dists[new] = nd
+                    nexts[new] = node
+                    heappush(pq, (nd, new))
+        if stats is not None:
+            stats["expanded"] = stats.get("expanded", 0) + expanded
+        if len(self.field_cache) >= MAX_CACHED_GOALS:
+            self.field_cache.pop(next(iter(self.field_cache)))
+        res = self.field_cache[key] = (dists, nexts)
+        return res
+
+    def abstract_path(self, s: int, goals: list[int], stats: dict = None) -> list[int] | None:
+        """
+        Returns the abstract nodes from s to the nearest of goals: s is linked
+        to the transitions of its cluster, which follow the field of goals
+        """
+        goal_set = set(goals)
+        if s in goal_set:
+            return [s]
+        dists, nexts = self.goal_field(goals, stats)
+        c = self.cluster_ids[s]
+        near = [g for g in goal_set if self.cluster_ids[g] == c]
+        links = self.cluster_dists(s) if near else self.goal_links(s)
+        best = s if s in dists else None
+        best_d = dists.get(s, 0)
+        for g in near:
+            d = links.get(g)
+            if d is not None and (best is None or d < best_d):
+                best = g
+                best_d = d
+        for n in self.cluster_nodes.get(c, ()):
+            d = links.get(n)
+            if d is not None and n in dists and (best is None or d + dists[n] < best_d):
+                best = n
+                best_d = d + dists[n]
+        if best is None:
+            return None
+        res = [s]
+        node = nexts[s] if best == s else best
+        while True:
+            res.append(node)
+            if node in goal_set:
+                return res
+            node = nexts[node]
+
+    def refine(self, a: int, b: int, blocked: set[int]) -> list[int]:
+        """
+        Returns the cells from a to b, two consecutive abstract nodes
+        """
+        if a == b:
+            return [a]
+        if self.cluster_ids[a] != self.cluster_ids[b]:
+            return [a, b]
+        res = self.cluster_path(a, b, blocked)
+        if res is None:
+            weights = self.graph.cell_weights(blocked=[self.graph.positions[i] for i in blocked])
+            res = [self.graph.index(p) for p in astar_index(self.graph, a, [b], weights)]
+        return res
+
+    def find(self, start: Pos, goals: list[Pos], blocked: list[Pos] = None, stats: dict = None) -> "Lazy_path | None":
+        """
+        Searches a path from start to the nearest of goals. Only the abstract
+        path is read here, from the field of goals, and its cells are
+        refined when they are needed.
+
+        :param stats: if given, its "expanded" entry is increased by the
+            number of abstract nodes expanded, only when the field of goals
+            is computed
+        :return: the remaining steps of the path in reverse order, None if
+            no goal can be reached
+        :rtype: Lazy_path | None
+        """
+        graph = self.graph
+        goals_i = [graph.index(g) for g in goals if graph.in_bounds(g) and graph.walkable[graph.index(g)]]
+        if not graph.in_bounds(start) or not goals_i:
+            return None
+        s = graph.index(start)
+        blocked_i = set() if blocked is None else {graph.index(p) for p in blocked if graph.in_bounds(p)}
+
+        nodes = self.abstract_path(s, goals_i, stats)
+        if nodes is None:
+            # Some crossings, like diagonal ones, aren't in the abstract graph
+            p = astar_index(graph, s, goals_i, graph.cell_weights(blocked=blocked), stats=stats)
+            if p is None:
+                return None
+            nodes = [graph.index(x) for x in p]
+            return Lazy_path(self, [nodes[0], nodes[-1]], blocked_i, nodes)
+        return Lazy_path(self, nodes, blocked_i)
+
+
+class Lazy_path():
+    """
+    Remaining steps of a path in reverse order, like the paths cached by the
+    heroes, whose cells are only refined one abstract segment at a time
+    """
+
+    def __init__(self, hpa: Hpa_graph, nodes: list[int], blocked: set[int], cells: list[int] = None):
+        self.hpa = hpa
+        self.nodes = nodes
+        self.blocked = blocked
+        self.segment = 0
+        self.cells: list[int] = []
+        if cells is not None:
+            self.cells = cells[:0:-1]
+            self.segment = len(nodes) - 1
+
+    def refine(self):
+        while not self.cells and self.segment < len(self.nodes) - 1:
+            a = self.nodes[self.segment]
+            b = self.nodes[self.segment + 1]
+            self.cells = self.hpa.refine(a, b, self.blocked)[:0:-1]
+            self.segment += 1
+
+    def __len__(self) -> int:
+        self.refine()
+        return len(self.cells)
+
+    def __getitem__(self, i: int) -> Pos:
+        self.refine()
+        return self.hpa.graph.positions[self.cells[i]]
+
+    def pop(self) -> Pos:
+        self.refine()
+        return self.hpa.graph.positions[self.cells.pop()]
+
+    def to_list(self, start: Pos) -> list[Pos]:
+        """
+        Refines the whole path, in the same format as Astar
+        """
+        res = [start]
+        while len(self) > 0:
+            res.append(self.pop())
+        return res
@@ -0,0 +1,71 @@
+from collections import deque
+from .tiles import Tile
+from .grid_graph import Grid_graph, get_graph
+from .consts import NB_LANDMARKS
+
+
+class Landmarks():
+    """
+    Distance tables from a few landmark cells, used for the ALT heuristic.
+
+    By the triangle inequality, |d(L, goal) - d(L, n)| never overestimates
+    the distance from n to goal, and on winding maps it is a far better
+    guess than a straight-line distance that ignores the walls.
+    The tables are computed with the base cost of each cell, so they stay
+    admissible whatever cells are blocked during a game.
+    """
+
+    def __init__(self, grid: list[list[Tile]], nb_landmarks: int = NB_LANDMARKS):
+        self.graph = get_graph(grid)
+        self.cells: list[int] = []
+        # dists[k][i] is the distance between landmark k and cell i, -1 if
+        # they aren't connected
+        self.dists: list[list[int]] = []
+
+        walkable = [i for i in range(self.graph.size) if self.graph.walkable[i]]
+        if not walkable:
+            return
+
+        # Farthest point selection: each landmark is the cell the farthest
+        # from the ones already chosen
+        closest = bfs(self.graph, walkable[0])
+        for _ in range(nb_landmarks):
+            best = max(walkable, key=lambda i: closest[i])
+            if self.cells and closest[best] <= 0:
+                break
+            self.cells.append(best)
+            d = bfs(self.graph, best)
+            self.dists.append(d)
+            if len(self.cells) == 1:
+                closest = d
+            else:
+                closest = [min(a, b) for a, b in zip(closest, d)]
+
+    def tables_to(self, e: int) -> list[tuple[list[int], int]]:
+        """
+        Returns the tables usable to estimate distances to e, with the
+        distance between their landmark and e
+        """
+        return [(d, d[e]) for d in self.dists if d[e] != -1]
+
+    def h(self, i: int, e: int) -> int:
+        res = 0
+        for d, de in self.tables_to(e):
+            if d[i] != -1:
+                res = max(res, abs(de - d[i]))
+        return res
+
+
+def bfs(graph: Grid_graph, s: int) -> list[int]:
+    dists = [-1] * graph.size
+    dists[s] = 0
+    q = deque([s])
+    neighbours = graph.neighbours
+    while q:
+        node = q.popleft()
+        d = dists[node] + 1
+        for new in neighbours[node]:
+            if dists[new] == -1:
+                dists[new] = d
+                q.append(new)
+    return dists
@@ -4,19 +4,40 @@ from .all_entities import ALL_ENTITIES
 from os import listdir
 from os.path import isfile, join
 from .utils_types import Pos
+from .hierarchy import Hpa_graph, needs_hierarchy
+from .landmarks import Landmarks
+from .pathfinders import Map_stats
 
 
 class Level_template():
-    def __init__(self, name: str, grid: list[list[Tile]], waves: list[dict[Entity, int]], entrance_pos, tres_pos: Pos):
+    def __init__(self, name: str, grid: list[list[Tile]], waves: list[dict[Entity, int]], entrance_pos, tres_pos: Pos, hierarchy: Hpa_graph = None, landmarks: Landmarks = None, map_stats: Map_stats = None):
         self.name = name
         self.grid = grid
         self.waves = waves
         self.treasure = tres_pos
         self.entrance = entrance_pos
+        self.hierarchy = hierarchy
+        self.landmarks = landmarks
+        self.map_stats = map_stats
+
+    def get_landmarks(self) -> Landmarks | None:
+        """
+        Returns the landmarks of the map, computing them if the template
+        was created without them
+        """
+        if self.landmarks is None and self.grid is not None:
+            self.landmarks = Landmarks(self.grid)
+        return self.landmarks
+
+    def get_map_stats(self) -> Map_stats | None:
+        if self.map_stats is None and self.grid is not None:
+            self.map_stats = Map_stats(self.grid)
+        return self.map_stats
 
 
 def import_map(filename):
-    f = open(filename, "r").read().split("\n\n")
+    with open(filename, "r") as file:
+        f = file.read().split("\n\n")
     grid = f[1]
     x = [list(lis) for lis in grid.split("\n")]
     res = []
@@ -55,7 +76,8 @@ def import_map(filename):
                     break
         res_wave.append(res_wave_tmp)
         
-    return Level_template(f[0], res, res_wave, entrance_pos, tres_pos)
+    hierarchy = Hpa_graph(res) if needs_hierarchy(res) else None
+    return Level_template(f[0], res, res_wave, entrance_pos, tres_pos, hierarchy, Landmarks(res), Map_stats(res))
 
 
 def import_map_from_index(mypath: str, index: int) -> Level_template:
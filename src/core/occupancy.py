@@ -0,0 +1,86 @@
+from .utils_types import Pos
+from .entity import Entity
+from .buildings.building import Building
+from .buildings.tower import Tower
+from .buildings.trap import Trap
+from .ordered_set import Ordered_set
+
+
+class Occupancy():
+    """
+    Index of the heroes, monsters and buildings standing on each cell, and
+    of the traps a hero triggers by walking onto it.
+
+    Several occupants may share a cell, like the heroes waiting at the
+    entrance, so each cell holds a list. The game keeps the index up to
+    date on every spawn, move, death, placement and removal.
+    """
+
+    def __init__(self):
+        self.heros: dict[Pos, list[Entity]] = {}
+        self.monsters: dict[Pos, list[Entity]] = {}
+        self.buildings: dict[Pos, list[Building]] = {}
+        self.traps: dict[Pos, list[Trap]] = {}
+
+    def clear(self):
+        self.heros.clear()
+        self.monsters.clear()
+        self.buildings.clear()
+        self.traps.clear()
+
+    def cells_of(self, ent: Entity) -> dict[Pos, list[Entity]]:
+        return self.monsters if ent.is_ally else self.heros
+
+    def add_entity(self, ent: Entity):
+        self.cells_of(ent).setdefault(ent.position, []).append(ent)
+
+    def remove_entity(self, ent: Entity):
+        remove(self.cells_of(ent), ent.position, ent)
+
+    def move_entity(self, ent: Entity, p: Pos):
+        """
+        Moves ent to p, in the index and on the grid
+        """
+        cells = self.cells_of(ent)
+        remove(cells, ent.position, ent)
+        ent.position = p
+        cells.setdefault(p, []).append(ent)
+
+    def add_building(self, building: Building):
+        self.buildings.setdefault(building.pos, []).append(building)
+        if isinstance(building, Trap):
+            self.traps.setdefault(building.pos, []).append(building)
+
+    def remove_building(self, building: Building):
+        remove(self.buildings, building.pos, building)
+        remove(self.traps, building.pos, building)
+
+    def tower_at(self, p: Pos) -> Building | None:
+        for b in self.buildings.get(p, ()):
+            if isinstance(b, Tower):
+                return b
+        return None
+
+    def is_occupied(self, p: Pos) -> bool:
+        return p in self.heros or p in self.monsters or self.tower_at(p) is not None
+
+
+def remove(cells: dict[Pos, list], p: Pos, x):
+    occupants = cells.get(p)
+    if occupants is None or x not in occupants:
+        return
+    occupants.remove(x)
+    if not occupants:
+        del cells[p]
+
+
+def first(occupants: list | None, order: Ordered_set):
+    """
+    Returns the occupant that comes first in order, the set it belongs to
+    in the game, None if there is none
+    """
+    if not occupants:
+        return None
+    if len(occupants) == 1:
+        return occupants[0]
+    return min(occupants, key=order.rank)
@@ -0,0 +1,45 @@
+from types import GenericAlias
+
+
+class Ordered_set():
+    """
+    Objects kept in the order they were added, like a list, but removed in
+    constant time: mass deaths only cost one removal per dead.
+
+    Iteration follows the order of addition, and rank gives a key that
+    sorts objects in that order. There is no indexing: copy the objects to
+    a list once to index them.
+    """
+
+    __class_getitem__ = classmethod(GenericAlias)
+
+    def __init__(self, items=()):
+        self.ranks: dict = {}
+        self.next_rank = 0
+        for x in items:
+            self.append(x)
+
+    def append(self, x):
+        self.ranks[x] = self.next_rank
+        self.next_rank += 1
+
+    def remove(self, x):
+        del self.ranks[x]
+
+    def rank(self, x) -> int:
+        return self.ranks[x]
+
+    def __contains__(self, x) -> bool:
+        return x in self.ranks
+
+    def __iter__(self):
+        return iter(self.ranks)
+
+    def __len__(self) -> int:
+        return len(self.ranks)
+
+    def __eq__(self, other) -> bool:
+        return list(self.ranks) == list(other)
+
+    def __repr__(self) -> str:
+        return f"Ordered_set({list(self.ranks)})"
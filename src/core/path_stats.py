@@ -0,0 +1,75 @@
+from collections import deque
+from .consts import PATH_STATS_TICKS
+
+
+class Path_counters():
+    """
+    Pathfinding work done for one kind of entity
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.expanded = 0
+        self.path_length = 0
+        self.time = 0.0
+
+    def add(self, expanded: int, path_length: int, time: float):
+        self.calls += 1
+        self.expanded += expanded
+        self.path_length += path_length
+        self.time += time
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "expanded": self.expanded,
+            "path_length": self.path_length,
+            "time": self.time,
+        }
+
+
+class Path_stats():
+    """
+    Opt-in record of the paths planned during a game, broken down by
+    entity class and strategy, for the whole game and for each of the last
+    ticks. Games only build one when it is enabled, so that recording costs
+    nothing otherwise.
+    """
+
+    def __init__(self, nb_ticks: int = PATH_STATS_TICKS):
+        self.totals: dict[tuple[str, str], Path_counters] = {}
+        self.ticks: deque[dict[tuple[str, str], Path_counters]] = deque(maxlen=nb_ticks)
+        self.new_tick()
+
+    def new_tick(self):
+        self.ticks.append({})
+
+    def record(self, kind: tuple[str, str], expanded: int, path_length: int, time: float):
+        """
+        :param kind: class name and strategy name of the entity
+        :param expanded: nodes expanded by the search
+        :param path_length: number of steps of the planned path
+        :param time: wall time of the search, in seconds
+        """
+        for counters in (self.totals, self.ticks[-1]):
+            if kind not in counters:
+                counters[kind] = Path_counters()
+            counters[kind].add(expanded, path_length, time)
+
+    def report(self) -> list[str]:
+        """
+        Returns one line per kind of entity, the most costly first
+        """
+        res = [f"{'entity':<12}{'strategy':<10}{'calls':>8}{'expanded':>10}{'avg len':>9}{'time (ms)':>11}"]
+        for (name, strat), c in sorted(self.totals.items(), key=lambda x: -x[1].time):
+            res.append(f"{name:<12}{strat:<10}{c.calls:>8}{c.expanded:>10}"
+                       f"{c.path_length / c.calls:>9.1f}{c.time * 1000:>11.2f}")
+        return res
+
+    def to_dict(self) -> dict:
+        def counters_to_list(counters: dict[tuple[str, str], Path_counters]) -> list[dict]:
+            return [{"entity": name, "strategy": strat, **c.to_dict()} for (name, strat), c in counters.items()]
+        return {
+            "totals": counters_to_list(self.totals),
+            "ticks": [counters_to_list(t) for t in self.ticks],
+        }
@@ -0,0 +1,86 @@
+from .tiles import Tile
+from .utils_types import Pos
+from .grid_graph import get_graph
+from .landmarks import Landmarks
+from .pathfinding import Astar_nearest, Bidirectional_astar, Jps
+
+# Heroes share flow fields, or hierarchical paths on big maps, and only
+# single searches use a backend
+FLOW_FIELDS = "flow"
+# Every entity searches with the backend chosen from the map statistics
+AUTO = "auto"
+
+# Jump Point Search only beats the other backends on big maps where nearly
+# every cell has no wall around it
+OPEN_MAP_RATIO = 0.8
+JPS_MIN_CELLS = 8192
+
+
+class Map_stats():
+    """
+    Statistics of a map used to choose its pathfinder, computed once when
+    the map is loaded
+    """
+
+    def __init__(self, grid: list[list[Tile]]):
+        graph = get_graph(grid)
+        self.size = graph.size
+        self.walkable = sum(graph.walkable)
+        # Walkable cells whose 8 neighbours are all walkable
+        self.open = sum(1 for n in graph.neighbours if len(n) == 8)
+
+    def open_ratio(self) -> float:
+        return self.open / self.walkable if self.walkable else 0
+
+    def best_pathfinder(self) -> str:
+        if self.open_ratio() >= OPEN_MAP_RATIO and self.walkable >= JPS_MIN_CELLS:
+            return "jps"
+        return "bidirectional"
+
+
+class Pathfinder():
+    """
+    Searches a path from a cell to the nearest of several goals.
+
+    Every backend returns the path in the same format as Astar, from start
+    to the reached goal included, or None if no goal can be reached.
+    """
+    name = ""
+
+    def find(self, grid: list[list[Tile]], start: Pos, goals: list[Pos], blocked: list[Pos] = None, landmarks: Landmarks = None, stats: dict = None) -> list[Pos] | None:
+        raise NotImplementedError()
+
+
+class Astar_pathfinder(Pathfinder):
+    name = "astar"
+
+    def find(self, grid, start, goals, blocked=None, landmarks=None, stats=None):
+        res = Astar_nearest(grid, start, goals, blocked=blocked, landmarks=landmarks, stats=stats)
+        return None if res is None else res[1]
+
+
+class Bidirectional_pathfinder(Pathfinder):
+    """
+    Bidirectional A*, which needs a single goal: with several goals it
+    falls back to A*
+    """
+    name = "bidirectional"
+
+    def find(self, grid, start, goals, blocked=None, landmarks=None, stats=None):
+        if len(goals) != 1:
+            return PATHFINDERS["astar"].find(grid, start, goals, blocked, landmarks, stats)
+        return Bidirectional_astar(grid, start, goals[0], blocked=blocked, stats=stats)
+
+
+class Jps_pathfinder(Pathfinder):
+    name = "jps"
+
+    def find(self, grid, start, goals, blocked=None, landmarks=None, stats=None):
+        return Jps(grid, start, goals, blocked=blocked, stats=stats)
+
+
+PATHFINDERS: dict[str, Pathfinder] = {p.name: p for p in [
+    Astar_pathfinder(),
+    Bidirectional_pathfinder(),
+    Jps_pathfinder(),
+]}
@@ -1,11 +1,13 @@
 from .tiles import Tile
 from .utils_types import Pos
-from queue import PriorityQueue
+from .grid_graph import Grid_graph, get_graph, BLOCKED_WEIGHT
+from .landmarks import Landmarks
+from heapq import heappush, heappop
 
 
 def weight(t: Tile, p: Pos, blocked: list[Pos] = None) -> int:
     if p in blocked:
-        return 50
+        return BLOCKED_WEIGHT
     return 1
 
 
@@ -22,6 +24,14 @@ def path(prevs: dict[Pos, Pos], end: Pos, beg: Pos):
     return res
 
 
+def index_path(graph: Grid_graph, prevs: dict[int, int], end: int, beg: int) -> list[Pos]:
+    res = [end]
+    while res[-1] != beg:
+        res.append(prevs[res[-1]])
+    res.reverse()
+    return [graph.positions[i] for i in res]
+
+
 DIRS = [
     Pos(-1, -1),
     Pos(-1, 0),
@@ -34,39 +44,699 @@ DIRS = [
 ]
 
 
-def Astar(grid: list[list[Tile]], start: Pos, end: Pos, weight_fun=None, blocked: list[Pos] = None) -> list[Pos]:
-    pq = PriorityQueue()
+def Astar(grid: list[list[Tile]], start: Pos, end: Pos, weight_fun=None, blocked: list[Pos] = None, landmarks: Landmarks = None, stats: dict = None) -> list[Pos]:
+    graph = get_graph(grid)
+    if not graph.in_bounds(start) or not graph.in_bounds(end):
+        return None
+    return astar_index(graph, graph.index(start), [graph.index(end)],
+                       graph.cell_weights(weight_fun, blocked), landmarks, stats)
+
+
+def Astar_nearest(grid: list[list[Tile]], start: Pos, goals: list[Pos], weight_fun=None, blocked: list[Pos] = None, landmarks: Landmarks = None, stats: dict = None) -> tuple[Pos, list[Pos]] | None:
+    """
+    Searches the goal the closest to start by path, in a single expansion
+
+    :param goals: the cells that may be reached
+    :return: the nearest reachable goal and the path to it, None if no
+        goal can be reached
+    :rtype: tuple[Pos, list[Pos]] | None
+    """
+    graph = get_graph(grid)
+    ends = [graph.index(g) for g in goals if graph.in_bounds(g)]
+    if not graph.in_bounds(start) or not ends:
+        return None
+    res = astar_index(graph, graph.index(start), ends, graph.cell_weights(weight_fun, blocked), landmarks, stats)
+    if res is None:
+        return None
+    return res[-1], res
+
+
+def heuristic(graph: Grid_graph, ends: list[int], landmarks: Landmarks = None):
+    """
+    Returns the heuristic of A* towards the nearest of ends: the Chebyshev
+    distance, tightened by the ALT bound when landmarks are given
+    """
+    xs = graph.xs
+    ys = graph.ys
+    if len(ends) > 1:
+        single = [heuristic(graph, [e], landmarks) for e in ends]
+        return lambda i: min(f(i) for f in single)
+
+    e = ends[0]
+    ex = xs[e]
+    ey = ys[e]
+    if landmarks is None or not landmarks.dists:
+        return lambda i: max(abs(xs[i] - ex), abs(ys[i] - ey))
+
+    tables = landmarks.tables_to(e)
+
+    def alt(i: int) -> int:
+        res = max(abs(xs[i] - ex), abs(ys[i] - ey))
+        for d, de in tables:
+            di = d[i]
+            if di != -1 and abs(de - di) > res:
+                res = abs(de - di)
+        return res
+    return alt
+
+
+def astar_index(graph: Grid_graph, s: int, ends: list[int], weights: list[int], landmarks: Landmarks = None, stats: dict = None) -> list[Pos]:
+    """
+    A* over the flat representation of a grid, towards the nearest of
+    several ends
+
+    :param graph: the graph of the grid
+    :param s: index of the start cell
+    :param ends: indexes of the cells that may end the path
+    :param weights: cost of walking onto each cell
+    :param landmarks: landmarks of the grid, for the ALT heuristic
+    :param stats: if given, its "expanded" entry is increased by the
+        number of expanded nodes
+    :return: the path from s to the nearest end included, None if no end
+        can be reached
+    :rtype: list[Pos]
+    """
+    neighbours = graph.neighbours
+    is_end = set(ends)
+    dist_to_end = heuristic(graph, list(is_end), landmarks)
+    expanded = 0
+
+    closed = bytearray(graph.size)
+    prevs: dict[int, int] = {}
+    dists: dict[int, int] = {s: 0}
+    pq = [(dist_to_end(s), s)]
+    res = None
+    while pq:
+        node = heappop(pq)[1]
+        if closed[node]:
+            continue
+        if node in is_end:
+            res = index_path(graph, prevs, node, s)
+            break
+        closed[node] = 1
+        expanded += 1
+        d = dists[node]
+        for new in neighbours[node]:
+            if closed[new]:
+                continue
+            nd = d + weights[new]
+            old = dists.get(new)
+            if old is None or nd < old:
+                dists[new] = nd
+                prevs[new] = node
+                heappush(pq, (nd + dist_to_end(new), new))
+    if stats is not None:
+        stats["expanded"] = stats.get("expanded", 0) + expanded
+    return res
+
+
+def Bidirectional_astar(grid: list[list[Tile]], start: Pos, end: Pos, weight_fun=None, blocked: list[Pos] = None, stats: dict = None) -> list[Pos]:
+    graph = get_graph(grid)
+    if not graph.in_bounds(start) or not graph.in_bounds(end):
+        return None
+    return bidirectional_index(graph, graph.index(start), graph.index(end),
+                               graph.cell_weights(weight_fun, blocked), stats)
+
+
+def bidirectional_index(graph: Grid_graph, s: int, e: int, weights: list[int], stats: dict = None) -> list[Pos]:
+    """
+    A* searching from both s and e at once, the smallest frontier being
+    expanded first. Walking backwards from a cell onto a neighbour costs the
+    weight of the cell that is left.
+
+    :return: the path from s to e included, None if e can't be reached
+    :rtype: list[Pos]
+    """
+    if s == e:
+        return [graph.positions[s]]
+    neighbours = graph.neighbours
+    xs = graph.xs
+    ys = graph.ys
+    sx, sy, ex, ey = xs[s], ys[s], xs[e], ys[e]
+    expanded = 0
+
+    dists_f = {s: 0}
+    dists_b = {e: 0}
+    prevs: dict[int, int] = {}
+    nexts: dict[int, int] = {}
+    closed_f = set()
+    closed_b = set()
+    pq_f = [(max(abs(sx - ex), abs(sy - ey)), s)]
+    pq_b = [(max(abs(sx - ex), abs(sy - ey)), e)]
+    best = INF
+    meet = -1
+    while True:
+        while pq_f and pq_f[0][1] in closed_f:
+            heappop(pq_f)
+        while pq_b and pq_b[0][1] in closed_b:
+            heappop(pq_b)
+        # With consistent heuristics, no path through an open node of either
+        # frontier can beat the best one once its lowest key reaches it
+        if not pq_f or not pq_b or pq_f[0][0] >= best or pq_b[0][0] >= best:
+            break
+        expanded += 1
+        if len(pq_f) <= len(pq_b):
+            node = heappop(pq_f)[1]
+            closed_f.add(node)
+            d = dists_f[node]
+            for new in neighbours[node]:
+                nd = d + weights[new]
+                old = dists_f.get(new)
+                if old is None or nd < old:
+                    dists_f[new] = nd
+                    prevs[new] = node
+                    heappush(pq_f, (nd + max(abs(xs[new] - ex), abs(ys[new] - ey)), new))
+                    other = dists_b.get(new)
+                    if other is not None and nd + other < best:
+                        best = nd + other
+                        meet = new
+        else:
+            node = heappop(pq_b)[1]
+            closed_b.add(node)
+            nd = dists_b[node] + weights[node]
+            for new in neighbours[node]:
+                old = dists_b.get(new)
+                if old is None or nd < old:
+                    dists_b[new] = nd
+                    nexts[new] = node
+                    heappush(pq_b, (nd + max(abs(xs[new] - sx), abs(ys[new] - sy)), new))
+                    other = dists_f.get(new)
+                    if other is not None and nd + other < best:
+                        best = nd + other
+                        meet = new
+    if stats is not None:
+        stats["expanded"] = stats.get("expanded", 0) + expanded
+    if meet == -1:
+        return None
+
+    res = index_path(graph, prevs, meet, s)
+    node = meet
+    while node != e:
+        node = nexts[node]
+        res.append(graph.positions[node])
+    return res
+
+
+def Jps(grid: list[list[Tile]], start: Pos, goals: list[Pos], weight_fun=None, blocked: list[Pos] = None, stats: dict = None) -> list[Pos]:
+    """
+    Jump Point Search towards the nearest of goals
+
+    :return: the path from start to the nearest goal included, None if no
+        goal can be reached
+    :rtype: list[Pos]
+    """
+    graph = get_graph(grid)
+    ends = [graph.index(g) for g in goals if graph.in_bounds(g)]
+    if not graph.in_bounds(start) or not ends:
+        return None
     if weight_fun is None:
-        weight_fun = weight
-    seen = {}
-    prevs: dict[Pos, Pos] = {}
-    dists: dict[Pos, int] = {}
-    dists[start] = 0
-    pq.put((h(start, end), start))
-    while not pq.empty():
-        node = pq.get()[1]
-        if node in seen:
+        special = {graph.index(p): BLOCKED_WEIGHT for p in blocked or [] if graph.in_bounds(p)}
+    else:
+        special = {i: w for i, w in enumerate(graph.cell_weights(weight_fun, blocked)) if w != 1}
+    return jps_index(graph, graph.index(start), ends, special, stats)
+
+
+def jps_index(graph: Grid_graph, s: int, ends: list[int], special: dict[int, int], stats: dict = None) -> list[Pos]:
+    """
+    Jump Point Search over the flat representation of a grid.
+
+    Straight and diagonal runs of uniform cells are skipped in one jump, and
+    only the cells where the shortest paths may turn are put in the queue.
+    Pruning is only valid where every cell costs the same, so the search
+    stops next to the weighted cells and expands them like A* does.
+    Jumps walk on the padded flags of the graph, so they need no bound checks.
+
+    :param special: weight of each cell whose weight isn't 1, so that open
+        maps don't need a weight list of all their cells
+    :return: the path from s to the nearest end included, None if no end
+        can be reached
+    :rtype: list[Pos]
+    """
+    w = graph.padded_y
+    free = graph.padded_walkable
+    xs = graph.xs
+    ys = graph.ys
+    size_y = graph.size_y
+    expanded = 0
+
+    def padded(i: int) -> int:
+        return (xs[i] + 1) * w + ys[i] + 1
+
+    def unpadded(p: int) -> int:
+        return (p // w - 1) * size_y + p % w - 1
+
+    is_end = {padded(i) for i in ends}
+    dist_to_end = heuristic(graph, ends)
+    # Cells touching a weighted cell, where jumps stop
+    near = set()
+    for i in special:
+        near.add(padded(i))
+        near.update(padded(j) for j in graph.neighbours[i])
+
+    def jump(p: int, dx: int, dy: int) -> tuple[int, int] | None:
+        """
+        Returns the next jump point from p in the direction (dx, dy) with the
+        cost of reaching it
+        """
+        step = dx * w + dy
+        cost = 0
+        while True:
+            p += step
+            if not free[p]:
+                return None
+            if p in is_end or p in near:
+                return p, cost + special.get(unpadded(p), 1)
+            cost += 1
+            if dx != 0 and dy != 0:
+                back_x = p - dx * w
+                back_y = p - dy
+                if ((not free[back_x] and free[back_x + dy])
+                        or (not free[back_y] and free[back_y + dx * w])):
+                    return p, cost
+                if jump(p, dx, 0) is not None or jump(p, 0, dy) is not None:
+                    return p, cost
+            elif dx != 0:
+                if ((not free[p + 1] and free[p + 1 + step])
+                        or (not free[p - 1] and free[p - 1 + step])):
+                    return p, cost
+            elif ((not free[p + w] and free[p + w + step])
+                    or (not free[p - w] and free[p - w + step])):
+                return p, cost
+
+    def directions(p: int, parent: int) -> list[tuple[int, int]]:
+        if parent == -1 or p in near:
+            return [(d.x, d.y) for d in DIRS]
+        dx = (p // w > parent // w) - (p // w < parent // w)
+        dy = (p % w > parent % w) - (p % w < parent % w)
+        if dx != 0 and dy != 0:
+            res = [(dx, 0), (0, dy), (dx, dy)]
+            if not free[p - dx * w]:
+                res.append((-dx, dy))
+            if not free[p - dy]:
+                res.append((dx, -dy))
+        elif dx != 0:
+            res = [(dx, 0)]
+            if not free[p + 1]:
+                res.append((dx, 1))
+            if not free[p - 1]:
+                res.append((dx, -1))
+        else:
+            res = [(0, dy)]
+            if not free[p + w]:
+                res.append((1, dy))
+            if not free[p - w]:
+                res.append((-1, dy))
+        return res
+
+    ps = padded(s)
+    closed = set()
+    prevs: dict[int, int] = {}
+    dists: dict[int, int] = {ps: 0}
+    pq = [(dist_to_end(s), ps)]
+    res = None
+    while pq:
+        node = heappop(pq)[1]
+        if node in closed:
             continue
-        if node == end:
-            return path(prevs, node, start)
-        seen[node] = True
-        for d in DIRS:
-            new = node+d
-            if new.x < 0 or new.x >= len(grid):
+        if node in is_end:
+            res = node
+            break
+        closed.add(node)
+        expanded += 1
+        d = dists[node]
+        for dx, dy in directions(node, prevs.get(node, -1)):
+            found = jump(node, dx, dy)
+            if found is None:
                 continue
-            if new.y < 0 or new.y >= len(grid[0]):
+            new, c = found
+            if new in closed:
                 continue
-            tile = grid[new.x][new.y]
-            if not tile.walkable:
+            nd = d + c
+            old = dists.get(new)
+            if old is None or nd < old:
+                dists[new] = nd
+                prevs[new] = node
+                heappush(pq, (nd + dist_to_end(unpadded(new)), new))
+    if stats is not None:
+        stats["expanded"] = stats.get("expanded", 0) + expanded
+    if res is None:
+        return None
+
+    # Fills the straight and diagonal runs between the jump points
+    points = [res]
+    while points[-1] != ps:
+        points.append(prevs[points[-1]])
+    points.reverse()
+    cells = [ps]
+    for a, b in zip(points, points[1:]):
+        dx = (b // w > a // w) - (b // w < a // w)
+        dy = (b % w > a % w) - (b % w < a % w)
+        step = dx * w + dy
+        p = a
+        while p != b:
+            p += step
+            cells.append(p)
+    return [graph.positions[unpadded(p)] for p in cells]
+
+INF = float("inf")
+
+
+class Anytime_astar():
+    """
+    A* that runs a few nodes at a time, keeping its frontier between calls,
+    so that no single call can take longer than its budget.
+
+    Until a goal is reached, the best partial path leads to the most
+    promising cell of the frontier, the next one A* would expand.
+    """
+
+    def __init__(self, grid: list[list[Tile]], start: Pos, goals: list[Pos], weight_fun=None, blocked: list[Pos] = None, landmarks: Landmarks = None):
+        self.graph = get_graph(grid)
+        graph = self.graph
+        self.ends = {graph.index(g) for g in goals if graph.in_bounds(g)}
+        self.weights = graph.cell_weights(weight_fun, blocked)
+        self.closed = bytearray(graph.size)
+        self.prevs: dict[int, int] = {}
+        self.dists: dict[int, int] = {}
+        self.pq: list[tuple[int, int]] = []
+        self.start = -1
+        self.end = -1
+        self.done = True
+        if not graph.in_bounds(start) or not self.ends:
+            return
+        self.dist_to_end = heuristic(graph, list(self.ends), landmarks)
+        self.start = graph.index(start)
+        self.dists[self.start] = 0
+        self.pq.append((self.dist_to_end(self.start), self.start))
+        self.done = False
+
+    def step(self, budget: int, stats: dict = None) -> bool:
+        """
+        Expands at most budget nodes
+
+        :return: whether the search is over
+        :rtype: bool
+        """
+        neighbours = self.graph.neighbours
+        weights = self.weights
+        closed = self.closed
+        prevs = self.prevs
+        dists = self.dists
+        pq = self.pq
+        dist_to_end = self.dist_to_end if not self.done else None
+        expanded = 0
+        while not self.done and expanded < budget:
+            if not pq:
+                self.done = True
+                break
+            node = heappop(pq)[1]
+            if closed[node]:
                 continue
-            if new not in seen:
-                if new not in dists:
-                    dists[new] = dists[node] + weight_fun(tile, new, blocked)
+            if node in self.ends:
+                self.end = node
+                self.done = True
+                break
+            closed[node] = 1
+            expanded += 1
+            d = dists[node]
+            for new in neighbours[node]:
+                if closed[new]:
+                    continue
+                nd = d + weights[new]
+                old = dists.get(new)
+                if old is None or nd < old:
+                    dists[new] = nd
                     prevs[new] = node
-                else:
-                    if dists[node] + weight_fun(tile, new, blocked) < dists[new]:
-                        prevs[new] = node
-                        dists[new] = dists[node] + \
-                            weight_fun(tile, new, blocked)
-                pq.put((dists[new] + h(new, end), new))
-    return None
+                    heappush(pq, (nd + dist_to_end(new), new))
+        while pq and closed[pq[0][1]]:
+            heappop(pq)
+        if not pq:
+            self.done = True
+        if stats is not None:
+            stats["expanded"] = stats.get("expanded", 0) + expanded
+        return self.done
+
+    def contains(self, p: Pos) -> bool:
+        """
+        Returns whether p is in the search tree, so that paths can start
+        from it
+        """
+        return self.graph.in_bounds(p) and self.graph.index(p) in self.dists
+
+    def path_from(self, p: Pos) -> list[Pos] | None:
+        """
+        Returns a path from p, a cell of the search tree, to the reached goal
+        or to the head of the frontier if the search isn't over. When p isn't on
+        the way, the path goes back to where the two branches meet.
+
+        :return: the path in the same format as Astar, None if p isn't in
+            the tree or if the search is over without reaching a goal
+        :rtype: list[Pos] | None
+        """
+        if not self.contains(p) or (self.done and self.end == -1):
+            return None
+        target = self.end if self.done else self.pq[0][1]
+        prevs = self.prevs
+        up = [self.graph.index(p)]
+        depth = {up[0]: 0}
+        while up[-1] != self.start:
+            up.append(prevs[up[-1]])
+            depth[up[-1]] = len(up) - 1
+        down = [target]
+        while down[-1] not in depth:
+            down.append(prevs[down[-1]])
+        res = up[:depth[down[-1]]] + down[::-1]
+        return [self.graph.positions[i] for i in res]
+
+
+class Dstar_lite():
+    """
+    Incremental search rooted at a set of goals, in the style of D* Lite.
+
+    The g values are the costs of the shortest paths from each cell to the
+    nearest goal. When the weights of a few cells change, only the cells
+    whose shortest path went through them are searched again.
+
+    With a start, the search stops as soon as the path of the start is
+    known and is focused towards it. Without one, the whole shortest-path
+    tree is kept up to date.
+    """
+
+    def __init__(self, grid: list[list[Tile]], goals: list[Pos], weight_fun=None, blocked: list[Pos] = None, start: Pos = None):
+        self.graph = get_graph(grid)
+        graph = self.graph
+        self.weight_fun = weight_fun
+        self.weights = graph.cell_weights(weight_fun, blocked)
+        self.blocked = self.blocked_indexes(blocked)
+        self.g: list[float] = [INF] * graph.size
+        self.rhs: list[float] = [INF] * graph.size
+        self.queue: list[tuple[float, float, int]] = []
+        self.keys: dict[int, tuple[float, float]] = {}
+        self.km = 0
+        # Nodes expanded since the search was created
+        self.expanded = 0
+        self.start = -1
+        if start is not None and graph.in_bounds(start):
+            self.start = graph.index(start)
+
+        self.goals: set[int] = set()
+        for p in goals:
+            if graph.in_bounds(p) and graph.walkable[graph.index(p)]:
+                i = graph.index(p)
+                self.goals.add(i)
+                self.rhs[i] = 0
+                self.push(i)
+        self.compute()
+
+    def blocked_indexes(self, blocked) -> set[int]:
+        graph = self.graph
+        if blocked is None:
+            return set()
+        return {graph.index(p) for p in blocked if graph.in_bounds(p)}
+
+    def h(self, i: int) -> int:
+        if self.start == -1:
+            return 0
+        xs = self.graph.xs
+        ys = self.graph.ys
+        return max(abs(xs[i] - xs[self.start]), abs(ys[i] - ys[self.start]))
+
+    def key(self, i: int) -> tuple[float, float]:
+        m = min(self.g[i], self.rhs[i])
+        return (m + self.h(i) + self.km, m)
+
+    def push(self, i: int):
+        k = self.key(i)
+        self.keys[i] = k
+        heappush(self.queue, (k[0], k[1], i))
+
+    def update_vertex(self, i: int):
+        if i not in self.goals:
+            g = self.g
+            weights = self.weights
+            best = INF
+            for j in self.graph.neighbours[i]:
+                c = weights[j] + g[j]
+                if c < best:
+                    best = c
+            self.rhs[i] = best
+        if self.g[i] != self.rhs[i]:
+            self.push(i)
+        elif i in self.keys:
+            del self.keys[i]
+
+    def top_key(self) -> tuple[float, float]:
+        queue = self.queue
+        keys = self.keys
+        while queue:
+            k1, k2, i = queue[0]
+            if keys.get(i) == (k1, k2):
+                return (k1, k2)
+            heappop(queue)
+        return (INF, INF)
+
+    def done(self) -> bool:
+        if self.start == -1:
+            return self.top_key()[0] == INF
+        return (self.top_key() >= self.key(self.start)
+                and self.rhs[self.start] == self.g[self.start])
+
+    def compute(self):
+        g = self.g
+        rhs = self.rhs
+        weights = self.weights
+        neighbours = self.graph.neighbours
+        goals = self.goals
+        keys = self.keys
+        queue = self.queue
+        expanded = 0
+        while not self.done():
+            k1, k2, u = heappop(queue)
+            expanded += 1
+            new_key = self.key(u)
+            if (k1, k2) < new_key:
+                self.push(u)
+            elif g[u] > rhs[u]:
+                g[u] = rhs[u]
+                del keys[u]
+                # Moving from a neighbour onto u costs the weight of u
+                c = weights[u] + g[u]
+                for p in neighbours[u]:
+                    if p not in goals and c < rhs[p]:
+                        rhs[p] = c
+                        if g[p] != c:
+                            self.push(p)
+                        elif p in keys:
+                            del keys[p]
+            else:
+                g[u] = INF
+                self.update_vertex(u)
+                for p in neighbours[u]:
+                    self.update_vertex(p)
+        self.expanded += expanded
+
+    def update_weights(self, changes: dict[int, int]):
+        """
+        Repairs the search after the weights of some cells changed
+
+        :param changes: the new weight of each changed cell index
+        """
+        neighbours = self.graph.neighbours
+        touched = set()
+        for i, w in changes.items():
+            if self.weights[i] == w:
+                continue
+            self.weights[i] = w
+            touched.update(neighbours[i])
+        for i in touched:
+            self.update_vertex(i)
+        if touched:
+            self.compute()
+
+    def set_blocked(self, blocked: list[Pos]):
+        """
+        Updates the blocked cells, repairing only what they changed
+        """
+        if self.weight_fun is not None:
+            weights = self.graph.cell_weights(self.weight_fun, blocked)
+            self.update_weights({i: w for i, w in enumerate(weights) if w != self.weights[i]})
+            return
+
+        new = self.blocked_indexes(blocked)
+        changes = {}
+        for i in self.blocked - new:
+            changes[i] = 1
+        for i in new - self.blocked:
+            changes[i] = BLOCKED_WEIGHT
+        self.blocked = new
+        self.update_weights(changes)
+
+    def move_start(self, start: Pos):
+        """
+        Moves the start of a focused search, keeping what was already found
+        """
+        new = self.graph.index(start)
+        if self.start != -1:
+            self.km += self.h(new)
+        self.start = new
+        self.compute()
+
+    def index(self, p: Pos) -> int:
+        if not self.graph.in_bounds(p):
+            return -1
+        i = self.graph.index(p)
+        if self.g[i] == INF:
+            return -1
+        return i
+
+    def reachable(self, p: Pos) -> bool:
+        return self.index(p) != -1
+
+    def dist(self, p: Pos) -> int | None:
+        i = self.index(p)
+        if i == -1:
+            return None
+        return self.g[i]
+
+    def next_index(self, i: int) -> int:
+        if i in self.goals:
+            return -1
+        g = self.g
+        weights = self.weights
+        best = INF
+        res = -1
+        for j in self.graph.neighbours[i]:
+            c = weights[j] + g[j]
+            if c < best:
+                best = c
+                res = j
+        return res
+
+    def next_step(self, p: Pos) -> Pos | None:
+        """
+        Returns the next cell to walk on from p, None if p is a goal or
+        if no goal can be reached from p
+        """
+        i = self.index(p)
+        if i == -1:
+            return None
+        j = self.next_index(i)
+        if j == -1:
+            return None
+        return self.graph.positions[j]
+
+    def path(self, p: Pos) -> list[Pos] | None:
+        """
+        Returns the whole path from p to its nearest goal, in the same
+        format as Astar
+        """
+        i = self.index(p)
+        if i == -1:
+            return None
+        res = [i]
+        while True:
+            j = self.next_index(res[-1])
+            if j == -1:
+                break
+            res.append(j)
+        return [self.graph.positions[j] for j in res]
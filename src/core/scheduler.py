@@ -0,0 +1,73 @@
+from .entity import Entity
+from .consts import WHEEL_SIZE
+
+
+class Timing_wheel():
+    """
+    Entities waiting for the tick they act on, in one slot per tick modulo
+    the size of the wheel, so that a tick only looks at the entities due.
+
+    Entities acting further than the size of the wheel stay in their slot
+    for several turns. Rescheduling an entity leaves its previous entry in
+    place, it is dropped when its slot comes up.
+    """
+
+    def __init__(self, size: int = WHEEL_SIZE):
+        self.slots: list[list[Entity]] = [[] for _ in range(size)]
+        self.tick = 0
+        self.wake: dict[Entity, int] = {}
+        # Entities act in the order they were first scheduled
+        self.order: dict[Entity, int] = {}
+        self.next_order = 0
+
+    def clear(self):
+        for slot in self.slots:
+            slot.clear()
+        self.wake.clear()
+        self.order.clear()
+
+    def schedule(self, ent: Entity, delay: int):
+        """
+        Makes ent act delay ticks after the current one
+        """
+        if ent not in self.order:
+            self.order[ent] = self.next_order
+            self.next_order += 1
+        wake = self.tick + delay
+        self.wake[ent] = wake
+        self.slots[wake % len(self.slots)].append(ent)
+
+    def remove(self, ent: Entity):
+        self.wake.pop(ent, None)
+        self.order.pop(ent, None)
+
+    def delay(self, ent: Entity) -> int:
+        """
+        Returns the number of ticks ent still waits
+        """
+        return max(self.wake[ent] - self.tick, 0)
+
+    def due(self) -> list[Entity]:
+        """
+        Returns the entities acting on the current tick
+        """
+        i = self.tick % len(self.slots)
+        tick = self.tick
+        wake = self.wake
+        res = []
+        # Rescheduling to the same tick leaves two entries
+        taken = set()
+        later = []
+        for ent in self.slots[i]:
+            w = wake.get(ent)
+            if w == tick:
+                if ent not in taken:
+                    taken.add(ent)
+                    res.append(ent)
+            elif w is not None and w > tick and w % len(self.slots) == i:
+                later.append(ent)
+        self.slots[i] = later
+        return res
+
+    def advance(self):
+        self.tick += 1
@@ -0,0 +1,123 @@
+from bisect import insort
+from .utils_types import Pos
+from .entity import Entity
+from .consts import BUCKET_SIZE, BUCKET_MIN_HEROES, ARRAYS_MIN_HEROES
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class Bucket_grid():
+    """
+    Uniform bucket grid over the positions of a list of entities, so that
+    range queries only look at the buckets around their center.
+
+    Queries return the entities in the order of the list the index was
+    built from, so buildings pick the same targets as when scanning it.
+    """
+
+    def __init__(self, entities: list[Entity], bucket_size: int = BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self.buckets: dict[tuple[int, int], list[tuple[int, Entity]]] = {}
+        self.rows: dict[Entity, int] = {}
+        for i, e in enumerate(entities):
+            key = (e.position.x // bucket_size, e.position.y // bucket_size)
+            self.buckets.setdefault(key, []).append((i, e))
+            self.rows[e] = i
+
+    def move(self, e: Entity, old: Pos):
+        """
+        Follows e, which moved from old to its current position
+        """
+        size = self.bucket_size
+        key = (old.x // size, old.y // size)
+        new_key = (e.position.x // size, e.position.y // size)
+        if key == new_key:
+            return
+        entry = (self.rows[e], e)
+        bucket = self.buckets[key]
+        bucket.remove(entry)
+        if not bucket:
+            del self.buckets[key]
+        # Buckets stay in the order of the list
+        insort(self.buckets.setdefault(new_key, []), entry)
+
+    def in_range(self, center: Pos, r: int) -> list[Entity]:
+        """
+        Returns the entities at a Manhattan distance of at most r from center
+        """
+        size = self.bucket_size
+        buckets = self.buckets
+        cx = center.x
+        cy = center.y
+        res = []
+        for bx in range((cx - r) // size, (cx + r) // size + 1):
+            for by in range((cy - r) // size, (cy + r) // size + 1):
+                bucket = buckets.get((bx, by))
+                if bucket is None:
+                    continue
+                for i, e in bucket:
+                    p = e.position
+                    if abs(p.x - cx) + abs(p.y - cy) <= r:
+                        res.append((i, e))
+        if len(res) > 1:
+            # Indexes are unique, entities are never compared
+            res.sort()
+        return [e for _, e in res]
+
+    def at(self, p: Pos) -> list[Entity]:
+        size = self.bucket_size
+        return [e for _, e in self.buckets.get((p.x // size, p.y // size), ()) if e.position == p]
+
+
+class Hero_arrays():
+    """
+    Positions of a list of entities stored as parallel NumPy arrays, so that
+    a range query tests every entity at once instead of one by one.
+
+    Only the positions are copied, and moves update them: hit points stay on
+    the entities, since heroes react to the damage they take.
+    """
+
+    def __init__(self, entities: list[Entity]):
+        # Copied once, the heroes of a game are an Ordered_set
+        self.entities = list(entities)
+        self.rows = {e: i for i, e in enumerate(self.entities)}
+        n = len(entities)
+        self.x = np.fromiter((e.position.x for e in entities), dtype=np.int32, count=n)
+        self.y = np.fromiter((e.position.y for e in entities), dtype=np.int32, count=n)
+
+    def move(self, e: Entity, old: Pos):
+        """
+        Follows e, which moved from old to its current position
+        """
+        i = self.rows[e]
+        self.x[i] = e.position.x
+        self.y[i] = e.position.y
+
+    def mask(self, center: Pos, r: int):
+        return np.abs(self.x - center.x) + np.abs(self.y - center.y) <= r
+
+    def in_range(self, center: Pos, r: int) -> list[Entity]:
+        """
+        Returns the entities at a Manhattan distance of at most r from center
+        """
+        entities = self.entities
+        return [entities[i] for i in np.flatnonzero(self.mask(center, r))]
+
+    def at(self, p: Pos) -> list[Entity]:
+        return self.in_range(p, 0)
+
+
+def make_index(entities: list[Entity]) -> Bucket_grid | Hero_arrays | None:
+    """
+    Returns the fastest index for range queries over entities, None when
+    scanning them is faster
+    """
+    if np is not None and len(entities) >= ARRAYS_MIN_HEROES:
+        return Hero_arrays(entities)
+    if len(entities) >= BUCKET_MIN_HEROES:
+        return Bucket_grid(entities)
+    return None
@@ -11,6 +11,8 @@ class TILES_TYPES(Enum):
 
 
 class Tile():
+    __slots__ = ("type", "walkable", "buildable", "ascii")
+
     def __init__(self, type: TILES_TYPES, walkable: bool, build: bool, ascii: str):
         self.type = type
         self.walkable = walkable
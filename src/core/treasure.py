@@ -1,9 +1,12 @@
+from bisect import insort
 from .utils_types import Pos
 from .entity import Entity
 from .consts import NB_JEWELS
 
 
 class Jewel():
+    __slots__ = ("pos", "carried", "carrier", "present")
+
     def __init__(self, pos: Pos):
         self.pos = pos
         self.carried = False
@@ -20,7 +23,13 @@ class Jewel():
         self.carrier.has_jewel = False
         self.carrier = None
 
-    def update(self):
+    def update(self) -> bool:
+        """
+        Follows the carrier of the jewel
+
+        :return: whether the jewel was stolen
+        :rtype: bool
+        """
         if self.carried:
             self.pos = self.carrier.position
             if self.pos == self.carrier.home:
@@ -29,25 +38,119 @@ class Jewel():
                 else:
                     self.carrier.dead = True
                 self.stolen_to_base()
+                return True
+        return False
 
     def stolen_to_base(self):
         self.present = False
 
 
 class Treasure():
-    def __init__(self, pos: Pos):
+    """
+    The jewels guarded by the player, indexed by state so that the heroes
+    query them without looking at every jewel: the available ones, their
+    carriers, the stolen ones and the ones lying on each cell.
+    """
+
+    def __init__(self, pos: Pos, nb_jewels: int = NB_JEWELS):
         self.pos = pos
-        self.jewels: list[Jewel] = [Jewel(pos) for _ in range(NB_JEWELS)]
-        self.jewels_left = NB_JEWELS
+        self.jewels: list[Jewel] = [Jewel(pos) for _ in range(nb_jewels)]
+        self.jewels_left = nb_jewels
+        # Jewels of each carrier, so that a dead carrier finds them at once
+        self.carried: dict[Entity, list[Jewel]] = {}
+        # Jewels no one carries on each cell, in the order of jewels
+        self.free_at: dict[Pos, list[Jewel]] = {}
+        # Number of jewels still present and not carried on each cell
+        self.available_at: dict[Pos, int] = {}
+        self.nb_available = 0
+        self.stolen: set[Jewel] = set()
+        self.ranks: dict[Jewel, int] = {}
+        self.reindex()
 
-    def update(self):
+    def reindex(self):
+        """
+        Rebuilds the indexes of the jewels, for jewels filled directly
+        """
+        self.carried.clear()
+        self.free_at.clear()
+        self.available_at.clear()
+        self.nb_available = 0
+        self.stolen.clear()
+        self.ranks = {j: i for i, j in enumerate(self.jewels)}
         for j in self.jewels:
-            j.update()
+            if not j.present:
+                self.stolen.add(j)
+            if not j.carried:
+                self.add_free(j)
+            elif j.carrier is not None:
+                self.carried.setdefault(j.carrier, []).append(j)
+        self.jewels_left = self.nb_available
+
+    def add_free(self, jewel: Jewel):
+        insort(self.free_at.setdefault(jewel.pos, []), jewel, key=self.ranks.__getitem__)
+        if jewel.present:
+            self.available_at[jewel.pos] = self.available_at.get(jewel.pos, 0) + 1
+            self.nb_available += 1
+
+    def remove_free(self, jewel: Jewel):
+        free = self.free_at[jewel.pos]
+        free.remove(jewel)
+        if not free:
+            del self.free_at[jewel.pos]
+        if jewel.present:
+            self.nb_available -= 1
+            self.available_at[jewel.pos] -= 1
+            if not self.available_at[jewel.pos]:
+                del self.available_at[jewel.pos]
+
+    def free_jewel_at(self, p: Pos) -> Jewel | None:
+        """
+        Returns the first jewel no one carries on p, None if there is none
+        """
+        free = self.free_at.get(p)
+        return free[0] if free else None
 
-        self.jewels_left = sum(1 for j in self.jewels if j.present and not j.carried)
+    def available_cells(self) -> list[Pos]:
+        """
+        Returns the cells holding jewels that can still be taken
+        """
+        return list(self.available_at)
+
+    def take(self, jewel: Jewel, carrier: Entity):
+        self.remove_free(jewel)
+        jewel.take(carrier)
+        self.carried.setdefault(carrier, []).append(jewel)
+
+    def drop_all(self, carrier: Entity) -> bool:
+        """
+        Drops the jewels carried by carrier
+
+        :return: whether a jewel was dropped
+        """
+        dropped = False
+        for j in self.carried.pop(carrier, ()):
+            if j.carried and j.carrier == carrier:
+                j.drop()
+                self.add_free(j)
+                dropped = True
+        return dropped
+
+    def update(self) -> bool:
+        """
+        Moves the carried jewels with their carriers
+
+        :return: whether a jewel was stolen
+        """
+        stolen = False
+        for jewels in self.carried.values():
+            for j in jewels:
+                if j.update():
+                    self.stolen.add(j)
+                    stolen = True
+
+        # Only follows the jewels at the end of each tick, as the heroes read it
+        self.jewels_left = self.nb_available
+        return stolen
 
     def game_lost(self):
-        for j in self.jewels:
-            if j.present:
-                return False
-        return True
+        return len(self.stolen) == len(self.jewels)
@@ -1,33 +1,56 @@
 
-class Pos():
-    def __init__(self, x: int, y: int):
-        self.x = x
-        self.y = y
+from operator import itemgetter
+
+# Positions with both coordinates below this are created once and shared
+INTERN_SIZE = 256
+_interned: list = [None] * (INTERN_SIZE * INTERN_SIZE)
 
-    def __add__(self, p):
-        return Pos(self.x + p.x, self.y + p.y)
 
-    def __eq__(self, value):
-        return self.x == value.x and self.y == value.y
+class Pos(tuple):
+    """
+    Immutable cell coordinates.
 
-    def __ne__(self, value):
-        return not self.__eq__(value)
+    A Pos is a pair of ints, so hashing, equality and ordering (x first,
+    then y) run in C, which matters for the many dicts and sets keyed by
+    cells. The positions of cells of the usual maps are interned, so most
+    lookups stop at the identity check.
+    """
+    __slots__ = ()
 
-    def __hash__(self):
-        return (str(self.x)+","+str(self.y)).__hash__()
+    x = property(itemgetter(0))
+    y = property(itemgetter(1))
 
-    def __lt__(self, other):
-        if self.x == other.x:
-            return self.y < other.y
-        return self.x < other.x
+    def __new__(cls, x: int, y: int):
+        if 0 <= x < INTERN_SIZE and 0 <= y < INTERN_SIZE:
+            i = x * INTERN_SIZE + y
+            p = _interned[i]
+            if p is None:
+                p = _interned[i] = tuple.__new__(cls, (x, y))
+            return p
+        return tuple.__new__(cls, (x, y))
 
-    def __gt__(self, other):
-        if self.x == other.x:
-            return self.y > other.y
-        return self.x > other.x
+    def __getnewargs__(self):
+        return tuple(self)
+
+    def __add__(self, p):
+        return Pos(self[0] + p[0], self[1] + p[1])
+
+    def __repr__(self) -> str:
+        return f"Pos({self[0]}, {self[1]})"
 
     def dist(self, p):
-        return abs(self.x - p.x) + abs(self.y - p.y)
+        return abs(self[0] - p[0]) + abs(self[1] - p[1])
+
+    def to_index(self, size_y: int) -> int:
+        """
+        Returns the flat index x * size_y + y of the cell in a grid of
+        size_y columns
+        """
+        return self[0] * size_y + self[1]
+
+    @staticmethod
+    def from_index(i: int, size_y: int) -> "Pos":
+        return Pos(i // size_y, i % size_y)
 
 
 class TasMin():
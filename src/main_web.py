@@ -5,7 +5,7 @@ from pydantic import BaseModel
 from fastapi.staticfiles import StaticFiles
 from os import listdir
 from os.path import isfile, join
-from .web.to_dict import to_dict, only_change, tiles_types_to_num
+from .web.to_dict import to_dict, only_change, tiles_types_to_num, catalog_to_dict
 from .web.recreator import  dict_to_instance
 from .core.level import import_map, import_map_from_index
 from .core.game_instance import Game_instance, GAME_PHASE
@@ -26,26 +26,29 @@ app.add_middleware(
 
 NB_GENS = 20
 
-def prepare_json(g: Game_instance):
+def prepare_json(g: Game_instance, path_stats: bool = False):
     res = {"base": to_dict(g)}
     change = []
+    if path_stats:
+        g.enable_path_stats()
     
     for _ in range(NB_GENS):
         g.update()
         if g.state == GAME_PHASE.BUILDING_PHASE:
             change.append(only_change(g))
-            res["changes"] = change
-            return res 
+            break
         change.append(only_change(g))
         if g.finished:
             break
     res["changes"] = change
+    if path_stats:
+        res["path_stats"] = g.path_stats.to_dict()
     return res
 
 
 @app.post("/game-update")
-def get_update(Game:Dict[Any,Any]):
-    return prepare_json(dict_to_instance(Game))
+def get_update(Game:Dict[Any,Any], path_stats: bool = False):
+    return prepare_json(dict_to_instance(Game), path_stats)
 
 
 @app.get("/get-startup-game/{id}")
@@ -89,14 +92,14 @@ def tt(G:Dict[Any,Any]):
     if "building" in tile_info:
         # Upgrade or delete
         building = tile_info["building"]
-        return (building, building.get_long_desc())
+        return (catalog_to_dict(building), building.get_long_desc())
 
 
     # New building
     poss = g.get_placeable_buildings(Pos(G["x"],G["y"]))
 
 
-    return [(x, x.get_long_desc()) for x in poss]
+    return [(catalog_to_dict(x), x.get_long_desc()) for x in poss]
 
 @app.post("/place_building")
 def placer(G: Dict[Any, Any]):
@@ -159,8 +162,7 @@ def delete_building(G: Dict[Any, Any]):
     if "building" in tile_info:
         building = tile_info["building"]
         try:
-            g.buildings.remove(building)
-            g.gold += building.get_construction_cost() // 2
+            g.delete(building)
         except Exception as e:
             print(f"Failed to delete: {e}")
 
@@ -0,0 +1,67 @@
+"""
+Plays a level without a terminal nor waits between the ticks, and prints
+its outcome. Run from the root of the repository with:
+    python -m src.sim classic.map --build-order data/build_orders/classic.txt
+
+Given several build orders or games, plays each build order with the same
+seeds over all the cores and compares them.
+"""
+from argparse import ArgumentParser
+from os.path import isfile, join
+from time import perf_counter
+from ..core.consts import MAPS_PATH
+from ..core.level import import_map
+from ..core.pathfinders import PATHFINDERS, FLOW_FIELDS, AUTO
+from .build_order import import_build_order
+from .runner import simulate, MAX_TICKS
+from .evaluate import evaluate
+
+
+def main():
+    parser = ArgumentParser(prog="python -m src.sim", description="Plays a level as fast as possible.")
+    parser.add_argument("map", help=f"map file, or name of a map of {MAPS_PATH}")
+    parser.add_argument("-b", "--build-order", action="append", default=[],
+                        help="file of the buildings to place before each wave, may be repeated")
+    parser.add_argument("-s", "--seed", type=int, help="seed of the random choices of the (first) game")
+    parser.add_argument("-n", "--games", type=int, default=1, help="number of games for each build order")
+    parser.add_argument("-w", "--workers", type=int, help="number of processes, all the cores by default")
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS)
+    parser.add_argument("--pathfinder", default=FLOW_FIELDS, choices=[FLOW_FIELDS, AUTO, *PATHFINDERS])
+    parser.add_argument("--search-budget", type=int)
+    args = parser.parse_args()
+
+    path = args.map if isfile(args.map) else join(MAPS_PATH, args.map)
+    orders = [import_build_order(f) for f in args.build_order] or [[]]
+    if args.games > 1 or len(orders) > 1:
+        compare(path, args, orders)
+        return
+    res = simulate(import_map(path), orders[0], args.seed, args.max_ticks, args.pathfinder, args.search_budget)
+
+    outcome = "won" if res.won else "lost" if res.finished else "stopped"
+    print(f"{path} with seed {res.seed}: {outcome} after {res.waves} waves, score {res.score}, {res.jewels_left} jewels left")
+    print(f"score after each wave: {' '.join(str(s) for s in res.wave_scores)}")
+    if res.dropped:
+        print(f"{res.dropped} build steps could not be done")
+    print(f"{res.ticks} ticks in {res.seconds:.3f}s, {res.ticks_per_second():.0f} ticks/s")
+
+
+def compare(path: str, args, orders):
+    first = args.seed or 0
+    seeds = range(first, first + args.games)
+    t = perf_counter()
+    stats = evaluate(path, orders, seeds, args.workers, args.max_ticks, args.pathfinder, args.search_budget)
+    seconds = perf_counter() - t
+
+    names = args.build_order or ["no buildings"]
+    print(f"{path}, seeds {first} to {first + args.games - 1}")
+    for name, s in zip(names, stats):
+        scores = " ".join(f"{sum(w) / len(w):.0f}" for w in s.wave_scores)
+        print(f"{name}: won {s.win_rate():.0%}, {s.mean_jewels_stolen():.2f} jewels stolen, "
+              f"mean score after each wave: {scores}")
+    games = sum(s.games for s in stats)
+    ticks = sum(s.ticks for s in stats)
+    print(f"{games} games in {seconds:.2f}s, {games / seconds:.1f} games/s, {ticks / seconds:.0f} ticks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+from typing import NamedTuple
+from ..core.buildings.building import Building
+from ..core.buildings.all_buildings import ALL_BUILDINGS
+from ..core.game_instance import Game_instance
+from ..core.utils_types import Pos
+
+PLACE = "place"
+UPGRADE = "upgrade"
+DELETE = "delete"
+
+# Buildings of the build orders, by class name
+BUILDINGS = {type(b).__name__: b for b in ALL_BUILDINGS}
+
+
+class Build_step(NamedTuple):
+    """
+    One action of a build order, done during the building phase before
+    the given wave, the first one being 0
+    """
+    wave: int
+    action: str
+    pos: Pos
+    building: str | None = None
+
+
+def parse_build_order(text: str) -> list[Build_step]:
+    """
+    Reads a build order written one step per line, as
+        <wave> place <building class> <x> <y>
+        <wave> upgrade <x> <y>
+        <wave> delete <x> <y>
+    Empty lines and what follows a # are ignored.
+    """
+    res = []
+    for i, line in enumerate(text.split("\n")):
+        words = line.split("#")[0].split()
+        if not words:
+            continue
+        try:
+            wave, action = int(words[0]), words[1]
+            if action == PLACE and len(words) == 5 and words[2] in BUILDINGS:
+                res.append(Build_step(wave, action, Pos(int(words[3]), int(words[4])), words[2]))
+            elif action in (UPGRADE, DELETE) and len(words) == 4:
+                res.append(Build_step(wave, action, Pos(int(words[2]), int(words[3]))))
+            else:
+                raise ValueError
+        except (ValueError, IndexError):
+            raise ValueError(f"Invalid build step on line {i + 1}: {line.strip()}")
+    return res
+
+
+def import_build_order(filename) -> list[Build_step]:
+    with open(filename, "r") as f:
+        return parse_build_order(f.read())
+
+
+def format_build_order(steps: list[Build_step]) -> str:
+    """
+    Writes steps the way parse_build_order reads them
+    """
+    lines = []
+    for s in steps:
+        building = f" {s.building}" if s.action == PLACE else ""
+        lines.append(f"{s.wave} {s.action}{building} {s.pos.x} {s.pos.y}\n")
+    return "".join(lines)
+
+
+def building_at(game: Game_instance, pos: Pos) -> Building | None:
+    buildings = game.occupancy.buildings.get(pos)
+    return buildings[-1] if buildings else None
+
+
+def apply_build_order(game: Game_instance, steps: list[Build_step]) -> tuple[list[Build_step], int]:
+    """
+    Does the steps of the current building phase in order, until one of
+    them costs more gold than the game has: it and the ones after it wait
+    for the next building phase. Steps that cannot be done at all, like
+    placing a building on a forbidden tile, are dropped.
+
+    :return: the steps left and the number of steps dropped
+    """
+    dropped = 0
+    for i, step in enumerate(steps):
+        if step.wave > game.current_wave:
+            return steps[i:], dropped
+        building = building_at(game, step.pos)
+        if step.action == PLACE:
+            template = BUILDINGS[step.building]
+            if not game.can_place(template, step.pos):
+                dropped += 1
+            elif template.get_construction_cost() > game.gold:
+                return steps[i:], dropped
+            else:
+                game.place(template, step.pos)
+        elif step.action == UPGRADE:
+            if building is None or not building.is_upgradable():
+                dropped += 1
+            elif building.get_upgrade_cost() > game.gold:
+                return steps[i:], dropped
+            else:
+                game.upgrade(building)
+        elif building is None:
+            dropped += 1
+        else:
+            game.delete(building)
+    return [], dropped
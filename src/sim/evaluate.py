@@ -0,0 +1,199 @@
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from os import cpu_count
+from time import perf_counter
+from typing import NamedTuple
+from ..core.level import import_map
+from ..core.pathfinders import FLOW_FIELDS
+from ..core.utils_types import Pos
+from .build_order import Build_step, PLACE, UPGRADE
+from .runner import simulate, MAX_TICKS
+
+
+class Placement(NamedTuple):
+    """
+    A building of a layout, by class name, and the level it is upgraded to
+    """
+    building: str
+    pos: Pos
+    level: int = 1
+
+
+def layout_steps(layout: list[Placement], wave: int = 0) -> list[Build_step]:
+    """
+    Returns the build order placing then upgrading the buildings of layout
+    before the given wave. The steps gold doesn't cover yet wait for the
+    next waves.
+    """
+    res = [Build_step(wave, PLACE, p.pos, p.building) for p in layout]
+    for level in range(2, max((p.level for p in layout), default=1) + 1):
+        res += [Build_step(wave, UPGRADE, p.pos) for p in layout if p.level >= level]
+    return res
+
+
+class Layout_stats():
+    """
+    Outcomes of the games played with one build order
+    """
+    __slots__ = ("steps", "games", "wins", "jewels_stolen", "wave_scores", "ticks", "seconds")
+
+    def __init__(self, steps: list[Build_step]):
+        self.steps = steps
+        self.games = 0
+        self.wins = 0
+        # Jewels stolen in each game
+        self.jewels_stolen: list[int] = []
+        # Scores after each wave of the games that got through it
+        self.wave_scores: list[list[int]] = []
+        self.ticks = 0
+        self.seconds = 0.0
+
+    def add(self, won: bool, jewels_stolen: int, wave_scores: list[int], ticks: int, seconds: float):
+        self.games += 1
+        self.wins += won
+        self.jewels_stolen.append(jewels_stolen)
+        for i, score in enumerate(wave_scores):
+            if i == len(self.wave_scores):
+                self.wave_scores.append([])
+            self.wave_scores[i].append(score)
+        self.ticks += ticks
+        self.seconds += seconds
+
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+    def mean_jewels_stolen(self) -> float:
+        return sum(self.jewels_stolen) / self.games if self.games else 0.0
+
+
+# What the games of a worker share, set once per process by init_worker
+_shared = None
+
+
+def shared_state(map_path: str, max_ticks: int, pathfinder: str, search_budget: int | None) -> tuple:
+    return import_map(map_path), max_ticks, pathfinder, search_budget
+
+
+def init_worker(*args):
+    global _shared
+    _shared = shared_state(*args)
+
+
+def play(game: tuple[int, list[Build_step], int],
+         shared: tuple = None) -> tuple[int, bool, int, list[int], int, float]:
+    """
+    Plays the layout of the given index with the given seed, in a worker
+    unless shared is given
+    """
+    template, max_ticks, pathfinder, search_budget = shared or _shared
+    i, steps, seed = game
+    res = simulate(template, steps, seed, max_ticks, pathfinder, search_budget)
+    return i, res.won, res.jewels_stolen, res.wave_scores, res.ticks, res.seconds
+
+
+def play_chunk(games: list[tuple[int, list[Build_step], int]]) -> list[tuple]:
+    return [play(game) for game in games]
+
+
+class Evaluator():
+    """
+    Plays batches of layouts on a map over worker processes, which load the
+    map once and are kept from one batch to the next.
+
+    Use it as a context manager, or close it, to stop the workers.
+    """
+
+    def __init__(self, map_path: str, workers: int = None, max_ticks: int = MAX_TICKS,
+                 pathfinder: str = FLOW_FIELDS, search_budget: int = None):
+        """
+        :param workers: number of processes, all the cores if not given, the
+            games are played in this process if 1
+        """
+        self.workers = workers or cpu_count() or 1
+        self.args = (map_path, max_ticks, pathfinder, search_budget)
+        self.executor: ProcessPoolExecutor | None = None
+        # Map of the games played in this process, loaded on the first one
+        self.shared: tuple | None = None
+        if self.workers > 1:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=self.args)
+
+    def evaluate(self, layouts: list[list[Build_step]], seeds: list[int],
+                 deadline: float = None) -> list[Layout_stats]:
+        """
+        Plays every layout once with each seed. Every layout meets the same
+        seeds, so the same heroes.
+
+        :param layouts: build orders, see layout_steps for layouts of buildings
+        :param deadline: perf_counter time after which no game is started,
+            the games already running still finish. The stats of a layout
+            then count fewer games than there are seeds.
+        """
+        # The games of a layout follow each other, so that a chunk sent to a
+        # worker mostly pickles its layout once
+        seeds = list(seeds)
+        games = [(i, steps, seed) for i, steps in enumerate(layouts) for seed in seeds]
+        outcomes: list[tuple | None] = [None] * len(games)
+        if self.executor is None or len(games) < 2:
+            if self.shared is None:
+                self.shared = shared_state(*self.args)
+            for k, game in enumerate(games):
+                if deadline is not None and perf_counter() >= deadline:
+                    break
+                outcomes[k] = play(game, self.shared)
+        else:
+            self.play_chunks(games, outcomes, deadline)
+        res = [Layout_stats(steps) for steps in layouts]
+        # Added in the order of the seeds, whatever the order the games ended in
+        for outcome in outcomes:
+            if outcome is not None:
+                i, *outcome = outcome
+                res[i].add(*outcome)
+        return res
+
+    def play_chunks(self, games: list[tuple], outcomes: list[tuple | None], deadline: float | None):
+        """
+        Plays games over the workers, a chunk at a time, and fills outcomes.
+        With a deadline, the games go one by one and a worker only gets its
+        next one once it is done, so that none starts after the deadline.
+        """
+        # Otherwise a few chunks per worker, so that the slow games are spread
+        # out, and two of them waiting for each worker
+        chunksize = 1 if deadline is not None else max(1, len(games) // (self.workers * 4))
+        queued = self.workers if deadline is not None else 2 * self.workers
+        starts = iter(range(0, len(games), chunksize))
+        running = {}
+        while True:
+            while len(running) < queued and (deadline is None or perf_counter() < deadline):
+                start = next(starts, None)
+                if start is None:
+                    break
+                running[self.executor.submit(play_chunk, games[start:start + chunksize])] = start
+            if not running:
+                return
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                start = running.pop(future)
+                for k, outcome in enumerate(future.result()):
+                    outcomes[start + k] = outcome
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def evaluate(map_path: str, layouts: list[list[Build_step]], seeds: list[int], workers: int = None,
+             max_ticks: int = MAX_TICKS, pathfinder: str = FLOW_FIELDS,
+             search_budget: int = None) -> list[Layout_stats]:
+    """
+    Plays every layout once with each seed, spreading the games over
+    processes, see Evaluator
+    """
+    workers = min(workers or cpu_count() or 1, len(layouts) * len(seeds)) or 1
+    with Evaluator(map_path, workers, max_ticks, pathfinder, search_budget) as evaluator:
+        return evaluator.evaluate(layouts, seeds)
@@ -0,0 +1,251 @@
+"""
+Searches the build order defending a level best, playing the candidates
+with the headless runner. Run from the root of the repository with:
+    python -m src.sim.optimize classic.map --seconds 60 --out plan.txt
+"""
+from argparse import ArgumentParser
+from os.path import isfile, join
+from random import Random
+from time import perf_counter
+from typing import Callable
+from ..core.consts import BASE_GOLD, MONEY_PER_WAVE, MAPS_PATH
+from ..core.game_instance import Game_instance
+from ..core.level import Level_template, import_map
+from ..core.pathfinders import PATHFINDERS, FLOW_FIELDS, AUTO
+from ..core.utils_types import Pos
+from .build_order import Build_step, BUILDINGS, PLACE, UPGRADE, DELETE, import_build_order, format_build_order
+from .evaluate import Evaluator, Layout_stats
+from .runner import MAX_TICKS
+
+BEAM_WIDTH = 4
+# Children drawn from each build order of the beam on every generation
+BRANCHING = 6
+NB_SEEDS = 4
+# Chance that a child drops a step of its parent instead of adding one
+DROP_RATE = 0.2
+
+
+def fitness(stats: Layout_stats) -> tuple[float, float, float, float]:
+    """
+    Orders the outcomes of the build orders: the wins first, then the waves
+    gone through, the jewels kept and the ticks the treasure held
+    """
+    games = stats.games
+    if not games:
+        # Below every build order played
+        return 0.0, 0.0, float("-inf"), 0.0
+    waves = sum(len(w) for w in stats.wave_scores) / games
+    return stats.win_rate(), waves, -stats.mean_jewels_stolen(), stats.ticks / games
+
+
+class Plan_space():
+    """
+    The build orders a level allows: the cells each building can be placed
+    on, and the gold each building phase has once its steps are paid for
+    """
+
+    def __init__(self, template: Level_template):
+        game = Game_instance(template, seed=0)
+        self.nb_waves = len(template.waves)
+        cells = [Pos(x, y) for x in range(len(game.grid)) for y in range(len(game.grid[0]))]
+        self.cells = {name: [p for p in cells if game.can_place(b, p)] for name, b in BUILDINGS.items()}
+
+    def spare(self, steps: tuple[Build_step, ...]) -> list[int] | None:
+        """
+        Returns the gold a new step may cost before each wave without making
+        a later step wait, None if steps cannot be done
+        """
+        spent = [0] * self.nb_waves
+        levels: dict[Pos, tuple[str, int]] = {}
+        for s in steps:
+            wave = min(s.wave, self.nb_waves - 1)
+            if s.action == PLACE:
+                if s.pos in levels:
+                    return None
+                levels[s.pos] = (s.building, 1)
+                spent[wave] += BUILDINGS[s.building].cost[0]
+            elif s.pos not in levels:
+                return None
+            elif s.action == DELETE:
+                # Refunded as Game_instance.delete does
+                name, _ = levels.pop(s.pos)
+                spent[wave] -= BUILDINGS[name].get_construction_cost() // 2
+            else:
+                name, level = levels[s.pos]
+                if level >= len(BUILDINGS[name].cost):
+                    return None
+                levels[s.pos] = (name, level + 1)
+                spent[wave] += BUILDINGS[name].cost[level]
+        res = []
+        total = 0
+        for wave in range(self.nb_waves):
+            total += spent[wave]
+            res.append(BASE_GOLD + wave * MONEY_PER_WAVE - total)
+        # Gold spent before a wave is missing for the ones after it
+        for wave in range(self.nb_waves - 2, -1, -1):
+            res[wave] = min(res[wave], res[wave + 1])
+        return res if min(res) >= 0 else None
+
+    def add(self, steps: tuple[Build_step, ...], rng: Random) -> tuple[Build_step, ...] | None:
+        """
+        Returns steps with a new place or upgrade, mostly before the first
+        waves, None if the step drawn cannot be paid for
+        """
+        spare = self.spare(steps)
+        if spare is None:
+            return None
+        wave = min(rng.randrange(self.nb_waves), rng.randrange(self.nb_waves))
+        # After the steps of the same wave, as apply_build_order needs
+        i = sum(1 for s in steps if s.wave <= wave)
+        placed = set()
+        for s in steps[:i]:
+            if s.action == PLACE:
+                placed.add(s.pos)
+            elif s.action == DELETE:
+                placed.discard(s.pos)
+        placed = sorted(placed)
+        if placed and rng.random() < 1 / 3:
+            step = Build_step(wave, UPGRADE, rng.choice(placed))
+        else:
+            affordable = [name for name, b in BUILDINGS.items() if b.cost[0] <= spare[wave] and self.cells[name]]
+            if not affordable:
+                return None
+            name = rng.choice(affordable)
+            step = Build_step(wave, PLACE, rng.choice(self.cells[name]), name)
+        res = steps[:i] + (step,) + steps[i:]
+        return res if self.spare(res) is not None else None
+
+    def drop(self, steps: tuple[Build_step, ...], rng: Random) -> tuple[Build_step, ...] | None:
+        """
+        Returns steps without one of them, and without the other steps of the
+        cell of the building it placed, None if the steps left cannot be done
+        """
+        step = rng.choice(steps)
+        if step.action == PLACE:
+            return tuple(s for s in steps if s.pos != step.pos)
+        i = steps.index(step)
+        # Without a delete, the gold it refunded or its cell may be missing
+        res = steps[:i] + steps[i + 1:]
+        return res if self.spare(res) is not None else None
+
+    def children(self, steps: tuple[Build_step, ...], rng: Random, n: int) -> list[tuple[Build_step, ...]]:
+        res = []
+        for _ in range(4 * n):
+            if len(res) == n:
+                break
+            child = self.drop(steps, rng) if steps and rng.random() < DROP_RATE else self.add(steps, rng)
+            if child is not None and child not in res:
+                res.append(child)
+        return res
+
+
+class Search_result():
+    __slots__ = ("steps", "stats", "evaluations", "cache_hits", "generations", "seconds")
+
+    def __init__(self, steps: list[Build_step], stats: Layout_stats, evaluations: int, cache_hits: int,
+                 generations: int, seconds: float):
+        self.steps = steps
+        self.stats = stats
+        # Build orders played, and the ones met again and not played twice
+        self.evaluations = evaluations
+        self.cache_hits = cache_hits
+        self.generations = generations
+        # Time the search took, over its budget by the games running then
+        self.seconds = seconds
+
+
+def optimize(map_path: str, seconds: float, start: list[Build_step] = (), nb_seeds: int = NB_SEEDS,
+             workers: int = None, width: int = BEAM_WIDTH, branching: int = BRANCHING, seed: int = 0,
+             max_ticks: int = MAX_TICKS, pathfinder: str = FLOW_FIELDS, search_budget: int = None,
+             progress: Callable[[int, Layout_stats], None] = None) -> Search_result:
+    """
+    Beam search over the build orders of a level: each generation draws
+    children of the best build orders by adding or dropping a step, plays
+    the new ones over the workers with the same seeds, and keeps the best
+    ones. Build orders met again are not played twice.
+
+    :param seconds: time after which no game is started, the children whose
+        games did not all finish by then are left out. Games running at
+        that time still finish, so the search may last up to one chunk of
+        games longer.
+    :param start: build order the search starts from
+    :param nb_seeds: games played by each build order, seeded from 0
+    :param seed: seed of the search itself
+    :param progress: called with the number of each generation and the
+        stats of the best build order after it
+    """
+    t = perf_counter()
+    deadline = t + seconds
+    space = Plan_space(import_map(map_path))
+    rng = Random(seed)
+    seeds = range(nb_seeds)
+    cache: dict[tuple[Build_step, ...], Layout_stats] = {}
+    cache_hits = 0
+    generations = 0
+    with Evaluator(map_path, workers, max_ticks, pathfinder, search_budget) as evaluator:
+        beam = [tuple(start)]
+        cache[beam[0]] = evaluator.evaluate(beam, seeds)[0]
+        while perf_counter() < deadline:
+            children = []
+            for steps in beam:
+                for child in space.children(steps, rng, branching):
+                    if child in cache:
+                        cache_hits += 1
+                    elif child not in children:
+                        children.append(child)
+            if not children:
+                break
+            played = []
+            for child, stats in zip(children, evaluator.evaluate(children, seeds, deadline)):
+                if stats.games == len(seeds):
+                    cache[child] = stats
+                    played.append(child)
+            if not played:
+                break
+            beam = sorted(beam + played, key=lambda s: fitness(cache[s]), reverse=True)[:width]
+            generations += 1
+            if progress is not None:
+                progress(generations, cache[beam[0]])
+    return Search_result(list(beam[0]), cache[beam[0]], len(cache), cache_hits, generations, perf_counter() - t)
+
+
+def main():
+    parser = ArgumentParser(prog="python -m src.sim.optimize", description="Searches a build order for a level.")
+    parser.add_argument("map", help=f"map file, or name of a map of {MAPS_PATH}")
+    parser.add_argument("-t", "--seconds", type=float, default=60,
+                        help="time budget of the search, the games running when it is over still finish")
+    parser.add_argument("-b", "--build-order", help="build order the search starts from")
+    parser.add_argument("-o", "--out", help="file the best build order is written to")
+    parser.add_argument("-n", "--games", type=int, default=NB_SEEDS, help="games played by each build order")
+    parser.add_argument("-w", "--workers", type=int, help="number of processes, all the cores by default")
+    parser.add_argument("--width", type=int, default=BEAM_WIDTH)
+    parser.add_argument("--branching", type=int, default=BRANCHING)
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the search")
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS)
+    parser.add_argument("--pathfinder", default=FLOW_FIELDS, choices=[FLOW_FIELDS, AUTO, *PATHFINDERS])
+    parser.add_argument("--search-budget", type=int)
+    args = parser.parse_args()
+
+    path = args.map if isfile(args.map) else join(MAPS_PATH, args.map)
+    start = import_build_order(args.build_order) if args.build_order else []
+
+    def progress(generation: int, stats: Layout_stats):
+        won, waves, stolen, ticks = fitness(stats)
+        print(f"generation {generation}: won {won:.0%}, {waves:.2f} waves, {-stolen:.2f} jewels stolen, "
+              f"{ticks:.0f} ticks")
+
+    res = optimize(path, args.seconds, start, args.games, args.workers, args.width, args.branching,
+                   args.seed, args.max_ticks, args.pathfinder, args.search_budget, progress)
+    plan = format_build_order(res.steps)
+    print(f"{res.evaluations} build orders played in {res.generations} generations and {res.seconds:.1f}s, "
+          f"{res.cache_hits} met again")
+    print(f"best: won {res.stats.win_rate():.0%}, {res.stats.mean_jewels_stolen():.2f} jewels stolen")
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(plan)
+    else:
+        print(plan, end="")
+
+
+if __name__ == "__main__":
+    main()
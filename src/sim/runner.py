@@ -0,0 +1,64 @@
+from time import perf_counter
+from ..core.level import Level_template
+from ..core.game_instance import Game_instance, GAME_PHASE
+from ..core.pathfinders import FLOW_FIELDS
+from .build_order import Build_step, apply_build_order
+
+# Games still running after this many ticks are stopped, as lost
+MAX_TICKS = 100000
+
+
+class Sim_result():
+    """
+    Outcome of a game played without waiting between its ticks
+    """
+    __slots__ = ("seed", "won", "finished", "score", "jewels_left", "jewels_stolen", "waves",
+                 "wave_scores", "ticks", "seconds", "dropped")
+
+    def __init__(self, game: Game_instance, wave_scores: list[int], ticks: int, seconds: float, dropped: int):
+        self.seed = game.seed
+        self.won = game.won
+        self.finished = game.finished
+        self.score = game.score
+        self.jewels_left = game.treasure.jewels_left
+        self.jewels_stolen = len(game.treasure.stolen)
+        self.waves = game.current_wave
+        # Score when each wave was over
+        self.wave_scores = wave_scores
+        self.ticks = ticks
+        self.seconds = seconds
+        # Steps of the build order that could not be done
+        self.dropped = dropped
+
+    def ticks_per_second(self) -> float:
+        return self.ticks / self.seconds if self.seconds > 0 else float("inf")
+
+
+def simulate(template: Level_template, steps: list[Build_step] = (), seed: int = None,
+             max_ticks: int = MAX_TICKS, pathfinder: str = FLOW_FIELDS, search_budget: int = None) -> Sim_result:
+    """
+    Plays a whole level as fast as possible: the building phases end as
+    soon as the steps of the build order for the next wave are done.
+
+    :param steps: build order, see build_order.parse_build_order
+    :param seed: seed of the random choices of the game, drawn if not given
+    :param max_ticks: number of ticks after which the game is stopped
+    """
+    game = Game_instance(template, pathfinder, search_budget, seed)
+    steps = list(steps)
+    dropped = 0
+    wave_scores = []
+    ticks = 0
+    t = perf_counter()
+    while not game.finished and ticks < max_ticks:
+        if game.state == GAME_PHASE.BUILDING_PHASE:
+            if game.current_wave > len(wave_scores):
+                wave_scores.append(game.score)
+            steps, n = apply_build_order(game, steps)
+            dropped += n
+            game.time_until_next_wave = 0
+        game.update()
+        ticks += 1
+    if game.finished and game.current_wave > len(wave_scores):
+        wave_scores.append(game.score)
+    return Sim_result(game, wave_scores, ticks, perf_counter() - t, dropped)
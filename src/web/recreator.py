@@ -17,7 +17,9 @@ from ..core.utils_types import Pos
 
 
 def dict_to_instance(d):
-    res = Game_instance(Level_template("0b01", None, None, None, None))
+    res = Game_instance(Level_template("0b01", None, None, None, None), d.get("pathfinder", FLOW_FIELDS),
+                        d.get("search_budget"), d.get("seed"))
+    res.tick = d.get("tick", 0)
     res.buildings = [dict_to_building(x) for x in d["buildings"]]
     res.current_wave = d["current_wave"]
     res.finished = d["finished"]
@@ -47,6 +49,7 @@ def dict_to_instance(d):
             d_res[dict_to_constr_ent(X[0])] = X[1]
         w_res.append(d_res)
     res.template.waves = w_res
+    res.reindex()
     return res
 
 
@@ -82,6 +85,8 @@ def dict_to_building(dict) -> Building:
 
     new_tower.level = dict["level"]
     new_tower.dead = dict["dead"]
+    if isinstance(new_tower, Tower):
+        new_tower.policy = dict.get("policy", new_tower.policy)
 
     return new_tower
 
@@ -143,7 +148,8 @@ def dict_to_entity(dict) -> Entity:
     new_entity.clock = dict["clock"]
     new_entity.has_jewel = dict["has_jewel"]
     new_entity.home = Pos(dict["home"][0], dict["home"][1])
-    new_entity.set_ai(num_to_ai(dict["ai"]))
+    # Restored as is, set_ai may draw another strategy
+    new_entity.ai = num_to_ai(dict["ai"])
 
     return new_entity
 
@@ -174,6 +174,7 @@ export function update_with_tick(st, next_i){
     st.time_until_next_wave = nexts[next_i].time_until_next_wave
     st.current_wave = nexts[next_i].current_wave
     st.gold = nexts[next_i].gold
+    st.tick = nexts[next_i].tick
     return st
 }
 
@@ -9,6 +9,7 @@ from ..core.entity import STRATS
 
 
 def to_dict(game: Game_instance):
+    game.sync_clocks()
     gold = game.gold
     score = game.score
     if game.state == GAME_PHASE.BUILDING_PHASE:
@@ -46,11 +47,16 @@ def to_dict(game: Game_instance):
         "waves": wave_res,
         "current_wave": game.current_wave,
         "entrance": (game.template.entrance.x, game.template.entrance.y),
-        "t_pos": (game.treasure.pos.x, game.treasure.pos.y)
+        "t_pos": (game.treasure.pos.x, game.treasure.pos.y),
+        "pathfinder": game.pathfinder,
+        "search_budget": game.search_budget,
+        "seed": game.seed,
+        "tick": game.tick
     }
 
 
 def only_change(game: Game_instance):
+    game.sync_clocks()
     monsters = [entity_to_dict(m) for m in game.monsters]
     heros = [entity_to_dict(h) for h in game.heros]
     treasure = [jewel_to_dict(j) for j in game.treasure.jewels]
@@ -70,13 +76,14 @@ def only_change(game: Game_instance):
         "finished": game.finished,
         "won": game.won,
         "current_wave": game.current_wave,
-        "time_until_next_wave": game.time_until_next_wave
+        "time_until_next_wave": game.time_until_next_wave,
+        "tick": game.tick
     }
 
 
 def temp_entity_to_dict(ent):
     # Handle both entity instances and entity classes
-    name = ent.name if hasattr(ent, 'name') else (ent.__name__ if isinstance(ent, type) else str(ent))
+    name = ent.__name__ if isinstance(ent, type) else ent.name
     return {
         "name": name
     }
@@ -119,6 +126,7 @@ def building_to_dict(building):
             "dead": building.dead,
             "hp": building.hp,
             "maxhp": building.maxhp,
+            "policy": building.policy,
         }
     else:
         return {
@@ -130,6 +138,13 @@ def building_to_dict(building):
         }
 
 
+def catalog_to_dict(building):
+    """
+    A building offered to place or to upgrade, with the costs of its levels
+    """
+    return building_to_dict(building) | {"cost": building.cost}
+
+
 def jewel_to_dict(jewel):
     return {
         "position": (jewel.pos.x, jewel.pos.y),
@@ -0,0 +1,398 @@
+import unittest
+from src.core.utils_types import Pos
+from src.core.tiles import ALL_TILES
+from src.core.level import Level_template
+from src.core.game_instance import Game_instance, GAME_PHASE
+import random
+from src.core.all_entities import Rat, Paladin, Clod
+from src.core.entity import STRATS
+from src.core.buildings.all_towers import ArcherTower, PlaceableWall
+from src.core.buildings.all_traps import ExplosiveTrap, Pitfall
+from src.core.spatial_index import make_index
+
+
+def make_level(rows: list[str], waves=None) -> Level_template:
+    grid = []
+    entrance = Pos(-1, -1)
+    treasure = Pos(-1, -1)
+    for i, row in enumerate(rows):
+        grid_row = []
+        for j, c in enumerate(row):
+            if c == "E":
+                entrance = Pos(i, j)
+            if c == "T":
+                treasure = Pos(i, j)
+            grid_row.append(next(t for t in ALL_TILES if t.ascii == c))
+        grid.append(grid_row)
+    return Level_template("test", grid, waves if waves is not None else [{Rat: 1}], entrance, treasure)
+
+
+ROWS = [
+    "##########",
+    "#E.......#",
+    "#OOOOOOO.#",
+    "#........#",
+    "#.OOOOOOO#",
+    "#.......T#",
+    "##########",
+]
+
+
+def start_fight(game: Game_instance):
+    game.time_until_next_wave = 0
+    game.update()
+    game.heros_left_to_spawn = []
+
+
+class TestPathCache(unittest.TestCase):
+    """Test suite for the paths cached by the heroes"""
+
+    def setUp(self):
+        self.game = Game_instance(make_level(ROWS))
+        start_fight(self.game)
+        self.hero = Paladin()
+        self.game.add_hero(self.hero)
+        self.calls = 0
+        plan = self.game.get_path_ent
+
+        def counting_plan(ent, stats=None):
+            self.calls += 1
+            return plan(ent, stats)
+        self.game.get_path_ent = counting_plan
+
+    def test_path_reused(self):
+        """Test that a hero doesn't replan while nothing changes"""
+        for _ in range(10):
+            self.game.update()
+        self.assertEqual(self.calls, 1)
+        self.assertNotEqual(self.hero.position, self.game.template.entrance)
+
+    def test_replan_after_place(self):
+        """Test that placing a building makes the heroes replan"""
+        self.game.set_clock(self.hero, 0)
+        self.game.update()
+        version = self.game.layout_version
+        self.game.place(PlaceableWall(Pos(-1, -1)), Pos(3, 4))
+        self.assertGreater(self.game.layout_version, version)
+        self.game.set_clock(self.hero, 0)
+        self.game.update()
+        self.assertEqual(self.calls, 2)
+
+    def test_replan_after_delete(self):
+        """Test that deleting a building makes the heroes replan"""
+        self.game.place(ArcherTower(Pos(-1, -1)), Pos(2, 3))
+        self.game.update()
+        self.game.set_clock(self.hero, 0)
+        self.game.update()
+        calls = self.calls
+        self.game.delete(next(iter(self.game.buildings)))
+        self.assertEqual(len(self.game.buildings), 0)
+        self.game.set_clock(self.hero, 0)
+        self.game.update()
+        self.assertEqual(self.calls, calls + 1)
+
+    def test_replan_after_last_jewel(self):
+        """Test that the heroes head to the towers once the last jewel is taken"""
+        tower = Pos(4, 2)
+        self.game.place(ArcherTower(Pos(-1, -1)), tower)
+        for j in self.game.treasure.jewels[1:]:
+            j.present = False
+        self.game.treasure.reindex()
+        other = Paladin()
+        self.game.add_hero(other)
+        for hero, p in [(self.hero, Pos(5, 7)), (other, Pos(1, 8))]:
+            hero.set_ai(STRATS.RUNNER)
+            self.game.move_entity(hero, p)
+            self.game.set_clock(hero, 0)
+        # The other hero replans on the tick the last jewel is taken
+        self.game.update()
+        self.assertTrue(self.hero.has_jewel)
+        self.assertEqual(self.game.get_goals(other), [tower])
+        for _ in range(other.get_speed() + 1):
+            self.game.update()
+        self.assertEqual(other.path[:1], [tower])
+
+
+class TestScheduler(unittest.TestCase):
+    """Test suite for the heroes waking up on the tick they act on"""
+
+    def setUp(self):
+        self.game = Game_instance(make_level(ROWS))
+        start_fight(self.game)
+        self.hero = Paladin()
+        self.game.add_hero(self.hero)
+        self.steps = []
+        next_step = self.game.get_next_step
+
+        def counting_step(ent):
+            self.steps.append(self.game.wheel.tick)
+            return next_step(ent)
+        self.game.get_next_step = counting_step
+
+    def test_acts_every_speed_ticks(self):
+        """Test that a hero is only visited on the ticks it moves"""
+        speed = self.hero.get_speed()
+        start = self.game.wheel.tick
+        for _ in range(4 * (speed + 1)):
+            self.game.update()
+        self.assertEqual(self.steps, [start + speed + i * (speed + 1) for i in range(len(self.steps))])
+        self.assertEqual(len(self.steps), 4)
+
+    def test_sync_clocks(self):
+        """Test that saved clocks count the ticks left before moving"""
+        self.game.update()
+        self.game.sync_clocks()
+        self.assertEqual(self.hero.clock, self.hero.get_speed() - 1)
+        self.game.set_clock(self.hero, 0)
+        self.game.update()
+        self.assertEqual(len(self.steps), 1)
+
+
+class TestPathStats(unittest.TestCase):
+    """Test suite for the pathfinding instrumentation"""
+
+    def setUp(self):
+        self.game = Game_instance(make_level(ROWS))
+        start_fight(self.game)
+        self.hero = Paladin()
+        self.game.add_hero(self.hero)
+        self.game.set_clock(self.hero, 0)
+
+    def test_disabled_by_default(self):
+        """Test that nothing is recorded unless enabled"""
+        self.game.update()
+        self.assertIsNone(self.game.path_stats)
+
+    def test_recorded_by_kind(self):
+        """Test that plans are recorded by entity class and strategy"""
+        self.game.enable_path_stats()
+        self.game.update()
+        counters = self.game.path_stats.totals[("Paladin", self.hero.get_ai().name)]
+        self.assertEqual(counters.calls, 1)
+        self.assertGreater(counters.expanded, 0)
+        self.assertGreater(counters.path_length, 0)
+        self.assertEqual(len(self.game.path_stats.ticks[-1]), 1)
+        self.assertEqual(len(self.game.path_stats.report()), 2)
+
+        # Ticks without any plan are empty
+        self.game.update()
+        self.assertEqual(self.game.path_stats.ticks[-1], {})
+        self.assertEqual(len(self.game.path_stats.to_dict()["ticks"]), 3)
+
+
+class TestOccupancy(unittest.TestCase):
+    """Test suite for the occupancy index"""
+
+    def setUp(self):
+        self.game = Game_instance(make_level(ROWS))
+        start_fight(self.game)
+
+    def assert_consistent(self):
+        occupancy = self.game.occupancy
+        self.assertEqual(sum(len(x) for x in occupancy.heros.values()), len(self.game.heros))
+        for h in self.game.heros:
+            self.assertIn(h, occupancy.heros[h.position])
+        self.assertEqual(sum(len(x) for x in occupancy.buildings.values()), len(self.game.buildings))
+        for b in self.game.buildings:
+            self.assertIn(b, occupancy.buildings[b.pos])
+
+    def test_heroes_share_the_entrance(self):
+        """Test that several heroes can stand on the same cell"""
+        a = Paladin()
+        b = Rat()
+        self.game.add_hero(a)
+        self.game.add_hero(b)
+        self.assertEqual(self.game.occupancy.heros[self.game.template.entrance], [a, b])
+        self.assertIs(self.game.get_tile_info(self.game.template.entrance)["hero"], a)
+
+    def test_follows_the_game(self):
+        """Test that moves, deaths, placements and removals are indexed"""
+        self.game.place(ArcherTower(Pos(-1, -1)), Pos(2, 3))
+        self.game.place(PlaceableWall(Pos(-1, -1)), Pos(4, 4))
+        self.assertTrue(self.game.is_occupied(Pos(2, 3)))
+        for _ in range(3):
+            self.game.add_hero(Paladin())
+        for _ in range(50):
+            self.game.update()
+            self.assert_consistent()
+        self.game.delete(next(iter(self.game.buildings)))
+        self.assert_consistent()
+        hero = Paladin()
+        self.game.add_hero(hero)
+        hero.take_damage(10 ** 6)
+        self.game.update()
+        self.assertNotIn(hero, self.game.occupancy.heros.get(hero.position, []))
+        self.assert_consistent()
+
+    def test_reindex(self):
+        """Test that lists filled directly are indexed by reindex"""
+        hero = Paladin()
+        hero.position = Pos(3, 3)
+        self.game.heros = [hero]
+        self.game.buildings = [ArcherTower(Pos(1, 2))]
+        self.game.reindex()
+        self.assertEqual(self.game.occupancy.heros, {Pos(3, 3): [hero]})
+        self.assertTrue(self.game.is_occupied(Pos(1, 2)))
+        self.assertEqual(sorted(self.game.get_blocked(Rat())), [Pos(1, 2), Pos(3, 3)])
+
+
+class TestTraps(unittest.TestCase):
+    """Test suite for the traps going off when a hero enters their cell"""
+
+    def setUp(self):
+        self.game = Game_instance(make_level(ROWS))
+        start_fight(self.game)
+
+    def test_fires_on_enter(self):
+        """Test that a trap only goes off when a hero walks onto it"""
+        self.game.place(Pitfall(Pos(-1, -1)), Pos(1, 3))
+        trap = next(iter(self.game.buildings))
+        hero = Paladin()
+        self.game.add_hero(hero)
+        self.assertEqual(self.game.update(), [])
+        self.game.move_entity(hero, Pos(1, 2))
+        self.assertFalse(hero.dead)
+        self.game.move_entity(hero, Pos(1, 3))
+        self.assertTrue(hero.dead)
+        self.assertEqual(self.game.activated_traps, [trap])
+        self.assertEqual(self.game.buildings, [])
+        self.assertNotIn(Pos(1, 3), self.game.occupancy.traps)
+
+    def test_area_of_effect(self):
+        """Test that an explosive trap hits the heroes around it"""
+        self.game.place(ExplosiveTrap(Pos(-1, -1)), Pos(1, 4))
+        near = Rat()
+        far = Rat()
+        for hero, p in [(near, Pos(1, 2)), (far, Pos(3, 8))]:
+            self.game.add_hero(hero)
+            self.game.move_entity(hero, p)
+        hero = Rat()
+        self.game.add_hero(hero)
+        self.game.move_entity(hero, Pos(1, 4))
+        self.assertTrue(hero.dead)
+        self.assertTrue(near.dead)
+        self.assertFalse(far.dead)
+
+    def test_area_of_effect_indexed(self):
+        """Test that an explosion finds the heroes that moved since the index was built"""
+        game = Game_instance(make_level(["#" * 30, "#E" + "." * 26 + "T#", "#" + "." * 28 + "#", "#" * 30]))
+        start_fight(game)
+        game.place(ExplosiveTrap(Pos(-1, -1)), Pos(1, 4))
+        heroes = [Rat() for _ in range(20)]
+        for i, hero in enumerate(heroes):
+            game.add_hero(hero)
+            game.move_entity(hero, Pos(1 + i % 2, 12 + i // 2))
+        game.hero_index = make_index(game.heros)
+        self.assertIsNotNone(game.hero_index)
+        near = [Pos(x, y) for x in (1, 2) for y in range(1, 8) if Pos(x, y) != Pos(1, 4)]
+        for hero, p in zip(heroes[1:], near):
+            game.move_entity(hero, p)
+        game.move_entity(heroes[0], Pos(1, 4))
+        self.assertEqual([h for h in heroes if not h.dead], heroes[len(near) + 1:])
+
+    def test_mass_death(self):
+        """Test that the heroes killed by an explosion are all removed"""
+        self.game.place(ExplosiveTrap(Pos(-1, -1)), Pos(1, 4))
+        survivor = Rat()
+        self.game.add_hero(survivor)
+        self.game.move_entity(survivor, Pos(3, 8))
+        heroes = [Rat() for _ in range(30)]
+        for hero in heroes:
+            self.game.add_hero(hero)
+            self.game.move_entity(hero, Pos(1, 2))
+        self.game.treasure.take(self.game.treasure.jewels[0], heroes[3])
+        self.game.move_entity(heroes[0], Pos(1, 4))
+        self.game.update()
+        self.assertEqual(self.game.heros, [survivor])
+        self.assertEqual(list(self.game.occupancy.heros), [survivor.position])
+        self.assertFalse(self.game.treasure.jewels[0].carried)
+
+    def test_returned_by_update(self):
+        """Test that the traps that went off during a tick are returned"""
+        self.game.place(Pitfall(Pos(-1, -1)), Pos(1, 2))
+        hero = Paladin()
+        self.game.add_hero(hero)
+        hero.set_ai(STRATS.RUNNER)
+        activated = []
+        for _ in range(20):
+            activated += self.game.update()
+        self.assertTrue(any(isinstance(b, Pitfall) for b in activated))
+
+
+class TestGame(unittest.TestCase):
+    """Test suite for whole games"""
+
+    def test_pathfinder_backends(self):
+        """Test that heroes reach the treasure whatever the pathfinder"""
+        for pathfinder in ["astar", "bidirectional", "jps", "auto"]:
+            game = Game_instance(make_level(ROWS, [{Rat: 5}]), pathfinder)
+            game.time_until_next_wave = 0
+            ticks = 0
+            while not game.finished and ticks < 2000:
+                game.update()
+                ticks += 1
+            self.assertTrue(game.finished, pathfinder)
+            self.assertFalse(game.won, pathfinder)
+
+    def test_budgeted_searches(self):
+        """Test that heroes with a tiny search budget still reach the treasure"""
+        game = Game_instance(make_level(ROWS, [{Rat: 5}]), search_budget=2)
+        game.time_until_next_wave = 0
+        ticks = 0
+        while not game.finished and ticks < 2000:
+            game.update()
+            ticks += 1
+        self.assertTrue(game.finished)
+        self.assertFalse(game.won)
+
+    def test_unknown_pathfinder(self):
+        """Test that an unknown pathfinder is refused"""
+        with self.assertRaises(ValueError):
+            Game_instance(make_level(ROWS), "dijkstra")
+
+    def test_heroes_reach_the_treasure(self):
+        """Test that an undefended treasure gets stolen"""
+        game = Game_instance(make_level(ROWS, [{Rat: 5}]))
+        game.time_until_next_wave = 0
+        ticks = 0
+        while not game.finished and ticks < 2000:
+            game.update()
+            ticks += 1
+        self.assertTrue(game.finished)
+        self.assertFalse(game.won)
+        self.assertEqual(game.state, GAME_PHASE.FIGHT_PHASE)
+
+
+class TestRandom(unittest.TestCase):
+    """Test suite for the random stream of the games"""
+
+    def spawns(self, seed: int) -> list[tuple[str, STRATS]]:
+        game = Game_instance(make_level(ROWS, [{Rat: 4, Paladin: 4, Clod: 4}]), seed=seed)
+        game.time_until_next_wave = 0
+        for _ in range(80):
+            game.update()
+            # Other users of the random module don't change the game
+            random.random()
+        return [(h.name, h.get_ai()) for h in game.heros]
+
+    def test_same_seed(self):
+        """Test that games with the same seed spawn the same heroes"""
+        self.assertEqual(self.spawns(3), self.spawns(3))
+
+    def test_other_seeds(self):
+        """Test that the seed changes the heroes spawned"""
+        self.assertGreater(len({tuple(self.spawns(seed)) for seed in range(5)}), 1)
+
+    def test_stream_of_a_tick(self):
+        """Test that the numbers drawn only depend on the seed and the tick"""
+        game = Game_instance(make_level(ROWS), seed=5)
+        other = Game_instance(make_level(ROWS), seed=5)
+        game.tick = other.tick = 12
+        game.rng().random()
+        game.tick += 1
+        other.tick += 1
+        self.assertEqual(game.rng().random(), other.rng().random())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,21 @@
 import unittest
+import pickle
+from time import perf_counter
 from core.utils_types import Pos
 from core.entity import Entity
-from core.all_entities import Paladin, Rat
+from core.all_entities import Paladin, Rat, Liar, ALL_ENTITIES
+from core.buildings.all_buildings import ALL_BUILDINGS
 from core.tiles import TILES_TYPES, MAP_TILE_LOOKUP
 from core.buildings.tower import Tower
 from core.buildings.trap import Trap
 from core.treasure import Treasure
-from core.buildings.all_traps import ExplosiveTrap
+from core.buildings.all_traps import ExplosiveTrap, Pitfall
+from core.buildings.all_towers import ArcherTower, ElectricTower
+from core.spatial_index import Bucket_grid, Hero_arrays, make_index, np
+from core.buildings.coverage import Coverage
+from core.scheduler import Timing_wheel
+from core.ordered_set import Ordered_set
+from core.buildings.targeting import Targeting, CLOSEST_TO_TREASURE, JEWEL_CARRIER
 
 
 class TestEntity(unittest.TestCase):
@@ -108,6 +117,48 @@ class TestTreasure(unittest.TestCase):
             self.assertTrue(jewel.present)
             self.assertFalse(jewel.carried)
 
+    def test_carrier_index(self):
+        """Test that a carrier drops exactly the jewels it took"""
+        a = Rat()
+        b = Rat()
+        jewels = self.treasure.jewels
+        self.treasure.take(jewels[0], a)
+        self.treasure.take(jewels[2], a)
+        self.treasure.take(jewels[1], b)
+        self.assertTrue(self.treasure.drop_all(a))
+        self.assertFalse(a.has_jewel)
+        self.assertEqual([j.carried for j in jewels], [False, True, False, False, False])
+        self.assertFalse(self.treasure.drop_all(a))
+        self.treasure.reindex()
+        self.assertEqual(self.treasure.carried, {b: [jewels[1]]})
+
+    def test_state_index(self):
+        """Test the available, free and stolen jewels through a theft"""
+        treasure = Treasure(Pos(15, 15), 8)
+        rat = Rat()
+        rat.home = Pos(0, 0)
+        rat.position = Pos(15, 15)
+        self.assertIs(treasure.free_jewel_at(Pos(15, 15)), treasure.jewels[0])
+        treasure.take(treasure.jewels[0], rat)
+        treasure.take(treasure.free_jewel_at(Pos(15, 15)), rat)
+        self.assertIs(treasure.free_jewel_at(Pos(15, 15)), treasure.jewels[2])
+
+        rat.position = Pos(3, 4)
+        treasure.update()
+        self.assertEqual(treasure.jewels_left, 6)
+        treasure.drop_all(rat)
+        self.assertEqual(sorted(treasure.available_cells()), [Pos(3, 4), Pos(15, 15)])
+        self.assertIs(treasure.free_jewel_at(Pos(3, 4)), treasure.jewels[0])
+
+        for j in treasure.jewels:
+            treasure.take(j, rat)
+        rat.position = rat.home
+        self.assertTrue(treasure.update())
+        self.assertTrue(rat.dead)
+        self.assertEqual(treasure.jewels_left, 0)
+        self.assertTrue(treasure.game_lost())
+        self.assertEqual(treasure.available_cells(), [])
+
 
 class TestPosition(unittest.TestCase):
     """Test suite for Pos class"""
@@ -141,6 +192,34 @@ class TestPosition(unittest.TestCase):
         self.assertEqual(pos1, pos2)
         self.assertNotEqual(pos1, pos3)
 
+    def test_position_value_type(self):
+        """Test hashing, ordering, interning and immutability"""
+        far = Pos(-3, 1000)
+        self.assertEqual(hash(far), hash(Pos(-3, 1000)))
+        self.assertEqual({Pos(1, 2): 1}[Pos(1, 2)], 1)
+        self.assertIs(Pos(4, 7), Pos(4, 7))
+        self.assertEqual(sorted([Pos(2, 0), Pos(1, 5), Pos(1, 3)]), [Pos(1, 3), Pos(1, 5), Pos(2, 0)])
+        with self.assertRaises(AttributeError):
+            far.x = 2
+        self.assertEqual(pickle.loads(pickle.dumps(far)), far)
+
+    def test_position_flat_index(self):
+        """Test the conversion to and from flat cell indexes"""
+        self.assertEqual(Pos(3, 4).to_index(10), 34)
+        self.assertIs(Pos.from_index(34, 10), Pos(3, 4))
+
+
+class TestSlots(unittest.TestCase):
+    """Test suite for the compact layouts of the model classes"""
+
+    def test_no_instance_dict(self):
+        """Test that the model objects keep no __dict__"""
+        objects = [cls() for cls in ALL_ENTITIES]
+        objects += [type(b)(Pos(1, 1)) for b in ALL_BUILDINGS]
+        objects += [Treasure(Pos(0, 0)).jewels[0], MAP_TILE_LOOKUP[TILES_TYPES.BASIC_FLOOR]]
+        for x in objects:
+            self.assertFalse(hasattr(x, "__dict__"), type(x).__name__)
+
 
 class TestTiles(unittest.TestCase):
     """Test suite for Tile functionality"""
@@ -205,5 +284,278 @@ class TestGameMechanics(unittest.TestCase):
         self.assertEqual(enemy.get_hp(), initial_hp - tower_damage - trap_damage)
 
 
+def make_heroes(nb: int = 40) -> list[Entity]:
+    heroes = []
+    for i in range(nb):
+        hero = Paladin()
+        hero.position = Pos((i * 7) % 13, (i * 5) % 11)
+        hero.hp = 100 + (i * 37) % 50
+        heroes.append(hero)
+    return heroes
+
+
+class TestBucketGrid(unittest.TestCase):
+    """Test suite for the spatial index of the heroes"""
+
+    def test_in_range(self):
+        """Test that queries return the heroes in range, in list order"""
+        heroes = make_heroes()
+        index = Bucket_grid(heroes, 3)
+        for center in (Pos(0, 0), Pos(6, 5), Pos(12, 10), Pos(-3, 4)):
+            for r in (0, 1, 4, 9):
+                expected = [h for h in heroes if h.position.dist(center) <= r]
+                self.assertEqual(index.in_range(center, r), expected)
+        self.assertEqual(index.at(Pos(7, 5)), [h for h in heroes if h.position == Pos(7, 5)])
+
+    def test_same_damage_as_scan(self):
+        """Test that buildings deal the same damage with the index"""
+        for cls in (ArcherTower, ElectricTower, ExplosiveTrap, Pitfall):
+            scanned = make_heroes()
+            indexed = make_heroes()
+            a = cls(Pos(7, 5))
+            b = cls(Pos(7, 5))
+            self.assertEqual(a.attack(scanned), b.attack(indexed, Bucket_grid(indexed)))
+            self.assertEqual([h.hp for h in scanned], [h.hp for h in indexed])
+
+    def test_move(self):
+        """Test that the index follows the heroes that move"""
+        heroes = make_heroes()
+        index = Bucket_grid(heroes, 3)
+        for i, hero in enumerate(heroes[::3]):
+            old = hero.position
+            hero.position = Pos((old.x + 5 * i) % 13, (old.y + 3) % 11)
+            index.move(hero, old)
+        for center in (Pos(0, 0), Pos(6, 5), Pos(12, 10)):
+            self.assertEqual(index.in_range(center, 4), [h for h in heroes if h.position.dist(center) <= 4])
+
+    def test_make_index(self):
+        """Test that few heroes are scanned and many are indexed"""
+        self.assertIsNone(make_index(make_heroes(4)))
+        self.assertIsInstance(make_index(make_heroes(40)), Bucket_grid)
+        expected = Bucket_grid if np is None else Hero_arrays
+        self.assertIsInstance(make_index(make_heroes(1000)), expected)
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestHeroArrays(unittest.TestCase):
+    """Test suite for the NumPy arrays indexing the heroes"""
+
+    def test_in_range(self):
+        """Test that queries return the heroes in range, in list order"""
+        heroes = make_heroes()
+        index = Hero_arrays(heroes)
+        for center in (Pos(0, 0), Pos(6, 5), Pos(12, 10), Pos(-3, 4)):
+            for r in (0, 1, 4, 9):
+                expected = [h for h in heroes if h.position.dist(center) <= r]
+                self.assertEqual(index.in_range(center, r), expected)
+        self.assertEqual(index.at(Pos(7, 5)), [h for h in heroes if h.position == Pos(7, 5)])
+
+    def test_same_damage_as_scan(self):
+        """Test that buildings deal the same damage with the arrays"""
+        for cls in (ArcherTower, ElectricTower, ExplosiveTrap, Pitfall):
+            scanned = make_heroes()
+            indexed = make_heroes()
+            a = cls(Pos(7, 5))
+            b = cls(Pos(7, 5))
+            self.assertEqual(a.attack(scanned), b.attack(indexed, Hero_arrays(indexed)))
+            self.assertEqual([h.hp for h in scanned], [h.hp for h in indexed])
+
+    def test_move(self):
+        """Test that the arrays follow the heroes that move"""
+        heroes = make_heroes()
+        index = Hero_arrays(heroes)
+        for i, hero in enumerate(heroes[::3]):
+            old = hero.position
+            hero.position = Pos((old.x + 5 * i) % 13, (old.y + 3) % 11)
+            index.move(hero, old)
+        for center in (Pos(0, 0), Pos(6, 5), Pos(12, 10)):
+            self.assertEqual(index.in_range(center, 4), [h for h in heroes if h.position.dist(center) <= 4])
+
+    def test_ordered_set(self):
+        """Test that the arrays index the heroes of a game like a list"""
+        heroes = make_heroes()
+        index = Hero_arrays(Ordered_set(heroes))
+        self.assertEqual(index.in_range(Pos(6, 5), 4), [h for h in heroes if h.position.dist(Pos(6, 5)) <= 4])
+
+
+class TestOrderedSet(unittest.TestCase):
+    """Test suite for the containers of the game"""
+
+    def test_order(self):
+        """Test that removals keep the order of the remaining objects"""
+        heroes = [Rat() for _ in range(6)]
+        s = Ordered_set(heroes)
+        for h in heroes[1::2]:
+            s.remove(h)
+        s.append(heroes[1])
+        self.assertEqual(s, [heroes[0], heroes[2], heroes[4], heroes[1]])
+        self.assertEqual(len(s), 4)
+        self.assertIn(heroes[4], s)
+        self.assertNotIn(heroes[3], s)
+        self.assertIs(list(s)[-1], heroes[1])
+        self.assertEqual(sorted([heroes[1], heroes[0]], key=s.rank), [heroes[0], heroes[1]])
+
+
+class TestTimingWheel(unittest.TestCase):
+    """Test suite for the scheduler of the entities"""
+
+    def run_wheel(self, wheel: Timing_wheel, ticks: int) -> list[list[Entity]]:
+        res = []
+        for _ in range(ticks):
+            res.append(wheel.due())
+            wheel.advance()
+        return res
+
+    def test_due(self):
+        """Test that entities act on their tick only, in scheduling order"""
+        wheel = Timing_wheel(4)
+        a = Rat()
+        b = Paladin()
+        wheel.schedule(b, 2)
+        wheel.schedule(a, 2)
+        wheel.schedule(Rat(), 9)
+        due = self.run_wheel(wheel, 3)
+        self.assertEqual(due[:2], [[], []])
+        self.assertEqual(sorted(due[2], key=wheel.order.get), [b, a])
+        self.assertEqual(wheel.delay(b), 0)
+
+    def test_far_and_rescheduled(self):
+        """Test delays longer than the wheel and entities rescheduled"""
+        wheel = Timing_wheel(4)
+        far = Rat()
+        moved = Rat()
+        wheel.schedule(far, 9)
+        wheel.schedule(moved, 1)
+        wheel.schedule(moved, 3)
+        self.assertEqual(wheel.delay(far), 9)
+        due = self.run_wheel(wheel, 10)
+        self.assertEqual([i for i, d in enumerate(due) if far in d], [9])
+        self.assertEqual([i for i, d in enumerate(due) if moved in d], [3])
+        wheel.remove(far)
+        wheel.schedule(moved, 4)
+        wheel.schedule(moved, 4)
+        self.assertEqual(self.run_wheel(wheel, 5)[4], [moved])
+
+    def test_crowded_tick(self):
+        """Test that thousands of entities due on one tick are taken once each, quickly"""
+        wheel = Timing_wheel(4)
+        heroes = [Rat() for _ in range(8000)]
+        for h in heroes:
+            wheel.schedule(h, 2)
+        for h in heroes[::2]:
+            wheel.schedule(h, 2)
+        wheel.advance()
+        wheel.advance()
+        t = perf_counter()
+        due = wheel.due()
+        # Comparing each entity with the ones already taken took seconds
+        self.assertLess(perf_counter() - t, 0.5)
+        self.assertEqual(due, heroes)
+
+
+class TestCoverage(unittest.TestCase):
+    """Test suite for the cells covered by the buildings"""
+
+    def setUp(self):
+        floor = MAP_TILE_LOOKUP[TILES_TYPES.BASIC_FLOOR]
+        wall = MAP_TILE_LOOKUP[TILES_TYPES.BASIC_WALL]
+        self.grid = [[wall if (x + y) % 4 == 0 else floor for y in range(12)] for x in range(10)]
+
+    def test_covered_cells(self):
+        """Test that the covered cells are the walkable ones within reach"""
+        tower = ArcherTower(Pos(1, 2))
+        expected = {Pos(x, y) for x in range(10) for y in range(12)
+                    if self.grid[x][y].walkable and Pos(x, y).dist(tower.pos) <= tower.get_range()}
+        self.assertEqual(tower.get_covered_cells(self.grid), expected)
+        self.assertEqual(Pitfall(Pos(3, 3)).get_covered_cells(self.grid), {Pos(3, 3)})
+
+    def test_upgrade_invalidates(self):
+        """Test that upgrading a building recomputes its cells"""
+        tower = ArcherTower(Pos(5, 6))
+        coverage = Coverage()
+        coverage.add(tower, self.grid)
+        before = tower.get_covered_cells(self.grid)
+        tower.upgrade()
+        self.assertIsNone(tower.covered)
+        coverage.refresh(tower, self.grid)
+        after = tower.get_covered_cells(self.grid)
+        self.assertLess(before, after)
+        for p in after:
+            self.assertEqual(coverage.covering(p), [tower])
+
+    def test_danger(self):
+        """Test that the danger of a cell counts the buildings covering it"""
+        coverage = Coverage()
+        a = ArcherTower(Pos(2, 3))
+        b = ElectricTower(Pos(4, 3))
+        coverage.add(a, self.grid)
+        coverage.add(b, self.grid)
+        self.assertEqual(coverage.danger(Pos(3, 3)), 2)
+        coverage.remove(a)
+        self.assertEqual(coverage.danger(Pos(3, 3)), 1)
+        self.assertEqual(coverage.danger(Pos(9, 0)), 0)
+
+
+class TestTargeting(unittest.TestCase):
+    """Test suite for the heaps of heroes in range of the towers"""
+
+    def setUp(self):
+        self.tower = ArcherTower(Pos(5, 5))
+        self.cells = frozenset(Pos(x, y) for x in range(3, 8) for y in range(3, 8))
+        self.targeting = Targeting(Pos(0, 0))
+        self.heroes = make_heroes()
+        for h in self.heroes:
+            self.track(h)
+        self.targeting.add_tower(self.tower, self.cells, self.heroes)
+
+    def track(self, hero: Entity):
+        self.targeting.add_hero(hero, [])
+        hero.on_hp_change = lambda h: self.targeting.changed(h, [self.tower])
+
+    def scan(self, key) -> Entity:
+        return min((h for h in self.heroes if h.position in self.cells), key=key)
+
+    def test_lowest_hp(self):
+        """Test that the target is the one a scan picks, as hit points change"""
+        for _ in range(30):
+            target = self.targeting.target(self.tower)
+            self.assertIs(target, self.scan(lambda h: h.hp))
+            target.take_damage(7)
+
+    def test_leaving_range(self):
+        """Test that heroes out of range or removed are not targeted"""
+        target = self.targeting.target(self.tower)
+        target.position = Pos(20, 20)
+        self.assertIsNot(self.targeting.target(self.tower), target)
+        other = self.targeting.target(self.tower)
+        self.targeting.remove_hero(other)
+        self.assertNotIn(self.targeting.target(self.tower), (target, other))
+
+    def test_policies(self):
+        """Test the closest to the treasure and jewel carrier policies"""
+        self.tower.policy = CLOSEST_TO_TREASURE
+        self.targeting.add_tower(self.tower, self.cells, self.heroes)
+        self.assertIs(self.targeting.target(self.tower), self.scan(lambda h: h.position.dist(Pos(0, 0))))
+        self.tower.policy = JEWEL_CARRIER
+        self.targeting.add_tower(self.tower, self.cells, self.heroes)
+        carrier = max((h for h in self.heroes if h.position in self.cells), key=lambda h: h.hp)
+        carrier.has_jewel = True
+        self.targeting.changed(carrier, [self.tower])
+        self.assertIs(self.targeting.target(self.tower), carrier)
+
+    def test_liar_hook(self):
+        """Test that the liar reports the damage it takes"""
+        liar = Liar()
+        liar.position = Pos(5, 5)
+        self.heroes.append(liar)
+        self.track(liar)
+        self.targeting.changed(liar, [self.tower])
+        liar.take_damage(4 * (liar.hp - 50))
+        self.assertIs(self.targeting.target(self.tower), liar)
+        liar.take_damage(400)
+        self.assertIsNot(self.targeting.target(self.tower), liar)
+        self.assertIs(self.targeting.target(self.tower), self.scan(lambda h: h.hp))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,341 @@
+import unittest
+from core.utils_types import Pos
+from core.tiles import TILES_TYPES, MAP_TILE_LOOKUP
+from core.pathfinding import Astar, Astar_nearest, Anytime_astar, Dstar_lite, weight
+from core.flow_field import Flow_field
+from core.hierarchy import Hpa_graph
+from core.landmarks import Landmarks
+from core.grid_graph import get_graph
+from core.pathfinders import PATHFINDERS, Map_stats
+
+
+FLOOR = MAP_TILE_LOOKUP[TILES_TYPES.BASIC_FLOOR]
+WALL = MAP_TILE_LOOKUP[TILES_TYPES.BASIC_WALL]
+
+
+def make_grid(rows: list[str]):
+    return [[WALL if c == "#" else FLOOR for c in row] for row in rows]
+
+
+def path_cost(grid, path, blocked):
+    return sum(weight(grid[p.x][p.y], p, blocked) for p in path[1:])
+
+
+GRID = make_grid([
+    "........",
+    ".######.",
+    ".#....#.",
+    ".#.##.#.",
+    ".#..#...",
+    ".####.#.",
+    "......#.",
+    "######..",
+])
+
+
+class TestAstar(unittest.TestCase):
+    """Test suite for the A* search"""
+
+    def test_path_ends(self):
+        """Test that the path goes from start to end"""
+        path = Astar(GRID, Pos(0, 0), Pos(2, 2), blocked=[])
+        self.assertEqual(path[0], Pos(0, 0))
+        self.assertEqual(path[-1], Pos(2, 2))
+        for a, b in zip(path, path[1:]):
+            self.assertLessEqual(max(abs(a.x - b.x), abs(a.y - b.y)), 1)
+            self.assertTrue(GRID[b.x][b.y].walkable)
+
+    def test_avoids_blocked(self):
+        """Test that blocked cells are avoided when a detour is cheaper"""
+        grid = make_grid(["...", "...", "..."])
+        path = Astar(grid, Pos(0, 1), Pos(2, 1), blocked=[Pos(1, 1)])
+        self.assertNotIn(Pos(1, 1), path)
+        self.assertEqual(path_cost(grid, path, [Pos(1, 1)]), 2)
+
+    def test_no_path(self):
+        """Test that None is returned when the end can't be reached"""
+        grid = make_grid(["..#..", "..#..", "..#.."])
+        self.assertIsNone(Astar(grid, Pos(0, 0), Pos(0, 4), blocked=[]))
+        self.assertIsNone(Astar(grid, Pos(0, 0), Pos(5, 5), blocked=[]))
+
+    def test_start_is_end(self):
+        """Test the path of an entity already on its goal"""
+        self.assertEqual(Astar(GRID, Pos(0, 0), Pos(0, 0), blocked=[]), [Pos(0, 0)])
+
+    def test_nearest_by_path(self):
+        """Test that the nearest goal is chosen by path, not by distance"""
+        # (0, 2) is the closest by distance but is on the other side of a wall
+        goal, path = Astar_nearest(GRID, Pos(2, 2), [Pos(0, 2), Pos(4, 3)], blocked=[])
+        self.assertEqual(goal, Pos(4, 3))
+        self.assertEqual(path, Astar(GRID, Pos(2, 2), Pos(4, 3), blocked=[]))
+
+    def test_nearest_unreachable(self):
+        """Test that None is returned when no goal can be reached"""
+        grid = make_grid(["..#..", "..#..", "..#.."])
+        self.assertIsNone(Astar_nearest(grid, Pos(0, 0), [Pos(0, 4), Pos(2, 3)], blocked=[]))
+        self.assertIsNone(Astar_nearest(grid, Pos(0, 0), [], blocked=[]))
+
+
+class TestFlowField(unittest.TestCase):
+    """Test suite for the shared flow fields"""
+
+    def test_same_cost_as_astar(self):
+        """Test that following the field costs as much as an A* path"""
+        goal = Pos(2, 2)
+        blocked = [Pos(0, 3), Pos(4, 7)]
+        field = Flow_field(GRID, [goal], blocked=blocked)
+        for x in range(len(GRID)):
+            for y in range(len(GRID[0])):
+                start = Pos(x, y)
+                if not GRID[x][y].walkable:
+                    continue
+                expected = Astar(GRID, start, goal, blocked=blocked)
+                path = field.path(start)
+                self.assertEqual(path[0], start)
+                self.assertEqual(path[-1], goal)
+                self.assertEqual(path_cost(GRID, path, blocked),
+                                 path_cost(GRID, expected, blocked))
+                self.assertEqual(field.dist(start), path_cost(GRID, path, blocked))
+
+    def test_next_step(self):
+        """Test that the next step is the second cell of the path"""
+        field = Flow_field(GRID, [Pos(7, 7)], blocked=[])
+        start = Pos(0, 0)
+        self.assertEqual(field.next_step(start), field.path(start)[1])
+        self.assertIsNone(field.next_step(Pos(7, 7)))
+
+    def test_unreachable(self):
+        """Test that walled off cells have no path"""
+        grid = make_grid(["..#..", "..#..", "..#.."])
+        field = Flow_field(grid, [Pos(0, 0)], blocked=[])
+        self.assertIsNone(field.path(Pos(0, 4)))
+        self.assertIsNone(field.next_step(Pos(0, 4)))
+        self.assertFalse(field.reachable(Pos(0, 4)))
+
+    def test_nearest_of_several_goals(self):
+        """Test that a field with several goals leads to the closest one"""
+        field = Flow_field(GRID, [Pos(0, 7), Pos(6, 0)], blocked=[])
+        self.assertEqual(field.path(Pos(0, 5))[-1], Pos(0, 7))
+        self.assertEqual(field.path(Pos(6, 2))[-1], Pos(6, 0))
+
+
+class TestDstarLite(unittest.TestCase):
+    """Test suite for the incremental search"""
+
+    def cells(self):
+        return [Pos(x, y) for x in range(len(GRID)) for y in range(len(GRID[0])) if GRID[x][y].walkable]
+
+    def test_repair_matches_rebuild(self):
+        """Test that repairing a field gives the distances of a new one"""
+        goals = [Pos(2, 2), Pos(7, 7)]
+        field = Flow_field(GRID, goals, blocked=[Pos(0, 3)])
+        for blocked in ([Pos(0, 3), Pos(4, 7)], [Pos(6, 5), Pos(0, 0)], [], [Pos(3, 0), Pos(6, 1)]):
+            field.set_blocked(blocked)
+            fresh = Flow_field(GRID, goals, blocked=blocked)
+            for p in self.cells():
+                self.assertEqual(field.dist(p), fresh.dist(p))
+
+    def test_focused_search(self):
+        """Test that a search with a start finds a path as cheap as A*"""
+        start = Pos(0, 0)
+        goal = Pos(2, 2)
+        blocked = [Pos(4, 7)]
+        search = Dstar_lite(GRID, [goal], blocked=blocked, start=start)
+        path = search.path(start)
+        self.assertEqual(path[-1], goal)
+        self.assertEqual(path_cost(GRID, path, blocked),
+                         path_cost(GRID, Astar(GRID, start, goal, blocked=blocked), blocked))
+
+        # Walk a few steps, then block the way
+        start = path[3]
+        search.move_start(start)
+        blocked = [Pos(4, 7), Pos(6, 7), Pos(5, 7)]
+        search.set_blocked(blocked)
+        path = search.path(start)
+        self.assertEqual(path_cost(GRID, path, blocked),
+                         path_cost(GRID, Astar(GRID, start, goal, blocked=blocked), blocked))
+
+
+class TestHierarchy(unittest.TestCase):
+    """Test suite for the hierarchical pathfinding"""
+
+    def setUp(self):
+        # Tile the test grid so that paths cross several clusters
+        self.grid = [[GRID[x % 8][y % 8] for y in range(30)] for x in range(30)]
+        self.hpa = Hpa_graph(self.grid, 6)
+        self.cells = [Pos(x, y) for x in range(30) for y in range(30) if self.grid[x][y].walkable]
+
+    def test_valid_paths(self):
+        """Test that refined paths are walkable and reach the goal"""
+        for start in self.cells[::7]:
+            for goal in self.cells[::41]:
+                expected = Astar(self.grid, start, goal, blocked=[])
+                lazy = self.hpa.find(start, [goal])
+                self.assertEqual(lazy is None, expected is None)
+                if lazy is None:
+                    continue
+                path = lazy.to_list(start)
+                self.assertEqual(path[-1], goal)
+                for a, b in zip(path, path[1:]):
+                    self.assertEqual(max(abs(a.x - b.x), abs(a.y - b.y)), 1)
+                    self.assertTrue(self.grid[b.x][b.y].walkable)
+
+    def test_shared_goal(self):
+        """Test that the heroes heading to the same goal share its distances"""
+        goal = Pos(24, 29)
+        first = {}
+        self.hpa.find(self.cells[0], [goal], stats=first)
+        again = {}
+        lazy = self.hpa.find(self.cells[40], [goal], stats=again)
+        self.assertGreater(first["expanded"], 0)
+        self.assertEqual(again, {})
+        self.assertEqual(lazy.to_list(self.cells[40])[-1], goal)
+
+    def test_lazy_refinement(self):
+        """Test that only the first segment is refined to read the next step"""
+        lazy = self.hpa.find(Pos(0, 0), [Pos(24, 29)])
+        lazy[-1]
+        self.assertEqual(lazy.segment, 1)
+        self.assertGreater(len(lazy.nodes), 2)
+
+
+class TestLandmarks(unittest.TestCase):
+    """Test suite for the ALT heuristic"""
+
+    def setUp(self):
+        self.landmarks = Landmarks(GRID)
+        self.graph = get_graph(GRID)
+        self.cells = [i for i in range(self.graph.size) if self.graph.walkable[i]]
+
+    def test_admissible(self):
+        """Test that the heuristic never overestimates a distance"""
+        field = Flow_field(GRID, [Pos(2, 2)], blocked=[])
+        e = self.graph.index(Pos(2, 2))
+        for i in self.cells:
+            self.assertLessEqual(self.landmarks.h(i, e), field.dist(self.graph.pos(i)))
+
+    def test_fewer_expansions(self):
+        """Test that A* finds as good paths while expanding fewer nodes"""
+        plain = {}
+        alt = {}
+        for s in self.cells[::3]:
+            for e in self.cells[::5]:
+                start = self.graph.pos(s)
+                end = self.graph.pos(e)
+                a = Astar(GRID, start, end, blocked=[], stats=plain)
+                b = Astar(GRID, start, end, blocked=[], landmarks=self.landmarks, stats=alt)
+                self.assertEqual(len(a), len(b))
+        self.assertLess(alt["expanded"], plain["expanded"])
+
+
+class TestAnytimeAstar(unittest.TestCase):
+    """Test suite for the budgeted search"""
+
+    def assert_walkable(self, grid, path):
+        for a, b in zip(path, path[1:]):
+            self.assertEqual(max(abs(a.x - b.x), abs(a.y - b.y)), 1)
+            self.assertTrue(grid[b.x][b.y].walkable)
+
+    def test_budget_respected(self):
+        """Test that a step never expands more nodes than its budget"""
+        search = Anytime_astar(GRID, Pos(0, 0), [Pos(2, 2)], blocked=[])
+        steps = 0
+        while True:
+            stats = {}
+            done = search.step(3, stats)
+            self.assertLessEqual(stats["expanded"], 3)
+            steps += 1
+            if done:
+                break
+        self.assertGreater(steps, 1)
+
+    def test_same_cost_as_astar(self):
+        """Test that the search ends with a path as cheap as A*"""
+        blocked = [Pos(0, 3), Pos(4, 7)]
+        search = Anytime_astar(GRID, Pos(0, 0), [Pos(2, 2)], blocked=blocked)
+        while not search.step(2):
+            pass
+        path = search.path_from(Pos(0, 0))
+        self.assertEqual(path[-1], Pos(2, 2))
+        self.assertEqual(path_cost(GRID, path, blocked),
+                         path_cost(GRID, Astar(GRID, Pos(0, 0), Pos(2, 2), blocked=blocked), blocked))
+
+    def test_partial_path(self):
+        """Test that an unfinished search gives a walkable partial path"""
+        search = Anytime_astar(GRID, Pos(0, 0), [Pos(2, 2)], blocked=[])
+        search.step(5)
+        self.assertFalse(search.done)
+        path = search.path_from(Pos(0, 0))
+        self.assertEqual(path[0], Pos(0, 0))
+        self.assertGreater(len(path), 1)
+        self.assert_walkable(GRID, path)
+
+        # Walk the partial path, then finish the search from there
+        start = path[-1]
+        while not search.step(5):
+            pass
+        path = search.path_from(start)
+        self.assertEqual(path[0], start)
+        self.assertEqual(path[-1], Pos(2, 2))
+        self.assert_walkable(GRID, path)
+
+    def test_unreachable(self):
+        """Test that an unreachable goal ends the search without a path"""
+        grid = make_grid(["..#..", "..#..", "..#.."])
+        search = Anytime_astar(grid, Pos(0, 0), [Pos(0, 4)], blocked=[])
+        self.assertFalse(search.step(2))
+        self.assertIsNotNone(search.path_from(Pos(0, 0)))
+        while not search.step(2):
+            pass
+        self.assertIsNone(search.path_from(Pos(0, 0)))
+
+
+class TestBackends(unittest.TestCase):
+    """Test suite for the pathfinder backends"""
+
+    def test_same_cost_as_astar(self):
+        """Test that every backend finds paths as cheap as A*"""
+        cells = [Pos(x, y) for x in range(len(GRID)) for y in range(len(GRID[0])) if GRID[x][y].walkable]
+        blocked = [Pos(0, 3), Pos(4, 7), Pos(6, 2)]
+        for name, backend in PATHFINDERS.items():
+            for start in cells[::3]:
+                for goal in cells[::4]:
+                    expected = Astar(GRID, start, goal, blocked=blocked)
+                    path = backend.find(GRID, start, [goal], blocked)
+                    self.assertEqual(path[0], start, name)
+                    self.assertEqual(path[-1], goal, name)
+                    for a, b in zip(path, path[1:]):
+                        self.assertEqual(max(abs(a.x - b.x), abs(a.y - b.y)), 1, name)
+                        self.assertTrue(GRID[b.x][b.y].walkable, name)
+                    self.assertEqual(path_cost(GRID, path, blocked),
+                                     path_cost(GRID, expected, blocked), name)
+
+    def test_several_goals(self):
+        """Test that every backend reaches the nearest of several goals"""
+        for name, backend in PATHFINDERS.items():
+            self.assertEqual(backend.find(GRID, Pos(0, 5), [Pos(0, 7), Pos(6, 0)], [])[-1], Pos(0, 7), name)
+
+    def test_unreachable(self):
+        """Test that every backend returns None when no goal can be reached"""
+        grid = make_grid(["..#..", "..#..", "..#.."])
+        for name, backend in PATHFINDERS.items():
+            self.assertIsNone(backend.find(grid, Pos(0, 0), [Pos(0, 4)], []), name)
+
+    def test_jps_expands_less_on_open_maps(self):
+        """Test that Jump Point Search skips the open cells that A* expands"""
+        grid = make_grid(["." * 40] * 40)
+        astar = {}
+        jps = {}
+        PATHFINDERS["astar"].find(grid, Pos(0, 3), [Pos(39, 30)], [], stats=astar)
+        PATHFINDERS["jps"].find(grid, Pos(0, 3), [Pos(39, 30)], [], stats=jps)
+        self.assertLess(jps["expanded"], astar["expanded"])
+
+    def test_automatic_choice(self):
+        """Test that Jump Point Search is only chosen for big open maps"""
+        self.assertEqual(Map_stats(GRID).best_pathfinder(), "bidirectional")
+        self.assertEqual(Map_stats(make_grid(["." * 100] * 100)).best_pathfinder(), "jps")
+
+
+
+if __name__ == '__main__':
+    unittest.main()
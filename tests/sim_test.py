@@ -0,0 +1,187 @@
+import unittest
+from os.path import join
+from src.core.consts import MAPS_PATH
+from src.core.level import import_map
+from src.core.game_instance import Game_instance
+from src.core.all_entities import Rat
+from src.core.utils_types import Pos
+from src.sim.build_order import Build_step, PLACE, UPGRADE, DELETE, parse_build_order, apply_build_order
+from src.sim.runner import simulate
+from src.sim.evaluate import Placement, layout_steps, evaluate, Evaluator, Layout_stats
+from src.sim.optimize import Plan_space, optimize, fitness
+from src.sim.build_order import format_build_order
+from src.core.consts import BASE_GOLD, MONEY_PER_WAVE
+from random import Random
+from time import perf_counter
+from tests.game_test import make_level, ROWS
+
+
+class TestBuildOrder(unittest.TestCase):
+    """Test suite for the build orders of the headless runner"""
+
+    def test_parse(self):
+        """Test that the steps are read in order, without the comments"""
+        steps = parse_build_order("# comment\n0 place ArcherTower 2 3\n\n1 upgrade 2 3  # again\n2 delete 2 3\n")
+        self.assertEqual(steps, [Build_step(0, PLACE, Pos(2, 3), "ArcherTower"),
+                                 Build_step(1, UPGRADE, Pos(2, 3)),
+                                 Build_step(2, DELETE, Pos(2, 3))])
+
+    def test_parse_invalid(self):
+        """Test that unknown buildings and malformed lines are reported"""
+        for text in ["0 place Catapult 2 3", "0 upgrade 2", "place ArcherTower 2 3", "0 sell 2 3"]:
+            with self.assertRaises(ValueError):
+                parse_build_order(text)
+
+    def test_apply_waits_for_gold(self):
+        """Test that the steps too expensive wait for the next building phase"""
+        game = Game_instance(make_level(ROWS))
+        game.gold = 250
+        steps = parse_build_order("0 place ArcherTower 2 1\n0 place ElectricTower 2 2\n0 upgrade 2 1\n1 upgrade 2 1")
+        left, dropped = apply_build_order(game, steps)
+        self.assertEqual(len(game.buildings), 1)
+        self.assertEqual(left, steps[1:])
+        self.assertEqual(dropped, 0)
+        game.gold = 1000
+        game.current_wave = 1
+        left, dropped = apply_build_order(game, left)
+        self.assertEqual(left, [])
+        self.assertEqual(len(game.buildings), 2)
+        self.assertEqual(next(iter(game.buildings)).level, 3)
+
+    def test_apply_drops_impossible(self):
+        """Test that the steps that cannot be done are dropped"""
+        game = Game_instance(make_level(ROWS))
+        steps = parse_build_order("0 place ArcherTower 1 1\n0 upgrade 3 3\n0 place ArcherTower 2 1")
+        left, dropped = apply_build_order(game, steps)
+        self.assertEqual(left, [])
+        self.assertEqual(dropped, 2)
+        self.assertEqual([b.pos for b in game.buildings], [Pos(2, 1)])
+
+
+class TestSimulate(unittest.TestCase):
+    """Test suite for the games played without waiting"""
+
+    def test_all_waves(self):
+        """Test that a level is played through its waves until it is over"""
+        template = make_level(ROWS, [{Rat: 1}, {Rat: 2}])
+        res = simulate(template, parse_build_order("0 place ArcherTower 2 7\n1 upgrade 2 7"), seed=1)
+        self.assertTrue(res.finished)
+        self.assertEqual(res.waves, 2)
+        self.assertEqual(len(res.wave_scores), 2)
+        self.assertEqual(res.dropped, 0)
+        self.assertGreater(res.ticks, 0)
+
+    def test_same_seed(self):
+        """Test that two games with the same seed end the same way"""
+        template = import_map(join(MAPS_PATH, "classic.map"))
+        steps = parse_build_order("0 place ArcherTower 2 2\n0 place ArcherTower 5 8")
+        a = simulate(template, steps, seed=3)
+        b = simulate(template, steps, seed=3)
+        self.assertEqual((a.won, a.score, a.jewels_left, a.ticks), (b.won, b.score, b.jewels_left, b.ticks))
+
+    def test_max_ticks(self):
+        """Test that a game is stopped after the given number of ticks"""
+        res = simulate(import_map(join(MAPS_PATH, "classic.map")), max_ticks=10)
+        self.assertFalse(res.finished)
+        self.assertEqual(res.ticks, 10)
+
+
+class TestEvaluate(unittest.TestCase):
+    """Test suite for the evaluation of layouts over several games"""
+
+    def test_layout_steps(self):
+        """Test that a layout places every building before upgrading them"""
+        steps = layout_steps([Placement("ArcherTower", Pos(2, 2), 3), Placement("Pitfall", Pos(1, 4))])
+        self.assertEqual([(s.action, s.pos) for s in steps], [(PLACE, Pos(2, 2)), (PLACE, Pos(1, 4)),
+                                                             (UPGRADE, Pos(2, 2)), (UPGRADE, Pos(2, 2))])
+
+    def test_same_as_games(self):
+        """Test that the statistics gather the games played with each seed"""
+        path = join(MAPS_PATH, "classic.map")
+        layouts = [layout_steps([Placement("ArcherTower", Pos(2, 2), 2)]), []]
+        stats = evaluate(path, layouts, [4, 5], workers=1, max_ticks=300)
+        for steps, s in zip(layouts, stats):
+            games = [simulate(import_map(path), steps, seed, 300) for seed in (4, 5)]
+            self.assertEqual(s.games, 2)
+            self.assertEqual(s.wins, sum(g.won for g in games))
+            self.assertEqual(s.jewels_stolen, [g.jewels_stolen for g in games])
+            self.assertEqual(s.ticks, sum(g.ticks for g in games))
+
+    def test_workers(self):
+        """Test that games spread over processes end as in this one"""
+        path = join(MAPS_PATH, "classic.map")
+        layouts = [layout_steps([Placement("ArcherTower", Pos(5, 8), 3)]), []]
+        alone = evaluate(path, layouts, range(3), workers=1, max_ticks=300)
+        spread = evaluate(path, layouts, range(3), workers=2, max_ticks=300)
+        for a, b in zip(alone, spread):
+            self.assertEqual((a.wins, a.jewels_stolen, a.wave_scores, a.ticks),
+                             (b.wins, b.jewels_stolen, b.wave_scores, b.ticks))
+
+    def test_deadline(self):
+        """Test that no game starts after the deadline"""
+        path = join(MAPS_PATH, "classic.map")
+        for workers in (1, 2):
+            with Evaluator(path, workers, max_ticks=300) as evaluator:
+                stats = evaluator.evaluate([[], []], range(4), perf_counter())
+            self.assertEqual([s.games for s in stats], [0, 0])
+
+
+class TestOptimize(unittest.TestCase):
+    """Test suite for the search of build orders"""
+
+    def setUp(self):
+        self.path = join(MAPS_PATH, "classic.map")
+        self.space = Plan_space(import_map(self.path))
+
+    def test_format(self):
+        """Test that a written build order reads back the same"""
+        steps = [Build_step(0, PLACE, Pos(2, 2), "ArcherTower"), Build_step(1, UPGRADE, Pos(2, 2))]
+        self.assertEqual(parse_build_order(format_build_order(steps)), steps)
+
+    def test_spare(self):
+        """Test that the gold of each building phase pays for its steps"""
+        steps = (Build_step(0, PLACE, Pos(2, 2), "ArcherTower"), Build_step(1, UPGRADE, Pos(2, 2)))
+        spare = self.space.spare(steps)
+        self.assertEqual(spare[0], BASE_GOLD - 100)
+        self.assertEqual(spare[1], BASE_GOLD + MONEY_PER_WAVE - 200)
+        self.assertIsNone(self.space.spare((Build_step(0, UPGRADE, Pos(2, 2)),)))
+        deleted = (Build_step(0, PLACE, Pos(2, 2), "ArcherTower"), Build_step(1, DELETE, Pos(2, 2)),
+                   Build_step(2, PLACE, Pos(2, 2), "ElectricTower"))
+        self.assertEqual(self.space.spare(deleted)[1], BASE_GOLD + MONEY_PER_WAVE - 100 + 50)
+        self.assertIsNone(self.space.spare(deleted[:1] + deleted[2:]))
+        self.assertIsNone(self.space.spare(deleted[1:]))
+        self.assertIsNone(self.space.spare(tuple(Build_step(0, PLACE, p, "ElectricTower")
+                                                 for p in self.space.cells["ElectricTower"])))
+
+    def test_children(self):
+        """Test that the children of a build order can be done"""
+        rng = Random(1)
+        steps = ()
+        for _ in range(30):
+            children = self.space.children(steps, rng, 4)
+            for child in children:
+                self.assertIsNotNone(self.space.spare(child))
+                self.assertEqual([s.wave for s in child], sorted(s.wave for s in child))
+            steps = children[0]
+
+    def test_fitness_without_games(self):
+        """Test that a build order without games ranks below the played ones"""
+        played = evaluate(self.path, [[]], [0], 1, 300)[0]
+        self.assertLess(fitness(Layout_stats([])), fitness(played))
+
+    def test_optimize(self):
+        """Test that the search keeps the best build order it played"""
+        res = optimize(self.path, 1, nb_seeds=1, workers=1, width=2, branching=2, max_ticks=300)
+        self.assertGreater(res.evaluations, 1)
+        self.assertGreaterEqual(fitness(res.stats), fitness(evaluate(self.path, [[]], [0], 1, 300)[0]))
+        self.assertEqual(fitness(res.stats), fitness(evaluate(self.path, [res.steps], [0], 1, 300)[0]))
+
+    def test_time_budget(self):
+        """Test that the search stops close to its time budget"""
+        res = optimize(self.path, 1, nb_seeds=2, workers=2, max_ticks=300)
+        self.assertLess(res.seconds, 3)
+        self.assertEqual(res.stats.games, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import json
+from os.path import join
+from src.core.consts import MAPS_PATH
+from src.core.level import import_map
+from src.core.game_instance import Game_instance
+from src.core.utils_types import Pos
+from src.core.buildings.all_buildings import ALL_BUILDINGS
+from src.web.to_dict import to_dict, catalog_to_dict
+
+try:
+    from fastapi.encoders import jsonable_encoder
+    from src import main_web
+except ImportError:
+    main_web = None
+
+
+class TestBuildingCatalog(unittest.TestCase):
+    """Test suite for the buildings sent to the catalog of the web version"""
+
+    def test_catalog_to_dict(self):
+        """Test that every building gives what the catalog reads as JSON"""
+        for b in ALL_BUILDINGS:
+            d = json.loads(json.dumps(catalog_to_dict(b)))
+            self.assertEqual((d["name"], d["level"], d["cost"]), (b.name, b.level, b.cost))
+            if hasattr(b, "hp"):
+                self.assertEqual(d["hp"], b.hp)
+
+    @unittest.skipIf(main_web is None, "FastAPI is not installed")
+    def test_endpoint(self):
+        """Test that the placeable buildings and a placed one are encoded"""
+        game = Game_instance(import_map(join(MAPS_PATH, "classic.map")))
+        placeable = game.get_placeable_buildings(Pos(2, 2))
+        res = jsonable_encoder(main_web.tt({"game": to_dict(game), "x": 2, "y": 2}))
+        self.assertEqual([(d["name"], d["cost"]) for d, _ in res], [(b.name, b.cost) for b in placeable])
+        game.place(placeable[-1], Pos(2, 2))
+        building, desc = jsonable_encoder(main_web.tt({"game": to_dict(game), "x": 2, "y": 2}))
+        self.assertEqual((building["name"], building["level"]), (placeable[-1].name, 1))
+        self.assertIsInstance(desc, str)
+
+
+if __name__ == '__main__':
+    unittest.main()